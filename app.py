@@ -1,9 +1,23 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import (
+    Flask,
+    Response,
+    g,
+    render_template,
+    request,
+    redirect,
+    url_for,
+    flash,
+    jsonify,
+    send_file,
+    stream_with_context,
+)
 from werkzeug.utils import secure_filename
 import os
 import string
+import base64
+import binascii
+import json
 from dotenv import load_dotenv
-import requests
 import time
 
 # Load environment variables
@@ -12,10 +26,22 @@ load_dotenv()
 # Import các module crypto bạn sẽ tự cài đặt
 from crypto.caesar import break_caesar
 from crypto.substitution import break_substitution
-from crypto.vigenere import break_vigenere
-from crypto.des_modes import des_encrypt, des_decrypt
-from crypto.aes_modes import aes_encrypt, aes_decrypt
-from crypto.charset_filter import validate_and_filter
+from crypto.vigenere import break_vigenere, break_vigenere_variant, VARIANTS
+from crypto import aes_modes, des_modes
+from crypto.des_modes import des_encrypt, des_decrypt, des_stream
+from crypto.aes_modes import aes_encrypt, aes_decrypt, aes_stream
+from crypto.charset_filter import filter_charset, validate_and_filter
+from crypto.classifier import break_auto
+from crypto import des_keysearch
+from crypto import metrics, profiling
+from crypto.models import model_status, preload_models
+from crypto.streaming import (
+    StreamStats,
+    decrypt_chunks,
+    iter_string_chunks,
+    iter_text_chunks,
+    solve_stats,
+)
 
 # Configure Gemini API
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -43,11 +69,28 @@ def validate_text_length(text, max_length=MAX_CONTENT_LENGTH):
     if len(text) > max_length:
         return (
             False,
-            f"Text quá dài. Tối đa {max_length} ký tự (hiện tại: {len(text)} ký tự).",
+            f"Text quá dài. Tối đa {max_length} ký tự (hiện tại: {len(text)} ký tự). "
+            "Dùng ?stream=1 cho file lớn.",
         )
     return True, None
 
 
+def input_exceeds_limit(file, text_input, max_length=MAX_CONTENT_LENGTH):
+    """
+    Input vượt MAX_CONTENT_LENGTH -> các route phá mã tự chuyển sang
+    pipeline stream thay vì báo lỗi. File upload đo bằng seek (không đọc).
+    """
+    if text_input and text_input.strip():
+        return len(text_input.strip()) > max_length
+    if file and file.filename:
+        stream = file.stream
+        pos = stream.tell()
+        size = stream.seek(0, os.SEEK_END)
+        stream.seek(pos)
+        return size > max_length
+    return False
+
+
 def process_input(file, text_input):
     """
     Process file upload or text input with validation.
@@ -79,6 +122,201 @@ def process_input(file, text_input):
     return True, data
 
 
+def wants_stream():
+    """
+    Chế độ streaming: query ?stream=1 (hoặc form field stream=1), hoặc tự
+    động khi input vượt MAX_CONTENT_LENGTH.
+    """
+    flag = request.args.get("stream") or request.form.get("stream") or ""
+    if flag.lower() in ("1", "true", "yes"):
+        return True
+    return input_exceeds_limit(
+        request.files.get("cipher_file"), request.form.get("cipher_text") or ""
+    )
+
+
+def open_stream_source(file, text_input):
+    """
+    Như process_input nhưng không giới hạn độ dài và không đọc hết file:
+    trả về (success, open_chunks_or_error). open_chunks() mở lại iterator
+    chunk từ đầu (file upload được seek về 0) để chạy được 2 pass.
+    """
+    if text_input and text_input.strip():
+        text = text_input.strip()
+        return True, lambda: iter_string_chunks(text)
+    if file and file.filename:
+        if not allowed_file(file.filename):
+            return False, "Chỉ chấp nhận file .txt"
+
+        def open_chunks():
+            file.stream.seek(0)
+            return iter_text_chunks(file.stream)
+
+        return True, open_chunks
+    return False, "Vui lòng upload file .txt HOẶC nhập text trực tiếp"
+
+
+def solve_stream_source(cipher, variant="vigenere", charset_filter=False):
+    """
+    Pass 1 của pipeline stream trên input của request (crypto/streaming.py):
+    thống kê + sample -> solver. Trả về (success, (info, open_chunks) hoặc
+    thông báo lỗi); open_chunks() mở lại input cho pass 2 giải mã.
+    """
+    file = request.files.get("cipher_file")
+    cipher_text = request.form.get("cipher_text") or ""
+    success, result = open_stream_source(file, cipher_text)
+    if not success:
+        return False, result
+
+    open_chunks = result
+    if charset_filter:
+        open_chunks = lambda: map(filter_charset, result())
+
+    stats = StreamStats()
+    for chunk in open_chunks():
+        stats.update(chunk)
+    metrics.STREAM_CHARS.inc(stats.chars, cipher=cipher, kind="chars")
+    metrics.STREAM_CHARS.inc(stats.letters, cipher=cipher, kind="letters")
+
+    return True, (solve_stats(stats, cipher, variant), open_chunks)
+
+
+def stream_preview(cipher, variant="vigenere"):
+    """
+    Cho form route (Task 1/2/3) khi input vượt MAX_CONTENT_LENGTH: phá mã
+    qua pipeline stream, plaintext chỉ giải mã tới MAX_CONTENT_LENGTH ký tự
+    đầu để hiển thị. Trả về (success, (info, plaintext) hoặc lỗi).
+    """
+    success, result = solve_stream_source(cipher, variant)
+    if not success:
+        return False, result
+    info, open_chunks = result
+    parts, size = [], 0
+    for chunk in decrypt_chunks(
+        open_chunks(), info["cipher"], info["key"], info["variant"]
+    ):
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= MAX_CONTENT_LENGTH:
+            break
+    plaintext = "".join(parts)[:MAX_CONTENT_LENGTH]
+    note = (
+        f"[Input lớn ({info['stats']['chars']} ký tự): phá mã theo stream, hiển "
+        f"thị {len(plaintext)} ký tự đầu. Dùng API ?stream=1 để tải toàn bộ.]\n\n"
+    )
+    return True, (info, note + plaintext)
+
+
+def stream_break(cipher, variant="vigenere", charset_filter=False):
+    """
+    Phá mã input lớn theo stream (xem crypto/streaming.py):
+    pass 1 thống kê + sample -> solver -> pass 2 giải mã từng chunk.
+    Plaintext trả về dạng text/plain streamed; cipher/key/score/stats nằm
+    trong header X-Cipher, X-Variant, X-Key, X-Score, X-Stats (JSON).
+    """
+    success, result = solve_stream_source(cipher, variant, charset_filter)
+    if not success:
+        return jsonify({"success": False, "error": result}), 400
+
+    info, open_chunks = result
+    headers = {
+        "X-Cipher": info["cipher"],
+        "X-Variant": info["variant"] or "",
+        "X-Key": str(info["key"]),
+        "X-Score": "" if info["score"] is None else str(info["score"]),
+        "X-Stats": json.dumps(info["stats"]),
+    }
+    chunks = decrypt_chunks(open_chunks(), info["cipher"], info["key"], info["variant"])
+    return Response(
+        stream_with_context(chunks),
+        mimetype="text/plain",
+        headers=headers,
+    )
+
+
+def create_app(preload=True):
+    """
+    Application factory (gunicorn: "app:create_app()", xem gunicorn.conf.py).
+    preload=True: load mọi model trước khi trả app -> với preload_app, việc
+    load chạy 1 lần ở master rồi các worker fork dùng chung (copy-on-write).
+    """
+    if preload:
+        preload_models()
+    return app
+
+
+# Profiling theo request (opt-in): LAB06_PROFILING=1 rồi gửi header
+# "X-Profile: cprofile|sample" hoặc ?profile=cprofile|sample
+app.config["PROFILING_ENABLED"] = os.getenv("LAB06_PROFILING", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+    if app.config["PROFILING_ENABLED"] and not request.path.startswith("/debug/"):
+        mode = request.headers.get("X-Profile") or request.args.get("profile") or ""
+        mode = mode.strip().lower()
+        if mode in profiling.MODES:
+            label = request.endpoint or "unmatched"
+            g.profile = profiling.Profile(label, mode).start()
+
+
+@app.after_request
+def _record_request_metrics(response):
+    """Latency histogram theo route (rule, không phải URL thật -> ít label)."""
+    prof = g.pop("profile", None)
+    if prof is not None:
+        # Response stream: chỉ profile được phần trước khi gửi header
+        path = prof.stop()
+        response.headers["X-Profile-File"] = os.path.basename(path)
+
+    start = g.get("request_start")
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            route=route,
+            method=request.method,
+            status=response.status_code,
+        )
+    return response
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus text format (xem crypto/metrics.py)."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/debug/profiles")
+def debug_profiles():
+    """Danh sách file profile (mới nhất trước)."""
+    if not app.config["PROFILING_ENABLED"]:
+        return jsonify({"success": False, "error": "Profiling đang tắt."}), 404
+    return jsonify({"success": True, "profiles": profiling.list_profiles()})
+
+
+@app.route("/debug/profiles/<name>")
+def debug_profile_download(name):
+    """Tải 1 file profile (.pstats / .folded)."""
+    path = profiling.profile_path(name) if app.config["PROFILING_ENABLED"] else None
+    if path is None:
+        return jsonify({"success": False, "error": "Không tìm thấy profile."}), 404
+    return send_file(path, as_attachment=True, download_name=name)
+
+
+@app.route("/readyz")
+def readyz():
+    """Readiness: 200 khi mọi model đã load, 503 nếu chưa (worker còn lạnh)."""
+    status = model_status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
 @app.route("/")
 def index():
     """
@@ -95,8 +333,20 @@ def task1_caesar():
     file = request.files.get("cipher_file")
     cipher_text = request.form.get("cipher_text") or ""
 
-    # Process and validate input
-    success, result = process_input(file, cipher_text)
+    # Input vượt giới hạn (hoặc ?stream=1): phá mã qua pipeline stream
+    if wants_stream():
+        success, result = stream_preview("caesar")
+        if success:
+            info, plaintext = result
+            return render_template(
+                "index.html",
+                active_tab="task1",
+                task1_key=info["key"],
+                task1_result=plaintext,
+            )
+    else:
+        # Process and validate input
+        success, result = process_input(file, cipher_text)
     if not success:
         return render_template(
             "index.html",
@@ -135,8 +385,22 @@ def task2_substitution():
     file = request.files.get("cipher_file")
     cipher_text = request.form.get("cipher_text") or ""
 
-    # Process and validate input
-    success, result = process_input(file, cipher_text)
+    # Input vượt giới hạn (hoặc ?stream=1): phá mã qua pipeline stream
+    if wants_stream():
+        success, result = stream_preview("substitution")
+        if success:
+            info, plaintext = result
+            return render_template(
+                "index.html",
+                active_tab="task2",
+                task2_score=f"{info['score']:.2f}",
+                task2_cipher=ALPHABET.upper(),
+                task2_mapping=info["key"],
+                task2_result=plaintext,
+            )
+    else:
+        # Process and validate input
+        success, result = process_input(file, cipher_text)
     if not success:
         return render_template(
             "index.html",
@@ -204,8 +468,21 @@ def task3_vigenere():
     file = request.files.get("cipher_file")
     cipher_text = request.form.get("cipher_text") or ""
 
-    # Process and validate input
-    success, result = process_input(file, cipher_text)
+    # Input vượt giới hạn (hoặc ?stream=1): phá mã qua pipeline stream
+    if wants_stream():
+        success, result = stream_preview("vigenere")
+        if success:
+            info, plaintext = result
+            return render_template(
+                "index.html",
+                active_tab="task3",
+                task3_key=info["key"],
+                task3_result=plaintext,
+                task3_score=info["score"],
+            )
+    else:
+        # Process and validate input
+        success, result = process_input(file, cipher_text)
     if not success:
         return render_template(
             "index.html",
@@ -238,159 +515,181 @@ def task3_vigenere():
 
 
 # ====================
-# TASK 4 – DES
+# TASK 4/5 – DES/AES: parse + validate dùng chung
 # ====================
-@app.route("/task4/des", methods=["POST"])
-def task4_des():
-    file = request.files.get("input_file")
-    plaintext_input = request.form.get("plaintext_input") or ""
-    mode = request.form.get("mode")  # 'ECB' hoặc 'CBC' ...
-    action = request.form.get("action")  # 'encrypt' hoặc 'decrypt'
-    key_hex = request.form.get("key") or ""
-    iv_hex = request.form.get("iv") or ""
+# key_size (bit) -> (số byte key, tên hiển thị)
+AES_KEY_SIZES = {"128": (16, "AES-128"), "192": (24, "AES-192"), "256": (32, "AES-256")}
+MAX_BATCH_ITEMS = 1000
 
-    if not mode or not action or not key_hex:
-        return redirect(url_for("index"))
+PADDING_HINT = (
+    "\n\nGợi ý: Key hoặc IV có thể không đúng. Lưu ý: Ngay cả khi key sai, "
+    "đôi khi vẫn decrypt được nhưng kết quả sẽ là dữ liệu vô nghĩa."
+)
 
-    # Xử lý input
-    data = None
-    if plaintext_input.strip():
-        # Người dùng nhập vào textarea
-        # Nếu là decrypt → coi như hex, nếu encrypt → coi như plaintext
-        if action == "decrypt":
-            # Decrypt: input phải là hex
-            hex_text = "".join(plaintext_input.split())
-            try:
-                data = bytes.fromhex(hex_text)
-            except ValueError:
-                return render_template(
-                    "index.html",
-                    active_tab="task4",
-                    task4_result="ERROR: Khi decrypt, input phải là hex. Paste ciphertext hex vào ô textarea.",
-                    task4_iv="",
-                )
-        else:
-            # Encrypt: input là plaintext
-            data = plaintext_input.encode("utf-8")
-    elif file and file.filename:
-        # Đọc file content
-        file_content = file.read().decode("utf-8", errors="ignore")
 
-        if action == "decrypt":
-            # Decrypt: file phải chứa hex
-            hex_text = "".join(file_content.split())
-            try:
-                data = bytes.fromhex(hex_text)
-            except ValueError:
-                return render_template(
-                    "index.html",
-                    active_tab="task4",
-                    task4_result="ERROR: Khi decrypt, file phải chứa chuỗi hex hợp lệ.",
-                    task4_iv="",
-                )
-        else:
-            # Encrypt: file chứa plaintext
-            data = file_content.encode("utf-8")
+def parse_hex(text, error_msg):
+    """Bỏ whitespace rồi parse hex; raise ValueError(error_msg) nếu sai."""
+    try:
+        return bytes.fromhex("".join(text.split()))
+    except ValueError:
+        raise ValueError(error_msg)
 
-    if data is None:
-        return render_template(
-            "index.html",
-            active_tab="task4",
-            task4_result="ERROR: Phải upload file hex HOẶC nhập vào textarea.",
-            task4_iv="",
-        )
 
-    # Key - chấp nhận hex hoặc plaintext
-    key_format = request.form.get("key_format") or "hex"
-    key_input = request.form.get("key") or ""
-    key_input = key_input.strip()
+def parse_key(key_input, key_format, expected_bytes, cipher_name):
+    """
+    Key dạng hex (mặc định) hoặc plaintext ASCII, kiểm tra đúng expected_bytes.
+    Raise ValueError với thông báo hiển thị cho người dùng.
+    """
+    key_input = (key_input or "").strip()
 
     if key_format == "plaintext":
-        # Nếu là plaintext, chuyển thành bytes rồi kiểm tra độ dài
         key = key_input.encode("utf-8")
-        if len(key) != 8:
-            return render_template(
-                "index.html",
-                active_tab="task4",
-                task4_result=f"ERROR: DES key plaintext phải là 8 ký tự ASCII (8 bytes). Bạn đang nhập {len(key)} bytes.",
-                task4_iv="",
+        if len(key) != expected_bytes:
+            raise ValueError(
+                f"{cipher_name} key plaintext phải là {expected_bytes} ký tự ASCII ({expected_bytes} bytes). Bạn đang nhập {len(key)} bytes."
             )
-    else:
-        # Key format là hex
-        key_hex = "".join(key_input.split())
+        return key
 
-        if len(key_hex) != 16:
-            return render_template(
-                "index.html",
-                active_tab="task4",
-                task4_result=f"ERROR: DES key phải là 16 ký tự hex (8 bytes). Bạn đang nhập {len(key_hex)} ký tự.",
-                task4_iv="",
-            )
+    key_hex = "".join(key_input.split())
+    if len(key_hex) != 2 * expected_bytes:
+        raise ValueError(
+            f"{cipher_name} key phải là {2 * expected_bytes} ký tự hex ({expected_bytes} bytes). Bạn đang nhập {len(key_hex)} ký tự."
+        )
+    return parse_hex(
+        key_hex,
+        f"Key không hợp lệ. Chỉ chấp nhận ký tự hex (0-9, A-F). Bạn nhập: '{key_hex}'",
+    )
 
-        try:
-            key = bytes.fromhex(key_hex)
-        except ValueError:
-            return render_template(
-                "index.html",
-                active_tab="task4",
-                task4_result=f"ERROR: Key không hợp lệ. Chỉ chấp nhận ký tự hex (0-9, A-F). Bạn nhập: '{key_hex}'",
-                task4_iv="",
-            )
 
-    # IV (nếu có) - chỉ chấp nhận hex
+def parse_iv(iv_input, mode, block_size, cipher_name):
+    """
+    IV hex (tùy chọn); bắt buộc với mọi mode khác ECB.
+    GCM: nonce độ dài bất kỳ (khác rỗng, khuyến nghị 12 bytes).
+    """
     iv = None
-    if iv_hex.strip():
-        iv_hex_clean = "".join(iv_hex.split())
+    iv_hex = "".join((iv_input or "").split())
+    if iv_hex:
+        if mode.upper() == "GCM":
+            if len(iv_hex) % 2:
+                raise ValueError(
+                    f"{cipher_name} GCM nonce phải là số chẵn ký tự hex. Bạn đang nhập {len(iv_hex)} ký tự."
+                )
+        elif len(iv_hex) != 2 * block_size:
+            raise ValueError(
+                f"{cipher_name} IV phải là {2 * block_size} ký tự hex ({block_size} bytes). Bạn đang nhập {len(iv_hex)} ký tự."
+            )
+        iv = parse_hex(iv_hex, "IV không hợp lệ. Chỉ chấp nhận ký tự hex (0-9, A-F).")
 
-        if len(iv_hex_clean) != 16:
-            return render_template(
-                "index.html",
-                active_tab="task4",
-                task4_result=f"ERROR: DES IV phải là 16 ký tự hex (8 bytes). Bạn đang nhập {len(iv_hex_clean)} ký tự.",
-                task4_iv="",
+    if mode.upper() != "ECB" and iv is None:
+        if mode.upper() == "GCM":
+            raise ValueError(
+                "Nonce (IV) is required for GCM mode. Please enter a hex nonce (24 hex chars = 12 bytes recommended)."
             )
+        raise ValueError(
+            f"IV is required for {mode.upper()} mode. Please enter a {2 * block_size}-character hex IV."
+        )
+    return iv
 
-        try:
-            iv = bytes.fromhex(iv_hex_clean)
-        except ValueError:
-            return render_template(
-                "index.html",
-                active_tab="task4",
-                task4_result=f"ERROR: IV không hợp lệ. Chỉ chấp nhận ký tự hex (0-9, A-F).",
-                task4_iv="",
+
+def parse_aad(aad_input, mode):
+    """AAD hex (tùy chọn) cho GCM; trả về bytes hoặc None nếu để trống."""
+    aad_hex = "".join((aad_input or "").split())
+    if not aad_hex:
+        return None
+    if mode.upper() != "GCM":
+        raise ValueError("AAD chỉ dùng cho GCM mode.")
+    return parse_hex(aad_hex, "AAD không hợp lệ. Chỉ chấp nhận ký tự hex (0-9, A-F).")
+
+
+def run_block_cipher(encrypt_fn, decrypt_fn, action, data, key, mode, iv, aad=None):
+    """
+    Gọi encrypt/decrypt, trả về (output_bytes, iv_used_hex).
+    aad (GCM) chỉ truyền khi có, DES không nhận tham số này.
+    Lỗi padding được thêm gợi ý key/IV.
+    """
+    extra = {} if aad is None else {"aad": aad}
+    try:
+        if action == "encrypt":
+            output, used_iv = encrypt_fn(data, key, mode.upper(), iv, **extra)
+            iv_used = used_iv if used_iv is not None else iv
+        else:
+            output = decrypt_fn(data, key, mode.upper(), iv, **extra)
+            iv_used = iv
+    except ValueError as e:
+        if "padding" in str(e).lower():
+            raise ValueError(f"{e}{PADDING_HINT}")
+        raise
+    return output, (iv_used.hex() if iv_used else "")
+
+
+def format_decrypted(plaintext):
+    """Plaintext dạng text (UTF-8) nếu decode được, ngược lại hex."""
+    try:
+        return plaintext.decode("utf-8")
+    except UnicodeDecodeError:
+        return f"[Binary data - hex]: {plaintext.hex()}"
+
+
+def read_form_data(file, text_input, action):
+    """
+    Đọc input form DES/AES: textarea ưu tiên hơn file.
+    Decrypt -> input là hex; encrypt -> input là plaintext UTF-8.
+    Trả về bytes hoặc None nếu không có input.
+    """
+    if text_input.strip():
+        if action == "decrypt":
+            return parse_hex(
+                text_input,
+                "Khi decrypt, input phải là hex. Paste ciphertext hex vào ô textarea.",
             )
+        return text_input.encode("utf-8")
+    if file and file.filename:
+        file_content = file.read().decode("utf-8", errors="ignore")
+        if action == "decrypt":
+            return parse_hex(
+                file_content, "Khi decrypt, file phải chứa chuỗi hex hợp lệ."
+            )
+        return file_content.encode("utf-8")
+    return None
 
-    # Nếu dùng CBC mà không có IV => lỗi (bắt buộc cho cả encrypt và decrypt)
-    if mode.upper() != "ECB" and iv is None:
+
+# ====================
+# TASK 4 – DES
+# ====================
+@app.route("/task4/des", methods=["POST"])
+def task4_des():
+    file = request.files.get("input_file")
+    plaintext_input = request.form.get("plaintext_input") or ""
+    mode = request.form.get("mode")  # 'ECB' hoặc 'CBC' ...
+    action = request.form.get("action")  # 'encrypt' hoặc 'decrypt'
+    key_hex = request.form.get("key") or ""
+    iv_hex = request.form.get("iv") or ""
+
+    if not mode or not action or not key_hex:
+        return redirect(url_for("index"))
+
+    try:
+        data = read_form_data(file, plaintext_input, action)
+        if data is None:
+            raise ValueError("Phải upload file hex HOẶC nhập vào textarea.")
+        key_format = request.form.get("key_format") or "hex"
+        key_bytes, key_name = _expected_key_size("DES", key_hex, key_format)
+        key = parse_key(key_hex, key_format, key_bytes, key_name)
+        iv = parse_iv(iv_hex, mode, 8, "DES")
+    except ValueError as e:
         return render_template(
-            "index.html",
-            active_tab="task4",
-            task4_result="ERROR: IV is required for CBC mode. Please enter a 16-character hex IV.",
-            task4_iv="",
+            "index.html", active_tab="task4", task4_result=f"ERROR: {e}", task4_iv=""
         )
 
     try:
-        if action == "encrypt":
-            ciphertext, used_iv = des_encrypt(data, key, mode.upper(), iv)
-            result_output = ciphertext.hex()
-            iv_hex_out = (
-                used_iv.hex() if used_iv is not None else (iv.hex() if iv else "")
-            )
-        else:
-            plaintext = des_decrypt(data, key, mode.upper(), iv)
-            # Trả về plaintext dạng text (UTF-8) thay vì hex
-            try:
-                result_output = plaintext.decode("utf-8")
-            except UnicodeDecodeError:
-                # Nếu không decode được, trả về hex
-                result_output = f"[Binary data - hex]: {plaintext.hex()}"
-            iv_hex_out = iv.hex() if iv else ""
+        output, iv_hex_out = run_block_cipher(
+            des_encrypt, des_decrypt, action, data, key, mode, iv
+        )
+        result_output = (
+            output.hex() if action == "encrypt" else format_decrypted(output)
+        )
     except ValueError as e:
-        error_str = str(e)
-        if "padding" in error_str.lower():
-            result_output = f"ERROR: {e}\n\nGợi ý: Key hoặc IV có thể không đúng. Lưu ý: Ngay cả khi key sai, đôi khi vẫn decrypt được nhưng kết quả sẽ là dữ liệu vô nghĩa."
-        else:
-            result_output = f"ERROR: {e}"
+        result_output = f"ERROR: {e}"
         iv_hex_out = ""
     except Exception as e:
         result_output = f"ERROR during DES {action}: {e}"
@@ -419,155 +718,35 @@ def task5_aes():
     if not mode or not action or not key_hex:
         return redirect(url_for("index"))
 
-    # Xử lý input
-    data = None
-    if plaintext_input.strip():
-        if action == "decrypt":
-            # Decrypt: input phải là hex
-            hex_text = "".join(plaintext_input.split())
-            try:
-                data = bytes.fromhex(hex_text)
-            except ValueError:
-                return render_template(
-                    "index.html",
-                    active_tab="task5",
-                    task5_result="ERROR: Khi decrypt, input phải là hex. Paste ciphertext hex vào ô textarea.",
-                    task5_iv="",
-                )
-        else:
-            # Encrypt: input là plaintext
-            data = plaintext_input.encode("utf-8")
-    elif file and file.filename:
-        file_content = file.read().decode("utf-8", errors="ignore")
-
-        if action == "decrypt":
-            # Decrypt: file phải chứa hex
-            hex_text = "".join(file_content.split())
-            try:
-                data = bytes.fromhex(hex_text)
-            except ValueError:
-                return render_template(
-                    "index.html",
-                    active_tab="task5",
-                    task5_result="ERROR: Khi decrypt, file phải chứa chuỗi hex hợp lệ.",
-                    task5_iv="",
-                )
-        else:
-            # Encrypt: file chứa plaintext
-            data = file_content.encode("utf-8")
-
-    if data is None:
-        return render_template(
-            "index.html",
-            active_tab="task5",
-            task5_result="ERROR: Phải upload file hex HOẶC nhập vào textarea.",
-            task5_iv="",
-        )
-
     # Get key size (default to 128 if not specified)
     key_size = request.form.get("key_size", "128")
-
-    # Key size mapping
-    key_size_map = {
-        "128": (32, 16, "AES-128"),
-        "192": (48, 24, "AES-192"),
-        "256": (64, 32, "AES-256"),
-    }
-
-    if key_size not in key_size_map:
+    if key_size not in AES_KEY_SIZES:
         key_size = "128"  # Default fallback
+    expected_bytes, aes_name = AES_KEY_SIZES[key_size]
 
-    expected_hex_len, expected_bytes, aes_name = key_size_map[key_size]
-
-    # Key validation - chấp nhận hex hoặc plaintext
-    key_format = request.form.get("key_format") or "hex"
-    key_input = request.form.get("key") or ""
-    key_input = key_input.strip()
-
-    if key_format == "plaintext":
-        # Nếu là plaintext, chuyển thành bytes rồi kiểm tra độ dài
-        key = key_input.encode("utf-8")
-        if len(key) != expected_bytes:
-            return render_template(
-                "index.html",
-                active_tab="task5",
-                task5_result=f"ERROR: {aes_name} key plaintext phải là {expected_bytes} ký tự ASCII ({expected_bytes} bytes). Bạn đang nhập {len(key)} bytes.",
-                task5_iv="",
-            )
-    else:
-        # Key format là hex
-        key_hex = "".join(key_input.split())
-        if len(key_hex) != expected_hex_len:
-            return render_template(
-                "index.html",
-                active_tab="task5",
-                task5_result=f"ERROR: {aes_name} key phải là {expected_hex_len} ký tự hex ({expected_bytes} bytes). Bạn đang nhập {len(key_hex)} ký tự.",
-                task5_iv="",
-            )
-        try:
-            key = bytes.fromhex(key_hex)
-        except ValueError:
-            return render_template(
-                "index.html",
-                active_tab="task5",
-                task5_result=f"ERROR: Key không hợp lệ. Chỉ chấp nhận ký tự hex (0-9, A-F). Bạn nhập: '{key_hex}'",
-                task5_iv="",
-            )
-
-    # IV
-    iv = None
-    if iv_hex.strip():
-        iv_hex_clean = "".join(iv_hex.split())
-
-        # Validate IV length for AES (must be 32 hex chars = 16 bytes)
-        if len(iv_hex_clean) != 32:
-            return render_template(
-                "index.html",
-                active_tab="task5",
-                task5_result=f"ERROR: AES IV phải là 32 ký tự hex (16 bytes). Bạn đang nhập {len(iv_hex_clean)} ký tự.",
-                task5_iv="",
-            )
-
-        try:
-            iv = bytes.fromhex(iv_hex_clean)
-        except ValueError:
-            return render_template(
-                "index.html",
-                active_tab="task5",
-                task5_result="ERROR: IV không hợp lệ. Chỉ chấp nhận ký tự hex (0-9, A-F).",
-                task5_iv="",
-            )
-
-    # CBC mode bắt buộc phải có IV (cả encrypt và decrypt)
-    if mode.upper() != "ECB" and iv is None:
+    try:
+        data = read_form_data(file, plaintext_input, action)
+        if data is None:
+            raise ValueError("Phải upload file hex HOẶC nhập vào textarea.")
+        key = parse_key(
+            key_hex, request.form.get("key_format") or "hex", expected_bytes, aes_name
+        )
+        iv = parse_iv(iv_hex, mode, 16, "AES")
+        aad = parse_aad(request.form.get("aad"), mode)
+    except ValueError as e:
         return render_template(
-            "index.html",
-            active_tab="task5",
-            task5_result="ERROR: IV is required for CBC mode. Please enter a 32-character hex IV.",
-            task5_iv="",
+            "index.html", active_tab="task5", task5_result=f"ERROR: {e}", task5_iv=""
         )
 
     try:
-        if action == "encrypt":
-            ciphertext, used_iv = aes_encrypt(data, key, mode.upper(), iv)
-            result_output = ciphertext.hex()
-            iv_hex_out = (
-                used_iv.hex() if used_iv is not None else (iv.hex() if iv else "")
-            )
-        else:
-            plaintext = aes_decrypt(data, key, mode.upper(), iv)
-            # Trả về plaintext dạng text (UTF-8) thay vì hex
-            try:
-                result_output = plaintext.decode("utf-8")
-            except UnicodeDecodeError:
-                result_output = f"[Binary data - hex]: {plaintext.hex()}"
-            iv_hex_out = iv.hex() if iv else ""
+        output, iv_hex_out = run_block_cipher(
+            aes_encrypt, aes_decrypt, action, data, key, mode, iv, aad
+        )
+        result_output = (
+            output.hex() if action == "encrypt" else format_decrypted(output)
+        )
     except ValueError as e:
-        error_str = str(e)
-        if "padding" in error_str.lower():
-            result_output = f"ERROR: {e}\n\nGợi ý: Key hoặc IV có thể không đúng. Lưu ý: Ngay cả khi key sai, đôi khi vẫn decrypt được nhưng kết quả sẽ là dữ liệu vô nghĩa."
-        else:
-            result_output = f"ERROR: {e}"
+        result_output = f"ERROR: {e}"
         iv_hex_out = ""
     except Exception as e:
         result_output = f"ERROR during AES {action}: {e}"
@@ -586,8 +765,11 @@ def task5_aes():
 # ====================
 @app.route("/api/task1/caesar", methods=["POST"])
 def api_task1_caesar():
-    """API endpoint for Caesar cipher breaking (AJAX)"""
+    """API endpoint for Caesar cipher breaking (AJAX). ?stream=1: xem stream_break"""
     try:
+        if wants_stream():
+            return stream_break("caesar")
+
         file = request.files.get("cipher_file")
         cipher_text = request.form.get("cipher_text") or ""
 
@@ -615,8 +797,11 @@ def api_task1_caesar():
 
 @app.route("/api/task2/substitution", methods=["POST"])
 def api_task2_substitution():
-    """API endpoint for Substitution cipher breaking (AJAX)"""
+    """API endpoint for Substitution cipher breaking (AJAX). ?stream=1: xem stream_break"""
     try:
+        if wants_stream():
+            return stream_break("substitution")
+
         file = request.files.get("cipher_file")
         cipher_text = request.form.get("cipher_text") or ""
 
@@ -653,10 +838,30 @@ def api_task2_substitution():
 
 @app.route("/api/task3/vigenere", methods=["POST"])
 def api_task3_vigenere():
-    """API endpoint for Vigenere cipher breaking (AJAX)"""
+    """
+    API endpoint for Vigenere cipher breaking (AJAX)
+
+    Form field `variant`: vigenere (mặc định) | beaufort | variant_beaufort | autokey
+    ?stream=1: xem stream_break
+    """
     try:
         file = request.files.get("cipher_file")
         cipher_text = request.form.get("cipher_text") or ""
+        variant = (request.form.get("variant") or "vigenere").strip().lower()
+
+        if variant not in VARIANTS:
+            return (
+                jsonify(
+                    {
+                        "success": False,
+                        "error": f"Variant không hợp lệ: '{variant}'. Hỗ trợ: {', '.join(VARIANTS)}",
+                    }
+                ),
+                400,
+            )
+
+        if wants_stream():
+            return stream_break("vigenere", variant)
 
         # Process and validate input
         success, result = process_input(file, cipher_text)
@@ -666,19 +871,352 @@ def api_task3_vigenere():
         ciphertext = result
 
         # Nhận 3 giá trị
-        key, plaintext, score = break_vigenere(ciphertext)
+        key, plaintext, score = break_vigenere_variant(ciphertext, variant)
+
+        return jsonify(
+            {
+                "success": True,
+                "variant": variant,
+                "key": key,
+                "plaintext": plaintext,
+                "score": score,
+            }
+        )
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route("/api/auto", methods=["POST"])
+def api_auto():
+    """
+    API endpoint tự nhận dạng cipher (Caesar / Substitution / Vigenère)
+    rồi gọi breaker tương ứng. ?stream=1: xem stream_break
+    """
+    try:
+        if wants_stream():
+            return stream_break("auto", charset_filter=True)
+
+        file = request.files.get("cipher_file")
+        cipher_text = request.form.get("cipher_text") or ""
+
+        # Process and validate input
+        success, result = process_input(file, cipher_text)
+        if not success:
+            return jsonify({"success": False, "error": result}), 400
+
+        _, ciphertext, warning = validate_and_filter(result, "Auto")
 
+        auto = break_auto(ciphertext)
         return jsonify(
-            {"success": True, "key": key, "plaintext": plaintext, "score": score}
+            {
+                "success": True,
+                "cipher": auto["cipher"],
+                "key": auto["key"],
+                "score": auto["score"],
+                "plaintext": auto["plaintext"],
+                "stats": auto["stats"],
+                "warning": warning,
+            }
         )
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+# ====================
+# API DES/AES (JSON, hỗ trợ batch)
+# ====================
+BLOCK_CIPHERS = {
+    "DES": (des_encrypt, des_decrypt, 8),
+    "AES": (aes_encrypt, aes_decrypt, 16),
+}
+STREAM_FACTORIES = {"DES": des_stream, "AES": aes_stream}
+# Nhãn metrics theo key (DES / 3DES / AES), dùng chung với des_modes / aes_modes
+CIPHER_LABELS = {"DES": des_modes.cipher_label, "AES": aes_modes.cipher_label}
+STREAM_CHUNK_SIZE = 64 * 1024
+# Keyspace tối đa cho job tìm key DES qua web (CLI không giới hạn)
+MAX_KEYSEARCH_SPACE = int(os.getenv("LAB06_KEYSEARCH_MAX", str(2**32)))
+
+
+def _decode_item_data(value, data_format):
+    if data_format == "hex":
+        return parse_hex(value, "data phải là chuỗi hex hợp lệ.")
+    if data_format == "base64":
+        try:
+            return base64.b64decode(value, validate=True)
+        except (binascii.Error, ValueError):
+            raise ValueError("data phải là chuỗi base64 hợp lệ.")
+    if data_format == "text":
+        return value.encode("utf-8")
+    raise ValueError("data_format phải là 'text', 'hex' hoặc 'base64'.")
+
+
+def _encode_item_output(output, output_format):
+    if output_format == "text":
+        try:
+            return output.decode("utf-8"), "text"
+        except UnicodeDecodeError:
+            output_format = "hex"
+    if output_format == "base64":
+        return base64.b64encode(output).decode("ascii"), "base64"
+    return output.hex(), "hex"
+
+
+def _expected_key_size(cipher_name, key_input, key_format, key_size=None):
+    """
+    (số byte key, tên hiển thị). DES: key 16 / 24 bytes -> 3DES.
+    AES không có key_size -> suy ra từ độ dài key.
+    """
+    key_len = (
+        len(key_input.strip().encode("utf-8"))
+        if key_format == "plaintext"
+        else len("".join(key_input.split())) // 2
+    )
+    if cipher_name == "DES":
+        return (key_len, "3DES") if key_len in (16, 24) else (8, "DES")
+    key_size = str(key_size or "")
+    if key_size not in AES_KEY_SIZES:
+        key_size = str(key_len * 8) if str(key_len * 8) in AES_KEY_SIZES else "128"
+    return AES_KEY_SIZES[key_size]
+
+
+def process_cipher_item(cipher_name, item):
+    """
+    Xử lý 1 item JSON:
+        {data, key, iv, mode, action, key_format, data_format, output_format,
+         key_size (AES, tùy chọn - mặc định suy ra từ độ dài key),
+         aad (hex, chỉ GCM)}
+    Mặc định: encrypt nhận text trả hex; decrypt nhận hex trả text.
+    Key schedule được cache trong module mode, nên các item cùng key
+    trong 1 batch không tính lại key expansion.
+    """
+    encrypt_fn, decrypt_fn, block_size = BLOCK_CIPHERS[cipher_name]
+    if not isinstance(item, dict):
+        raise ValueError("Mỗi item phải là JSON object.")
+
+    action = (item.get("action") or "").lower()
+    if action not in ("encrypt", "decrypt"):
+        raise ValueError("action phải là 'encrypt' hoặc 'decrypt'.")
+    mode = (item.get("mode") or "").upper()
+    if not mode:
+        raise ValueError("mode là bắt buộc (ví dụ 'ECB', 'CBC').")
+
+    key_input = item.get("key") or ""
+    key_format = item.get("key_format") or "hex"
+    expected_bytes, display_name = _expected_key_size(
+        cipher_name, key_input, key_format, item.get("key_size")
+    )
+
+    default_in, default_out = (
+        ("text", "hex") if action == "encrypt" else ("hex", "text")
+    )
+    data = _decode_item_data(
+        item.get("data") or "", item.get("data_format") or default_in
+    )
+    key = parse_key(key_input, key_format, expected_bytes, display_name)
+    iv = parse_iv(item.get("iv"), mode, block_size, cipher_name)
+    aad = parse_aad(item.get("aad"), mode)
+
+    output, iv_hex_out = run_block_cipher(
+        encrypt_fn, decrypt_fn, action, data, key, mode, iv, aad
+    )
+    result, fmt = _encode_item_output(output, item.get("output_format") or default_out)
+    return {"success": True, "result": result, "format": fmt, "iv": iv_hex_out}
+
+
+def _stream_param(name):
+    """Tham số cho chế độ octet-stream: header X-<Name> trước, rồi query string."""
+    header = "X-" + name.replace("_", "-").title()
+    return request.headers.get(header) or request.args.get(name) or ""
+
+
+def _stream_block_cipher(cipher_name):
+    """
+    Chế độ binary: body application/octet-stream -> response octet-stream.
+    key / iv / mode / action / key_format / key_size qua header X-Key, X-Iv,
+    X-Mode, X-Action, X-Key-Format, X-Key-Size hoặc query string.
+    Body được đọc và mã hóa theo chunk STREAM_CHUNK_SIZE, output gửi ngay khi
+    có -> bộ nhớ không phụ thuộc kích thước payload (không qua hex/JSON).
+    """
+    _, _, block_size = BLOCK_CIPHERS[cipher_name]
+    action = _stream_param("action").lower()
+    mode = _stream_param("mode").upper()
+    key_input = _stream_param("key")
+    key_format = _stream_param("key_format") or "hex"
+    try:
+        if action not in ("encrypt", "decrypt"):
+            raise ValueError("action phải là 'encrypt' hoặc 'decrypt'.")
+        if not mode:
+            raise ValueError("mode là bắt buộc (ví dụ 'ECB', 'CBC').")
+        expected_bytes, display_name = _expected_key_size(
+            cipher_name, key_input, key_format, _stream_param("key_size")
+        )
+        key = parse_key(key_input, key_format, expected_bytes, display_name)
+        iv = parse_iv(_stream_param("iv"), mode, block_size, cipher_name)
+        stream = STREAM_FACTORIES[cipher_name](key, mode, action, iv)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    source = request.stream
+    label = CIPHER_LABELS[cipher_name](key)
+
+    def generate():
+        while True:
+            chunk = source.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            metrics.CIPHER_BYTES.inc(len(chunk), cipher=label, direction=action)
+            out = stream.update(chunk)
+            if out:
+                yield out
+        # Lỗi padding ở đây sẽ cắt response giữa chừng (status đã gửi)
+        yield stream.finalize()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/octet-stream",
+        headers={"X-IV": stream.iv.hex() if stream.iv else ""},
+    )
+
+
+def _api_block_cipher(cipher_name):
+    """
+    Body JSON: 1 item, list item, hoặc {"items": [...]}.
+    Batch trả về {"success": true, "results": [...]}, lỗi được báo theo item.
+    Body application/octet-stream: xem _stream_block_cipher.
+    """
+    if request.mimetype == "application/octet-stream":
+        return _stream_block_cipher(cipher_name)
+
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify({"success": False, "error": "Body phải là JSON."}), 400
+
+    batch = isinstance(payload, list) or (
+        isinstance(payload, dict) and isinstance(payload.get("items"), list)
+    )
+    items = payload if isinstance(payload, list) else payload.get("items", [payload])
+    if len(items) > MAX_BATCH_ITEMS:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": f"Tối đa {MAX_BATCH_ITEMS} item mỗi request.",
+                }
+            ),
+            400,
+        )
+
+    results = []
+    for item in items:
+        try:
+            results.append(process_cipher_item(cipher_name, item))
+        except ValueError as e:
+            results.append({"success": False, "error": str(e)})
+        except Exception as e:
+            results.append(
+                {"success": False, "error": f"ERROR during {cipher_name}: {e}"}
+            )
+
+    if batch:
+        return jsonify({"success": True, "results": results})
+    status = 200 if results[0]["success"] else 400
+    return jsonify(results[0]), status
+
+
+@app.route("/api/task4/des", methods=["POST"])
+def api_task4_des():
+    """API endpoint DES encrypt/decrypt (JSON, hỗ trợ batch)"""
+    return _api_block_cipher("DES")
+
+
+@app.route("/api/task5/aes", methods=["POST"])
+def api_task5_aes():
+    """API endpoint AES encrypt/decrypt (JSON, hỗ trợ batch)"""
+    return _api_block_cipher("AES")
+
+
+def _keysearch_from_json(payload):
+    """
+    Body JSON:
+        {plaintext, plaintext_format ('text' | 'hex'), ciphertext (hex), iv,
+         key + mask (hex)  hoặc  charset + prefix, find_all}
+    Trả về (pairs, keyspace); raise ValueError nếu input sai.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Body phải là JSON object.")
+    plaintext = _decode_item_data(
+        payload.get("plaintext") or "", payload.get("plaintext_format") or "text"
+    )
+    ciphertext = parse_hex(
+        payload.get("ciphertext") or "", "ciphertext phải là chuỗi hex hợp lệ."
+    )
+    iv = payload.get("iv")
+    iv = parse_hex(iv, "IV phải là chuỗi hex hợp lệ.") if iv else None
+
+    if payload.get("charset"):
+        keyspace = des_keysearch.CharsetKeyspace(
+            payload["charset"], payload.get("prefix") or ""
+        )
+    elif payload.get("key") and payload.get("mask"):
+        keyspace = des_keysearch.MaskKeyspace(
+            parse_hex(payload["key"], "key phải là chuỗi hex hợp lệ."),
+            parse_hex(payload["mask"], "mask phải là chuỗi hex hợp lệ."),
+        )
+    else:
+        raise ValueError("Cần 'charset' hoặc cả 'key' và 'mask'.")
+    if keyspace.size > MAX_KEYSEARCH_SPACE:
+        raise ValueError(
+            f"Keyspace {keyspace.size:,} key vượt giới hạn {MAX_KEYSEARCH_SPACE:,}."
+            " Dùng CLI: python -m crypto.des_keysearch"
+        )
+    return des_keysearch.make_pairs(plaintext, ciphertext, iv), keyspace
+
+
+@app.route("/api/des/keysearch", methods=["POST"])
+def api_des_keysearch():
+    """Tạo job tìm key DES (known-plaintext), trả về 202 + id để poll."""
+    payload = request.get_json(silent=True)
+    try:
+        pairs, keyspace = _keysearch_from_json(payload)
+        job = des_keysearch.submit_job(
+            pairs, keyspace, find_all=bool(payload.get("find_all"))
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    response = jsonify({"success": True, "job": job.to_dict()})
+    response.headers["Location"] = url_for("api_des_keysearch_job", job_id=job.id)
+    return response, 202
+
+
+@app.route("/api/des/keysearch/<job_id>", methods=["GET", "DELETE"])
+def api_des_keysearch_job(job_id):
+    """GET: tiến độ / kết quả job. DELETE: hủy job."""
+    if request.method == "DELETE":
+        job = des_keysearch.cancel_job(job_id)
+    else:
+        job = des_keysearch.get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job không tồn tại."}), 404
+    return jsonify({"success": True, "job": job})
+
+
 # ====================
 # CHATBOT - HYBRID (Offline Knowledge + Online AI)
 # ====================
 from crypto.chatbot_knowledge import get_response as get_offline_response
+from crypto.chatbot_client import GeminiClient
+
+_gemini_client = None
+
+
+def get_gemini_client():
+    """GeminiClient dùng chung trong process (tạo lần đầu khi cần)."""
+    global _gemini_client
+    if _gemini_client is None:
+        _gemini_client = GeminiClient(
+            GEMINI_API_KEY, base_url=os.getenv("GEMINI_BASE_URL")
+        )
+    return _gemini_client
 
 
 @app.route("/api/chatbot", methods=["POST"])
@@ -734,78 +1272,16 @@ TRẢ LỜI BẰNG TIẾNG VIỆT. Giải thích rõ ràng, súc tích, mang tí
 Nếu hỏi về implementation, hãy đề cập đến các thuật toán cụ thể trong project này.
 Dùng emoji phù hợp để làm câu trả lời sinh động hơn."""
 
-        # Call Gemini REST API with retry logic
-        # Try different models (all are available in v1beta)
-        models = ["gemini-flash-latest", "gemini-2.5-flash", "gemini-2.0-flash-exp"]
-
-        headers = {"Content-Type": "application/json"}
-
-        payload = {
-            "contents": [
-                {"parts": [{"text": f"{system_prompt}\n\nUser: {user_message}"}]},
-            ],
-            "generationConfig": {
-                "temperature": 0.7,
-                "maxOutputTokens": 2048,  # Increased for longer responses
-                "topP": 0.9,
-                "topK": 40,
-            },
-        }
-
-        # Retry logic for rate limiting
-        max_retries = 2
-        retry_delay = 2  # seconds
-
-        last_error = None
-
-        # Try different models
-        for model in models:
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={GEMINI_API_KEY}"
-
-            for attempt in range(max_retries):
-                try:
-                    response = requests.post(
-                        url, headers=headers, json=payload, timeout=30
-                    )
-
-                    # If rate limited, try next model
-                    if response.status_code == 429:
-                        last_error = f"Rate limit: {model}"
-                        break  # Try next model
-
-                    # If model not found, try next
-                    if response.status_code == 404:
-                        last_error = f"Model not available: {model}"
-                        break
-
-                    response.raise_for_status()
-                    result = response.json()
-
-                    # Extract text from response
-                    if "candidates" in result and len(result["candidates"]) > 0:
-                        candidate = result["candidates"][0]
-                        if "content" in candidate and "parts" in candidate["content"]:
-                            text = candidate["content"]["parts"][0].get("text", "")
-                            return jsonify(
-                                {
-                                    "success": True,
-                                    "response": text
-                                    + "\n\n_🤖 Powered by Google Gemini AI_",
-                                }
-                            )
-
-                    last_error = "No valid response"
-                    break
-
-                except requests.exceptions.Timeout:
-                    if attempt < max_retries - 1:
-                        time.sleep(retry_delay)
-                        continue
-                    last_error = "Timeout"
-                    break
-                except requests.exceptions.RequestException as e:
-                    last_error = str(e)
-                    break
+        # Gemini qua client dùng chung: connection pool, cache theo câu hỏi
+        # đã chuẩn hóa, circuit breaker cho model 429/404, không sleep
+        text, last_error = get_gemini_client().ask(user_message, system_prompt)
+        if text is not None:
+            return jsonify(
+                {
+                    "success": True,
+                    "response": text + "\n\n_🤖 Powered by Google Gemini AI_",
+                }
+            )
 
         # All models failed - fallback to offline
         return jsonify(
@@ -833,4 +1309,4 @@ Dùng emoji phù hợp để làm câu trả lời sinh động hơn."""
 
 if __name__ == "__main__":
     # debug=True chỉ nên dùng khi dev
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -5,6 +5,9 @@ AES core implementation (128/192/256-bit keys)
 - key_expansion(key) -> round_keys (list of Nr+1 round keys, mỗi key 16 bytes)
 - aes_encrypt_block(block16, round_keys)
 - aes_decrypt_block(block16, round_keys)
+- aes_encrypt_word(block, key_words(round_keys)) /
+  aes_decrypt_word(block, inv_key_words(round_keys)): block dạng int 128-bit,
+  round tính theo T-table trên 4 cột 32-bit (nhanh hơn đường từng byte)
 
 Hỗ trợ:
 - AES-128: key 16 bytes  -> Nk=4,  Nr=10
@@ -438,24 +441,34 @@ def _mul(a, b):
     return res
 
 
+# Bảng nhân GF(2^8) cho MixColumns / InvMixColumns, build 1 lần khi import
+# (MUL_k[a] == _mul(a, k)) -> mỗi phép nhân chỉ còn 1 lần tra bảng.
+MUL2 = [_mul(a, 2) for a in range(256)]
+MUL3 = [_mul(a, 3) for a in range(256)]
+MUL9 = [_mul(a, 9) for a in range(256)]
+MUL11 = [_mul(a, 11) for a in range(256)]
+MUL13 = [_mul(a, 13) for a in range(256)]
+MUL14 = [_mul(a, 14) for a in range(256)]
+
+
 def _mix_columns(state):
-    for c in range(4):
-        i = 4 * c
+    m2, m3 = MUL2, MUL3
+    for i in range(0, 16, 4):
         a0, a1, a2, a3 = state[i], state[i + 1], state[i + 2], state[i + 3]
-        state[i] = _mul(a0, 2) ^ _mul(a1, 3) ^ a2 ^ a3
-        state[i + 1] = a0 ^ _mul(a1, 2) ^ _mul(a2, 3) ^ a3
-        state[i + 2] = a0 ^ a1 ^ _mul(a2, 2) ^ _mul(a3, 3)
-        state[i + 3] = _mul(a0, 3) ^ a1 ^ a2 ^ _mul(a3, 2)
+        state[i] = m2[a0] ^ m3[a1] ^ a2 ^ a3
+        state[i + 1] = a0 ^ m2[a1] ^ m3[a2] ^ a3
+        state[i + 2] = a0 ^ a1 ^ m2[a2] ^ m3[a3]
+        state[i + 3] = m3[a0] ^ a1 ^ a2 ^ m2[a3]
 
 
 def _inv_mix_columns(state):
-    for c in range(4):
-        i = 4 * c
+    m9, m11, m13, m14 = MUL9, MUL11, MUL13, MUL14
+    for i in range(0, 16, 4):
         a0, a1, a2, a3 = state[i], state[i + 1], state[i + 2], state[i + 3]
-        state[i] = _mul(a0, 14) ^ _mul(a1, 11) ^ _mul(a2, 13) ^ _mul(a3, 9)
-        state[i + 1] = _mul(a0, 9) ^ _mul(a1, 14) ^ _mul(a2, 11) ^ _mul(a3, 13)
-        state[i + 2] = _mul(a0, 13) ^ _mul(a1, 9) ^ _mul(a2, 14) ^ _mul(a3, 11)
-        state[i + 3] = _mul(a0, 11) ^ _mul(a1, 13) ^ _mul(a2, 9) ^ _mul(a3, 14)
+        state[i] = m14[a0] ^ m11[a1] ^ m13[a2] ^ m9[a3]
+        state[i + 1] = m9[a0] ^ m14[a1] ^ m11[a2] ^ m13[a3]
+        state[i + 2] = m13[a0] ^ m9[a1] ^ m14[a2] ^ m11[a3]
+        state[i + 3] = m11[a0] ^ m13[a1] ^ m9[a2] ^ m14[a3]
 
 
 def aes_encrypt_block(block16: bytes, round_keys) -> bytes:
@@ -499,3 +512,181 @@ def aes_decrypt_block(block16: bytes, round_keys) -> bytes:
 
     _add_round_key(state, round_keys[0])
     return bytes(state)
+
+
+# ====== T-table: AES trên 4 cột 32-bit (block dạng int 128-bit) ======
+# 1 round = SubBytes + ShiftRows + MixColumns gộp thành 4 lần tra bảng / cột:
+#   TE0[x] = (2*S[x], S[x], S[x], 3*S[x]), TE1..TE3 = TE0 xoay phải 8/16/24 bit
+#   TD0[x] = (14*IS[x], 9*IS[x], 13*IS[x], 11*IS[x]) cho chiều giải mã
+# Giải mã theo "equivalent inverse cipher" (FIPS-197 §5.3.5): round key giữa
+# đã qua InvMixColumns -> cùng cấu trúc vòng lặp với mã hóa.
+def _ror8(word: int) -> int:
+    return (word >> 8) | ((word & 0xFF) << 24)
+
+
+TE0 = [
+    (MUL2[s] << 24) | (s << 16) | (s << 8) | MUL3[s]
+    for s in (S_BOX[x] for x in range(256))
+]
+TE1 = [_ror8(w) for w in TE0]
+TE2 = [_ror8(w) for w in TE1]
+TE3 = [_ror8(w) for w in TE2]
+TD0 = [
+    (MUL14[s] << 24) | (MUL9[s] << 16) | (MUL13[s] << 8) | MUL11[s]
+    for s in (INV_S_BOX[x] for x in range(256))
+]
+TD1 = [_ror8(w) for w in TD0]
+TD2 = [_ror8(w) for w in TD1]
+TD3 = [_ror8(w) for w in TD2]
+# S-box / inverse S-box đã dịch sẵn cho round cuối (không MixColumns)
+_S24 = [v << 24 for v in S_BOX]
+_S16 = [v << 16 for v in S_BOX]
+_S8 = [v << 8 for v in S_BOX]
+_IS24 = [v << 24 for v in INV_S_BOX]
+_IS16 = [v << 16 for v in INV_S_BOX]
+_IS8 = [v << 8 for v in INV_S_BOX]
+
+
+def _inv_mix_word(word: int) -> int:
+    """InvMixColumns trên 1 cột 32-bit."""
+    a0, a1, a2, a3 = word >> 24, (word >> 16) & 0xFF, (word >> 8) & 0xFF, word & 0xFF
+    return (
+        ((MUL14[a0] ^ MUL11[a1] ^ MUL13[a2] ^ MUL9[a3]) << 24)
+        | ((MUL9[a0] ^ MUL14[a1] ^ MUL11[a2] ^ MUL13[a3]) << 16)
+        | ((MUL13[a0] ^ MUL9[a1] ^ MUL14[a2] ^ MUL11[a3]) << 8)
+        | (MUL11[a0] ^ MUL13[a1] ^ MUL9[a2] ^ MUL14[a3])
+    )
+
+
+def key_words(round_keys) -> tuple:
+    """Round keys (key_expansion) -> 4*(Nr+1) word 32-bit cho aes_encrypt_word."""
+    return tuple(
+        int.from_bytes(rk[c : c + 4], "big")
+        for rk in round_keys
+        for c in range(0, 16, 4)
+    )
+
+
+def inv_key_words(round_keys) -> tuple:
+    """
+    Word key cho aes_decrypt_word: round key theo thứ tự ngược, round giữa
+    (1..Nr-1) qua InvMixColumns (equivalent inverse cipher).
+    """
+    words = key_words(round_keys)
+    nr = len(round_keys) - 1
+    out = list(words[4 * nr : 4 * nr + 4])
+    for r in range(nr - 1, 0, -1):
+        out.extend(_inv_mix_word(w) for w in words[4 * r : 4 * r + 4])
+    out.extend(words[0:4])
+    return tuple(out)
+
+
+def aes_encrypt_word(block: int, key_words) -> int:
+    """
+    Mã hóa 1 block dạng int 128-bit (dùng cho chaining) bằng T-table.
+    key_words: kết quả key_words(round_keys).
+    """
+    te0, te1, te2, te3 = TE0, TE1, TE2, TE3
+    s0 = (block >> 96) ^ key_words[0]
+    s1 = ((block >> 64) & 0xFFFFFFFF) ^ key_words[1]
+    s2 = ((block >> 32) & 0xFFFFFFFF) ^ key_words[2]
+    s3 = (block & 0xFFFFFFFF) ^ key_words[3]
+    last = len(key_words) - 4
+    for r in range(4, last, 4):
+        t0 = (
+            te0[s0 >> 24]
+            ^ te1[(s1 >> 16) & 0xFF]
+            ^ te2[(s2 >> 8) & 0xFF]
+            ^ te3[s3 & 0xFF]
+            ^ key_words[r]
+        )
+        t1 = (
+            te0[s1 >> 24]
+            ^ te1[(s2 >> 16) & 0xFF]
+            ^ te2[(s3 >> 8) & 0xFF]
+            ^ te3[s0 & 0xFF]
+            ^ key_words[r + 1]
+        )
+        t2 = (
+            te0[s2 >> 24]
+            ^ te1[(s3 >> 16) & 0xFF]
+            ^ te2[(s0 >> 8) & 0xFF]
+            ^ te3[s1 & 0xFF]
+            ^ key_words[r + 2]
+        )
+        s3 = (
+            te0[s3 >> 24]
+            ^ te1[(s0 >> 16) & 0xFF]
+            ^ te2[(s1 >> 8) & 0xFF]
+            ^ te3[s2 & 0xFF]
+            ^ key_words[r + 3]
+        )
+        s0, s1, s2 = t0, t1, t2
+    # Round cuối: SubBytes + ShiftRows, không MixColumns
+    s24, s16, s8, sb = _S24, _S16, _S8, S_BOX
+    t0 = s24[s0 >> 24] | s16[(s1 >> 16) & 0xFF] | s8[(s2 >> 8) & 0xFF] | sb[s3 & 0xFF]
+    t1 = s24[s1 >> 24] | s16[(s2 >> 16) & 0xFF] | s8[(s3 >> 8) & 0xFF] | sb[s0 & 0xFF]
+    t2 = s24[s2 >> 24] | s16[(s3 >> 16) & 0xFF] | s8[(s0 >> 8) & 0xFF] | sb[s1 & 0xFF]
+    t3 = s24[s3 >> 24] | s16[(s0 >> 16) & 0xFF] | s8[(s1 >> 8) & 0xFF] | sb[s2 & 0xFF]
+    return (
+        ((t0 ^ key_words[last]) << 96)
+        | ((t1 ^ key_words[last + 1]) << 64)
+        | ((t2 ^ key_words[last + 2]) << 32)
+        | (t3 ^ key_words[last + 3])
+    )
+
+
+def aes_decrypt_word(block: int, inv_key_words) -> int:
+    """
+    Giải mã 1 block dạng int 128-bit bằng T-table (equivalent inverse cipher).
+    inv_key_words: kết quả inv_key_words(round_keys).
+    """
+    td0, td1, td2, td3 = TD0, TD1, TD2, TD3
+    dk = inv_key_words
+    s0 = (block >> 96) ^ dk[0]
+    s1 = ((block >> 64) & 0xFFFFFFFF) ^ dk[1]
+    s2 = ((block >> 32) & 0xFFFFFFFF) ^ dk[2]
+    s3 = (block & 0xFFFFFFFF) ^ dk[3]
+    last = len(dk) - 4
+    for r in range(4, last, 4):
+        t0 = (
+            td0[s0 >> 24]
+            ^ td1[(s3 >> 16) & 0xFF]
+            ^ td2[(s2 >> 8) & 0xFF]
+            ^ td3[s1 & 0xFF]
+            ^ dk[r]
+        )
+        t1 = (
+            td0[s1 >> 24]
+            ^ td1[(s0 >> 16) & 0xFF]
+            ^ td2[(s3 >> 8) & 0xFF]
+            ^ td3[s2 & 0xFF]
+            ^ dk[r + 1]
+        )
+        t2 = (
+            td0[s2 >> 24]
+            ^ td1[(s1 >> 16) & 0xFF]
+            ^ td2[(s0 >> 8) & 0xFF]
+            ^ td3[s3 & 0xFF]
+            ^ dk[r + 2]
+        )
+        s3 = (
+            td0[s3 >> 24]
+            ^ td1[(s2 >> 16) & 0xFF]
+            ^ td2[(s1 >> 8) & 0xFF]
+            ^ td3[s0 & 0xFF]
+            ^ dk[r + 3]
+        )
+        s0, s1, s2 = t0, t1, t2
+    # Round cuối: InvSubBytes + InvShiftRows
+    s24, s16, s8, sb = _IS24, _IS16, _IS8, INV_S_BOX
+    t0 = s24[s0 >> 24] | s16[(s3 >> 16) & 0xFF] | s8[(s2 >> 8) & 0xFF] | sb[s1 & 0xFF]
+    t1 = s24[s1 >> 24] | s16[(s0 >> 16) & 0xFF] | s8[(s3 >> 8) & 0xFF] | sb[s2 & 0xFF]
+    t2 = s24[s2 >> 24] | s16[(s1 >> 16) & 0xFF] | s8[(s0 >> 8) & 0xFF] | sb[s3 & 0xFF]
+    t3 = s24[s3 >> 24] | s16[(s2 >> 16) & 0xFF] | s8[(s1 >> 8) & 0xFF] | sb[s0 & 0xFF]
+    return (
+        ((t0 ^ dk[last]) << 96)
+        | ((t1 ^ dk[last + 1]) << 64)
+        | ((t2 ^ dk[last + 2]) << 32)
+        | (t3 ^ dk[last + 3])
+    )
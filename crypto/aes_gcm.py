@@ -0,0 +1,124 @@
+# crypto/aes_gcm.py
+"""
+AES-GCM (NIST SP 800-38D): CTR + GHASH, tag 16 bytes
+----------------------------------------------------
+- ghash_tables(h)  : bảng nhân 8-bit theo H, tính 1 lần mỗi key
+                     (aes_modes cache cùng round keys)
+- ghash(tables, aad, data) -> int 128-bit
+- gcm_encrypt(plaintext, round_keys, words, tables, nonce, aad)
+  -> ciphertext || tag
+- gcm_decrypt(data, round_keys, words, tables, nonce, aad) -> plaintext
+  (tag sai -> ValueError, không trả plaintext)
+  round_keys: key_expansion (cho aes_numpy), words: aes_core.key_words
+  (cho T-table), aes_modes cache cả hai theo key.
+
+GHASH: X * H = XOR_i T[i][byte i của X], T[i][b] = (b ở vị trí byte i) * H
+-> 16 lần tra bảng / block thay cho 128 vòng shift-XOR.
+CTR: keystream sinh theo batch (aes_numpy nếu có, ngược lại aes_core T-table
+theo word), XOR với cả payload bằng 1 phép XOR int.
+
+    from crypto.aes_modes import aes_encrypt, aes_decrypt
+    ct, nonce = aes_encrypt(plaintext, key, "GCM", aad=b"header")
+    pt = aes_decrypt(ct, key, "GCM", nonce, aad=b"header")
+"""
+
+import hmac
+
+from . import aes_numpy
+from .aes_core import aes_encrypt_word
+
+BLOCK_SIZE = 16
+TAG_SIZE = 16
+NONCE_SIZE = 12  # nonce 96 bit: J0 = nonce || 0x00000001
+_R = 0xE1 << 120  # x^128 = x^7 + x^2 + x + 1 (bit-order GCM)
+_MASK32 = 0xFFFFFFFF
+
+
+def _mul_x(v: int) -> int:
+    """v * x trong GF(2^128) (bit 0 = MSB của block)."""
+    return (v >> 1) ^ _R if v & 1 else v >> 1
+
+
+def ghash_tables(h: int):
+    """16 bảng x 256 phần tử: T[i][b] = (b << 8*(15-i)) * H."""
+    powers = []  # powers[m] = H * x^m
+    v = h
+    for _ in range(128):
+        powers.append(v)
+        v = _mul_x(v)
+    tables = []
+    for i in range(16):
+        table = [0] * 256
+        for b in range(1, 256):
+            low = b & -b  # bit thấp nhất, ứng với x^(8i + 7 - bit_length)
+            table[b] = table[b ^ low] ^ powers[8 * i + 8 - low.bit_length()]
+        tables.append(table)
+    return tuple(tables)
+
+
+def _ghash_update(tables, y: int, data) -> int:
+    """Hấp thụ data (pad 0 tới bội số 16 byte) vào trạng thái y."""
+    mv = memoryview(data)
+    for i in range(0, len(mv), BLOCK_SIZE):
+        block = bytes(mv[i : i + BLOCK_SIZE]).ljust(BLOCK_SIZE, b"\x00")
+        x = (y ^ int.from_bytes(block, "big")).to_bytes(BLOCK_SIZE, "big")
+        y = 0
+        for table, b in zip(tables, x):
+            y ^= table[b]
+    return y
+
+
+def ghash(tables, aad, data) -> int:
+    """GHASH_H(A || pad || C || pad || len(A) || len(C)) (độ dài tính theo bit)."""
+    y = _ghash_update(tables, 0, aad)
+    y = _ghash_update(tables, y, data)
+    lengths = (len(aad) * 8 << 64) | (len(data) * 8)
+    return _ghash_update(tables, y, lengths.to_bytes(BLOCK_SIZE, "big"))
+
+
+def _j0(tables, nonce: bytes) -> int:
+    """Counter block đầu tiên: nonce 12 byte -> nonce || 1, khác -> GHASH(nonce)."""
+    if len(nonce) == NONCE_SIZE:
+        return (int.from_bytes(nonce, "big") << 32) | 1
+    return ghash(tables, b"", nonce)
+
+
+def _ctr(data, round_keys, words, j0: int) -> bytes:
+    """CTR với counter inc32(J0), inc32(J0)+1, ... (chỉ 32 bit thấp tăng)."""
+    count = -(-len(data) // BLOCK_SIZE)
+    if not count:
+        return b""
+    prefix = j0 & ~_MASK32
+    counters = [prefix | ((j0 + i) & _MASK32) for i in range(1, count + 1)]
+    if aes_numpy.HAVE_NUMPY and count >= aes_numpy.NUMPY_MIN_BLOCKS:
+        blocks = b"".join(c.to_bytes(BLOCK_SIZE, "big") for c in counters)
+        stream = aes_numpy.encrypt_blocks(blocks, round_keys)
+    else:
+        stream = b"".join(
+            aes_encrypt_word(c, words).to_bytes(BLOCK_SIZE, "big") for c in counters
+        )
+    x = int.from_bytes(data, "big") ^ int.from_bytes(stream[: len(data)], "big")
+    return x.to_bytes(len(data), "big")
+
+
+def _tag(words, tables, j0: int, aad, ciphertext) -> bytes:
+    s = ghash(tables, aad, ciphertext) ^ aes_encrypt_word(j0, words)
+    return s.to_bytes(TAG_SIZE, "big")
+
+
+def gcm_encrypt(plaintext, round_keys, words, tables, nonce: bytes, aad=b"") -> bytes:
+    """Trả về ciphertext || tag (16 bytes)."""
+    j0 = _j0(tables, nonce)
+    ciphertext = _ctr(plaintext, round_keys, words, j0)
+    return ciphertext + _tag(words, tables, j0, aad, ciphertext)
+
+
+def gcm_decrypt(data, round_keys, words, tables, nonce: bytes, aad=b"") -> bytes:
+    """data = ciphertext || tag; kiểm tag trước khi giải mã."""
+    if len(data) < TAG_SIZE:
+        raise ValueError("GCM ciphertext too short (missing tag)")
+    ciphertext, tag = data[:-TAG_SIZE], data[-TAG_SIZE:]
+    j0 = _j0(tables, nonce)
+    if not hmac.compare_digest(_tag(words, tables, j0, aad, ciphertext), tag):
+        raise ValueError("GCM authentication failed (wrong key, IV, AAD or tag)")
+    return _ctr(ciphertext, round_keys, words, j0)
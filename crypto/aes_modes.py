@@ -1,9 +1,9 @@
 # crypto/aes_modes.py
 """
-AES modes (ECB, CBC) with PKCS#7
---------------------------------
-- aes_encrypt(plaintext, key, mode, iv=None) -> (ciphertext_bytes, iv_used)
-- aes_decrypt(ciphertext_bytes, key, mode, iv=None) -> plaintext_bytes
+AES modes (ECB, CBC with PKCS#7; CFB, CFB8, OFB; GCM)
+-----------------------------------------------------
+- aes_encrypt(plaintext, key, mode, iv=None, aad=None) -> (ciphertext_bytes, iv_used)
+- aes_decrypt(ciphertext_bytes, key, mode, iv=None, aad=None) -> plaintext_bytes
 
 - encrypt(plaintext_bytes, key, mode, iv=None, out_format='hex') -> (ciphertext_str, iv_used)
 - decrypt(ciphertext_str_or_bytes, key, mode, iv, in_format='hex') -> plaintext_bytes
@@ -14,146 +14,302 @@ Hỗ trợ key:
 - 32 bytes: AES-256
 
 Block size luôn 16 bytes (128 bit) theo chuẩn AES.
+
+CFB (CFB-128) / CFB8 / OFB: không padding, iv 16 bytes (encrypt không truyền
+-> tự sinh); aes_stream xử lý được từng record khi nhận.
+
+GCM (crypto/aes_gcm.py): mã hóa + xác thực 1 lượt, không padding.
+- iv = nonce (khuyến nghị 12 bytes, None khi encrypt -> tự sinh 12 bytes)
+- aad: dữ liệu xác thực kèm (không mã hóa), phải giống nhau khi giải mã
+- ciphertext = ciphertext || tag 16 bytes; tag sai -> ValueError
+
+ECB encrypt/decrypt và CBC decrypt với payload lớn tự dùng engine NumPy
+(crypto/aes_numpy.py) nếu có cài numpy. Đường từng block chạy theo word
+int 128-bit (block_stream.ecb_words / cbc_*_words) trên AES T-table của
+aes_core (word key cache theo key, _word_schedule).
 """
 
 import os
 import base64
-from .aes_core import key_expansion, aes_encrypt_block, aes_decrypt_block
+from functools import lru_cache, partial
+from .aes_core import (
+    aes_decrypt_word,
+    aes_encrypt_word,
+    inv_key_words,
+    key_expansion,
+    key_words,
+)
+from . import aes_gcm, aes_numpy
+from .block_stream import (
+    FEEDBACK_MODES,
+    BlockStreamCipher,
+    FeedbackStreamCipher,
+    cbc_decrypt_words,
+    cbc_encrypt_words,
+    ecb_words,
+    pkcs7_pad,
+    pkcs7_unpad,
+)
+from .metrics import CIPHER_BYTES, register_cache
 
 BLOCK_SIZE = 16
 
 
-def pkcs7_pad(data: bytes, block_size: int = BLOCK_SIZE) -> bytes:
-    pad_len = block_size - (len(data) % block_size)
-    if pad_len == 0:
-        pad_len = block_size
-    return data + bytes([pad_len]) * pad_len
+def cipher_label(key: bytes) -> str:
+    """Nhãn metrics, cùng chữ ký với des_modes.cipher_label."""
+    return "AES"
 
 
-def pkcs7_unpad(data: bytes) -> bytes:
-    if not data:
-        raise ValueError("Invalid padding (empty data)")
-    pad_len = data[-1]
-    if pad_len <= 0 or pad_len > BLOCK_SIZE:
-        raise ValueError("Invalid padding length")
-    if data[-pad_len:] != bytes([pad_len]) * pad_len:
-        raise ValueError("Invalid PKCS#7 padding")
-    return data[:-pad_len]
+@lru_cache(maxsize=256)
+def _key_schedule(key: bytes):
+    """Round keys cho key, cache theo key (batch cùng key chỉ expand 1 lần)."""
+    return tuple(key_expansion(key))
 
 
-def _ecb_encrypt(plaintext: bytes, round_keys) -> bytes:
-    plaintext = pkcs7_pad(plaintext, BLOCK_SIZE)
-    out = []
-    for i in range(0, len(plaintext), BLOCK_SIZE):
-        block = plaintext[i : i + BLOCK_SIZE]
-        out.append(aes_encrypt_block(block, round_keys))
-    return b"".join(out)
+@lru_cache(maxsize=256)
+def _word_schedule(key: bytes):
+    """(word key mã hóa, word key giải mã) cho T-table aes_core, cache theo key."""
+    round_keys = _key_schedule(key)
+    return key_words(round_keys), inv_key_words(round_keys)
+
+
+@lru_cache(maxsize=256)
+def _gcm_tables(key: bytes):
+    """Bảng GHASH theo H = E_K(0^128), cache theo key như round keys."""
+    return aes_gcm.ghash_tables(aes_encrypt_word(0, _word_schedule(key)[0]))
+
+
+register_cache("aes_key_schedule", _key_schedule)
+register_cache("aes_word_schedule", _word_schedule)
+register_cache("aes_gcm_tables", _gcm_tables)
+
+
+def _use_numpy(data: bytes) -> bool:
+    """Batch đủ lớn và có NumPy -> dùng engine vector hóa (aes_numpy)."""
+    return aes_numpy.HAVE_NUMPY and len(data) >= aes_numpy.NUMPY_MIN_BLOCKS * BLOCK_SIZE
+
+
+def _encrypt_word_fn(key: bytes):
+    return partial(aes_encrypt_word, key_words=_word_schedule(key)[0])
+
+
+def _decrypt_word_fn(key: bytes):
+    return partial(aes_decrypt_word, inv_key_words=_word_schedule(key)[1])
 
 
-def _ecb_decrypt(ciphertext: bytes, round_keys) -> bytes:
+def _ecb_blocks(data: bytes, key: bytes, decrypt: bool) -> bytes:
+    """ECB trên data bội số block, không pad / unpad."""
+    if _use_numpy(data):
+        fn = aes_numpy.decrypt_blocks if decrypt else aes_numpy.encrypt_blocks
+        return fn(data, _key_schedule(key))
+    word_fn = _decrypt_word_fn(key) if decrypt else _encrypt_word_fn(key)
+    return bytes(ecb_words(data, word_fn, BLOCK_SIZE))
+
+
+def _cbc_decrypt_blocks(ciphertext: bytes, key: bytes, iv: bytes) -> bytes:
+    """CBC decrypt trên data bội số block, chưa bỏ padding."""
+    if _use_numpy(ciphertext):
+        return aes_numpy.cbc_decrypt_blocks(ciphertext, _key_schedule(key), iv)
+    out, _ = cbc_decrypt_words(
+        ciphertext, _decrypt_word_fn(key), BLOCK_SIZE, int.from_bytes(iv, "big")
+    )
+    return bytes(out)
+
+
+def _ecb_encrypt(plaintext: bytes, key: bytes) -> bytes:
+    return _ecb_blocks(pkcs7_pad(plaintext, BLOCK_SIZE), key, False)
+
+
+def _ecb_decrypt(ciphertext: bytes, key: bytes) -> bytes:
     if len(ciphertext) % BLOCK_SIZE != 0:
         raise ValueError("Ciphertext length not multiple of block size")
-    out = []
-    for i in range(0, len(ciphertext), BLOCK_SIZE):
-        block = ciphertext[i : i + BLOCK_SIZE]
-        out.append(aes_decrypt_block(block, round_keys))
-    return pkcs7_unpad(b"".join(out))
+    return pkcs7_unpad(_ecb_blocks(ciphertext, key, True), BLOCK_SIZE)
 
 
-def _cbc_encrypt(plaintext: bytes, round_keys, iv: bytes):
+def _cbc_encrypt(plaintext: bytes, key: bytes, iv: bytes):
     if iv is None:
         iv = os.urandom(BLOCK_SIZE)
     if len(iv) != BLOCK_SIZE:
         raise ValueError("IV must be 16 bytes for AES CBC")
     plaintext = pkcs7_pad(plaintext, BLOCK_SIZE)
-    out = []
-    prev = iv
-    for i in range(0, len(plaintext), BLOCK_SIZE):
-        block = plaintext[i : i + BLOCK_SIZE]
-        x = bytes(a ^ b for a, b in zip(block, prev))
-        c = aes_encrypt_block(x, round_keys)
-        out.append(c)
-        prev = c
-    return b"".join(out), iv
-
-
-def _cbc_decrypt(ciphertext: bytes, round_keys, iv: bytes) -> bytes:
+    out, _ = cbc_encrypt_words(
+        plaintext, _encrypt_word_fn(key), BLOCK_SIZE, int.from_bytes(iv, "big")
+    )
+    return bytes(out), iv
+
+
+def _cbc_decrypt(ciphertext: bytes, key: bytes, iv: bytes) -> bytes:
     if iv is None or len(iv) != BLOCK_SIZE:
         raise ValueError("IV must be 16 bytes for AES CBC decryption")
     if len(ciphertext) % BLOCK_SIZE != 0:
         raise ValueError("Ciphertext length not multiple of block size")
+    return pkcs7_unpad(_cbc_decrypt_blocks(ciphertext, key, iv), BLOCK_SIZE)
+
+
+def _feedback_stream(key: bytes, mode: str, encrypting: bool, iv: bytes):
+    """CFB / CFB8 / OFB trên aes_encrypt_word (cả 2 chiều)."""
+    return FeedbackStreamCipher(_encrypt_word_fn(key), BLOCK_SIZE, mode, encrypting, iv)
 
-    out = []
-    prev = iv
-    for i in range(0, len(ciphertext), BLOCK_SIZE):
-        block = ciphertext[i : i + BLOCK_SIZE]
-        x = aes_decrypt_block(block, round_keys)
-        p = bytes(a ^ b for a, b in zip(x, prev))
-        out.append(p)
-        prev = block
-    return pkcs7_unpad(b"".join(out))
+
+def _gcm_encrypt(plaintext: bytes, key: bytes, iv: bytes, aad):
+    if iv is None:
+        iv = os.urandom(aes_gcm.NONCE_SIZE)
+    if not iv:
+        raise ValueError("IV (nonce) must not be empty for AES GCM")
+    ciphertext = aes_gcm.gcm_encrypt(
+        plaintext,
+        _key_schedule(key),
+        _word_schedule(key)[0],
+        _gcm_tables(key),
+        iv,
+        aad or b"",
+    )
+    return ciphertext, iv
+
+
+def _gcm_decrypt(ciphertext: bytes, key: bytes, iv: bytes, aad) -> bytes:
+    if not iv:
+        raise ValueError("IV (nonce) is required for AES GCM decryption")
+    return aes_gcm.gcm_decrypt(
+        ciphertext,
+        _key_schedule(key),
+        _word_schedule(key)[0],
+        _gcm_tables(key),
+        iv,
+        aad or b"",
+    )
 
 
 # ========== Lõi bytes-in / bytes-out cho backend / test ==========
-def aes_encrypt(plaintext: bytes, key: bytes, mode: str, iv: bytes = None):
+def aes_encrypt(
+    plaintext: bytes, key: bytes, mode: str, iv: bytes = None, aad: bytes = None
+):
     """
     Main API bytes-in/bytes-out.
     key: 16 / 24 / 32 bytes (AES-128/192/256)
-    mode: 'ECB' hoặc 'CBC'
+    mode: 'ECB', 'CBC', 'CFB', 'CFB8', 'OFB' hoặc 'GCM' (aad chỉ dùng cho GCM)
     """
     if len(key) not in (16, 24, 32):
         raise ValueError("AES key must be 16, 24, or 32 bytes")
 
-    round_keys = key_expansion(key)
+    key = bytes(key)
     mode = mode.upper()
+    CIPHER_BYTES.inc(len(plaintext), cipher=cipher_label(key), direction="encrypt")
 
     if mode == "ECB":
-        c = _ecb_encrypt(plaintext, round_keys)
+        c = _ecb_encrypt(plaintext, key)
         return c, None
     elif mode == "CBC":
-        c, iv_used = _cbc_encrypt(plaintext, round_keys, iv)
+        c, iv_used = _cbc_encrypt(plaintext, key, iv)
         return c, iv_used
+    elif mode in FEEDBACK_MODES:
+        iv = os.urandom(BLOCK_SIZE) if iv is None else iv
+        return _feedback_stream(key, mode, True, iv).update(plaintext), iv
+    elif mode == "GCM":
+        return _gcm_encrypt(plaintext, key, iv, aad)
     else:
         raise ValueError("Unsupported AES mode: " + mode)
 
 
-def aes_decrypt(ciphertext: bytes, key: bytes, mode: str, iv: bytes = None):
+def aes_decrypt(
+    ciphertext: bytes, key: bytes, mode: str, iv: bytes = None, aad: bytes = None
+):
     """
     Main API bytes-in/bytes-out cho giải mã.
+    GCM: ciphertext gồm tag 16 bytes ở cuối, tag sai -> ValueError.
     """
     if len(key) not in (16, 24, 32):
         raise ValueError("AES key must be 16, 24, or 32 bytes")
 
-    round_keys = key_expansion(key)
+    key = bytes(key)
     mode = mode.upper()
+    CIPHER_BYTES.inc(len(ciphertext), cipher=cipher_label(key), direction="decrypt")
 
     if mode == "ECB":
-        return _ecb_decrypt(ciphertext, round_keys)
+        return _ecb_decrypt(ciphertext, key)
     elif mode == "CBC":
-        return _cbc_decrypt(ciphertext, round_keys, iv)
+        return _cbc_decrypt(ciphertext, key, iv)
+    elif mode in FEEDBACK_MODES:
+        return _feedback_stream(key, mode, False, iv).update(ciphertext)
+    elif mode == "GCM":
+        return _gcm_decrypt(ciphertext, key, iv, aad)
     else:
         raise ValueError("Unsupported AES mode: " + mode)
 
 
+def aes_crypt_blocks(
+    data: bytes, key: bytes, mode: str, action: str, iv: bytes = None
+) -> bytes:
+    """
+    ECB (encrypt / decrypt) hoặc CBC decrypt trên data bội số 16 byte, không
+    pad / unpad. Mỗi đoạn xử lý độc lập (CBC: iv = block ciphertext ngay trước
+    đoạn) -> dùng để chia file thành window / process (crypto/file_cli.py).
+    """
+    if len(key) not in (16, 24, 32):
+        raise ValueError("AES key must be 16, 24, or 32 bytes")
+    if len(data) % BLOCK_SIZE != 0:
+        raise ValueError("Data length not multiple of block size")
+    key = bytes(key)
+    mode = mode.upper()
+    if mode == "ECB":
+        return _ecb_blocks(data, key, action == "decrypt")
+    if mode == "CBC" and action == "decrypt":
+        if iv is None or len(iv) != BLOCK_SIZE:
+            raise ValueError("IV must be 16 bytes for AES CBC decryption")
+        return _cbc_decrypt_blocks(data, key, iv)
+    raise ValueError(f"AES {mode} {action} cannot be split into blocks")
+
+
+def aes_stream(key: bytes, mode: str, action: str, iv: bytes = None):
+    """
+    Streaming object (update/finalize) cho AES ECB/CBC/CFB/CFB8/OFB.
+    Encrypt không truyền iv (mode khác ECB) -> tự sinh, đọc lại qua .iv
+    """
+    if len(key) not in (16, 24, 32):
+        raise ValueError("AES key must be 16, 24, or 32 bytes")
+    key = bytes(key)
+    mode = mode.upper()
+    encrypting = action == "encrypt"
+    if mode != "ECB" and iv is None and encrypting:
+        iv = os.urandom(BLOCK_SIZE)
+    if mode in FEEDBACK_MODES:
+        return _feedback_stream(key, mode, encrypting, iv)
+    return BlockStreamCipher(
+        _encrypt_word_fn(key),
+        _decrypt_word_fn(key),
+        BLOCK_SIZE,
+        mode,
+        encrypting,
+        iv,
+    )
+
+
 # ===== Wrapper theo đúng API của đề: encrypt / decrypt (hex/Base64) =====
 def encrypt(
-    plaintext: bytes, key: bytes, mode: str, iv: bytes = None, out_format: str = "hex"
+    plaintext: bytes,
+    key: bytes,
+    mode: str,
+    iv: bytes = None,
+    out_format: str = "hex",
+    aad: bytes = None,
 ):
     """
     encrypt(plaintext, key, mode, iv=None) -> ciphertext (chuỗi hex/base64)
 
     - plaintext: dữ liệu gốc (bytes)
     - key: 16 / 24 / 32 bytes (AES-128/192/256)
-    - mode: 'ECB' hoặc 'CBC'
-    - iv: 16 bytes hoặc None (CBC không có iv -> tự generate)
+    - mode: 'ECB', 'CBC', 'CFB', 'CFB8', 'OFB' hoặc 'GCM'
+    - iv: 16 bytes hoặc None (CBC/CFB/OFB không có iv -> tự generate);
+      GCM: nonce (None -> tự sinh 12 bytes)
     - out_format: 'hex' hoặc 'base64'
+    - aad: dữ liệu xác thực kèm cho GCM
 
     Trả về:
         (ciphertext_str, iv_used)
         - ciphertext_str: chuỗi hex hoặc base64
         - iv_used: iv thật sự (bytes), None nếu ECB
     """
-    raw_ct, iv_used = aes_encrypt(plaintext, key, mode, iv)
+    raw_ct, iv_used = aes_encrypt(plaintext, key, mode, iv, aad)
 
     fmt = out_format.lower()
     if fmt == "hex":
@@ -167,7 +323,12 @@ def encrypt(
 
 
 def decrypt(
-    ciphertext, key: bytes, mode: str, iv: bytes, in_format: str = "hex"
+    ciphertext,
+    key: bytes,
+    mode: str,
+    iv: bytes,
+    in_format: str = "hex",
+    aad: bytes = None,
 ) -> bytes:
     """
     decrypt(ciphertext, key, mode, iv) -> plaintext
@@ -176,9 +337,10 @@ def decrypt(
         + nếu in_format = 'hex' hoặc 'base64'  -> ciphertext là str
         + nếu in_format = 'raw'                -> ciphertext là bytes
     - key: 16 / 24 / 32 bytes
-    - mode: 'ECB' hoặc 'CBC'
-    - iv: 16 bytes (bắt buộc cho CBC)
+    - mode: 'ECB', 'CBC', 'CFB', 'CFB8', 'OFB' hoặc 'GCM'
+    - iv: 16 bytes (bắt buộc cho CBC/CFB/OFB); GCM: nonce lúc mã hóa
     - in_format: 'hex' | 'base64' | 'raw'
+    - aad: dữ liệu xác thực kèm cho GCM (phải giống lúc mã hóa)
 
     Trả về:
         plaintext: bytes
@@ -199,4 +361,22 @@ def decrypt(
             raise ValueError("If ciphertext is bytes, use in_format='raw'")
         raw_ct = ciphertext
 
-    return aes_decrypt(raw_ct, key, mode, iv)
+    return aes_decrypt(raw_ct, key, mode, iv, aad)
+
+
+def _run_cli():
+    """
+    CLI file (mmap, xem crypto/file_cli.py):
+        python -m crypto.aes_modes encrypt in.bin out.bin --key HEX --mode CBC
+        python -m crypto.aes_modes decrypt out.bin in.bin --key HEX --mode CBC --iv IV
+    """
+    from .file_cli import run_cli
+
+    run_cli("AES")
+
+
+if __name__ == "__main__":
+    from .profiling import profile_from_env
+
+    with profile_from_env("aes_modes"):
+        _run_cli()
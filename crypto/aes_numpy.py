@@ -0,0 +1,121 @@
+# crypto/aes_numpy.py
+"""
+AES engine vector hóa bằng NumPy (tùy chọn)
+-------------------------------------------
+Xử lý N block độc lập cùng lúc trên mảng uint8 (N, 16), layout giống
+aes_core (state[4*c + r]):
+
+- SubBytes   : fancy-index vào S_BOX
+- ShiftRows  : hoán vị cột của mảng
+- MixColumns : tra bảng MUL2/3 (Inv: MUL9/11/13/14) trên từng hàng state
+- AddRoundKey: XOR broadcast round key cho cả N block
+
+Overhead Python còn theo round thay vì theo block. Dùng cho ECB encrypt /
+decrypt và CBC decrypt (các block giải mã độc lập); CBC encrypt vẫn tuần tự.
+aes_modes tự chọn engine này khi HAVE_NUMPY và số block >= NUMPY_MIN_BLOCKS.
+
+    from crypto.aes_numpy import encrypt_blocks
+    ct = encrypt_blocks(padded_plaintext, round_keys)
+"""
+
+try:
+    import numpy as np
+except ImportError:  # NumPy không bắt buộc, aes_modes fallback về aes_core
+    np = None
+
+from .aes_core import INV_S_BOX, MUL2, MUL3, MUL9, MUL11, MUL13, MUL14, S_BOX
+
+HAVE_NUMPY = np is not None
+NUMPY_MIN_BLOCKS = 16  # dưới ngưỡng này engine từng block nhanh hơn
+
+# state mới [i] = state cũ [SHIFT[i]] (khớp _shift_rows / _inv_shift_rows)
+SHIFT_ROWS = [0, 5, 10, 15, 4, 9, 14, 3, 8, 13, 2, 7, 12, 1, 6, 11]
+INV_SHIFT_ROWS = [0, 13, 10, 7, 4, 1, 14, 11, 8, 5, 2, 15, 12, 9, 6, 3]
+
+if HAVE_NUMPY:
+    _S_BOX = np.array(S_BOX, dtype=np.uint8)
+    _INV_S_BOX = np.array(INV_S_BOX, dtype=np.uint8)
+    _M2, _M3, _M9, _M11, _M13, _M14 = (
+        np.array(t, dtype=np.uint8) for t in (MUL2, MUL3, MUL9, MUL11, MUL13, MUL14)
+    )
+    _SHIFT = np.array(SHIFT_ROWS)
+    _INV_SHIFT = np.array(INV_SHIFT_ROWS)
+
+
+def _require_numpy():
+    if not HAVE_NUMPY:
+        raise ValueError("NumPy chưa được cài (pip install numpy)")
+
+
+def _to_blocks(data: bytes):
+    if len(data) % 16 != 0:
+        raise ValueError("Data length not multiple of block size")
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, 16)
+
+
+def _round_keys_array(round_keys):
+    return np.frombuffer(b"".join(round_keys), dtype=np.uint8).reshape(-1, 16)
+
+
+def _mix_columns(state):
+    s = state.reshape(-1, 4, 4)  # (N, cột, hàng)
+    a0, a1, a2, a3 = s[:, :, 0], s[:, :, 1], s[:, :, 2], s[:, :, 3]
+    out = np.empty_like(s)
+    out[:, :, 0] = _M2[a0] ^ _M3[a1] ^ a2 ^ a3
+    out[:, :, 1] = a0 ^ _M2[a1] ^ _M3[a2] ^ a3
+    out[:, :, 2] = a0 ^ a1 ^ _M2[a2] ^ _M3[a3]
+    out[:, :, 3] = _M3[a0] ^ a1 ^ a2 ^ _M2[a3]
+    return out.reshape(-1, 16)
+
+
+def _inv_mix_columns(state):
+    s = state.reshape(-1, 4, 4)
+    a0, a1, a2, a3 = s[:, :, 0], s[:, :, 1], s[:, :, 2], s[:, :, 3]
+    out = np.empty_like(s)
+    out[:, :, 0] = _M14[a0] ^ _M11[a1] ^ _M13[a2] ^ _M9[a3]
+    out[:, :, 1] = _M9[a0] ^ _M14[a1] ^ _M11[a2] ^ _M13[a3]
+    out[:, :, 2] = _M13[a0] ^ _M9[a1] ^ _M14[a2] ^ _M11[a3]
+    out[:, :, 3] = _M11[a0] ^ _M13[a1] ^ _M9[a2] ^ _M14[a3]
+    return out.reshape(-1, 16)
+
+
+def encrypt_array(blocks, round_keys):
+    """blocks: uint8 (N, 16) -> ciphertext uint8 (N, 16)."""
+    rk = _round_keys_array(round_keys)
+    nr = len(rk) - 1
+    state = blocks ^ rk[0]
+    for r in range(1, nr):
+        state = _mix_columns(_S_BOX[state[:, _SHIFT]]) ^ rk[r]
+    return _S_BOX[state[:, _SHIFT]] ^ rk[nr]
+
+
+def decrypt_array(blocks, round_keys):
+    """blocks: uint8 (N, 16) -> plaintext uint8 (N, 16)."""
+    rk = _round_keys_array(round_keys)
+    nr = len(rk) - 1
+    state = _INV_S_BOX[(blocks ^ rk[nr])[:, _INV_SHIFT]]
+    for r in range(nr - 1, 0, -1):
+        state = _INV_S_BOX[_inv_mix_columns(state ^ rk[r])[:, _INV_SHIFT]]
+    return state ^ rk[0]
+
+
+def encrypt_blocks(data: bytes, round_keys) -> bytes:
+    """ECB trên data đã pad (bội số 16 byte)."""
+    _require_numpy()
+    return encrypt_array(_to_blocks(data), round_keys).tobytes()
+
+
+def decrypt_blocks(data: bytes, round_keys) -> bytes:
+    """Giải mã ECB từng block (chưa bỏ padding)."""
+    _require_numpy()
+    return decrypt_array(_to_blocks(data), round_keys).tobytes()
+
+
+def cbc_decrypt_blocks(data: bytes, round_keys, iv: bytes) -> bytes:
+    """CBC decrypt: P_i = D(C_i) XOR C_{i-1} (C_0 = iv), chưa bỏ padding."""
+    _require_numpy()
+    blocks = _to_blocks(data)
+    prev = np.empty_like(blocks)
+    prev[0] = np.frombuffer(iv, dtype=np.uint8)
+    prev[1:] = blocks[:-1]
+    return (decrypt_array(blocks, round_keys) ^ prev).tobytes()
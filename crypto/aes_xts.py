@@ -0,0 +1,213 @@
+# crypto/aes_xts.py
+"""
+AES-XTS (IEEE 1619 / NIST SP 800-38E): mã hóa theo sector, truy cập ngẫu nhiên
+------------------------------------------------------------------------------
+Key = K1 || K2 (32 bytes: AES-128-XTS, 64 bytes: AES-256-XTS). Mỗi sector
+(data unit) mã hóa độc lập theo chỉ số -> đọc / ghi sector bất kỳ trong ảnh
+đĩa mà không phải chaining từ đầu như CBC.
+
+- xts_encrypt_sector(data, key, sector) / xts_decrypt_sector(...)
+- xts_encrypt_range(data, key, first_sector, sector_size=4096, workers=None)
+  xts_decrypt_range(...): nhiều sector liên tiếp
+
+Block j của sector i: T_j = E_K2(i) * alpha^j trong GF(2^128);
+C_j = E_K1(P_j XOR T_j) XOR T_j. Cả sector (hoặc cả range) được xử lý thành
+XOR(tweak) -> ECB -> XOR(tweak): phần ECB là 1 batch (aes_numpy nếu có),
+sector không chia hết 16 byte dùng ciphertext stealing.
+
+    from crypto.aes_xts import xts_decrypt_sector
+    plain = xts_decrypt_sector(image[4096 * n : 4096 * (n + 1)], key, n)
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+from . import aes_numpy
+from .aes_core import (
+    aes_decrypt_word,
+    aes_encrypt_word,
+    inv_key_words,
+    key_expansion,
+    key_words,
+)
+from .block_stream import ecb_words
+from .metrics import register_cache
+
+BLOCK_SIZE = 16
+SECTOR_SIZE = 4096
+KEY_SIZES = (32, 64)  # K1 || K2: AES-128-XTS, AES-256-XTS
+_GF_REDUCE = 0x87  # x^128 = x^7 + x^2 + x + 1 (tweak dạng little-endian)
+_MASK128 = (1 << 128) - 1
+
+
+def _schedule(key: bytes):
+    """(round keys cho aes_numpy, word key mã hóa, word key giải mã)."""
+    round_keys = tuple(key_expansion(key))
+    return round_keys, key_words(round_keys), inv_key_words(round_keys)
+
+
+@lru_cache(maxsize=256)
+def _schedules(key: bytes):
+    """(schedule K1 cho dữ liệu, schedule K2 cho tweak), cache theo key."""
+    half = len(key) // 2
+    return _schedule(key[:half]), _schedule(key[half:])
+
+
+register_cache("aes_xts_schedules", _schedules)
+
+
+def _check_key(key: bytes) -> bytes:
+    if len(key) not in KEY_SIZES:
+        raise ValueError("AES-XTS key must be 32 or 64 bytes (K1 || K2)")
+    return bytes(key)
+
+
+def _ecb(data: bytes, schedule, decrypt: bool) -> bytes:
+    """ECB không padding (bội số 16 byte) qua aes_numpy hoặc aes_core T-table."""
+    round_keys, words, inv_words = schedule
+    if aes_numpy.HAVE_NUMPY and len(data) >= aes_numpy.NUMPY_MIN_BLOCKS * BLOCK_SIZE:
+        fn = aes_numpy.decrypt_blocks if decrypt else aes_numpy.encrypt_blocks
+        return fn(data, round_keys)
+    if decrypt:
+        word_fn = partial(aes_decrypt_word, inv_key_words=inv_words)
+    else:
+        word_fn = partial(aes_encrypt_word, key_words=words)
+    return bytes(ecb_words(data, word_fn, BLOCK_SIZE))
+
+
+def _xor(a, b) -> bytes:
+    x = int.from_bytes(a, "big") ^ int.from_bytes(b, "big")
+    return x.to_bytes(len(a), "big")
+
+
+def _tweak_blocks(seed: bytes, count: int) -> bytes:
+    """seed = E_K2(sector) -> T_0 .. T_{count-1} (mỗi bước nhân alpha)."""
+    t = int.from_bytes(seed, "little")
+    out = []
+    for _ in range(count):
+        out.append(t.to_bytes(BLOCK_SIZE, "little"))
+        t = ((t << 1) & _MASK128) ^ (_GF_REDUCE if t >> 127 else 0)
+    return b"".join(out)
+
+
+def _tweak_seeds(first_sector: int, count: int, tweak_keys) -> bytes:
+    """E_K2(i) cho các sector first_sector .. first_sector + count - 1 (1 batch)."""
+    indices = b"".join(
+        (first_sector + i).to_bytes(BLOCK_SIZE, "little") for i in range(count)
+    )
+    return _ecb(indices, tweak_keys, False)
+
+
+def _xex(data, tweaks: bytes, schedule, decrypt: bool) -> bytes:
+    """XOR tweak -> ECB -> XOR tweak trên các block đầy đủ."""
+    return _xor(_ecb(_xor(data, tweaks), schedule, decrypt), tweaks)
+
+
+def _crypt_sector(data, seed: bytes, schedule, decrypt: bool) -> bytes:
+    """1 sector (>= 16 bytes), ciphertext stealing nếu không chia hết 16."""
+    n = len(data)
+    if n < BLOCK_SIZE:
+        raise ValueError("XTS sector must be at least 16 bytes")
+    full, rem = divmod(n, BLOCK_SIZE)
+    tweaks = _tweak_blocks(seed, full + (1 if rem else 0))
+    if not rem:
+        return _xex(data, tweaks, schedule, decrypt)
+
+    head = (full - 1) * BLOCK_SIZE
+    out = _xex(data[:head], tweaks[:head], schedule, decrypt) if head else b""
+    last, tail = data[head : head + BLOCK_SIZE], data[head + BLOCK_SIZE :]
+    t_last, t_tail = tweaks[head : head + BLOCK_SIZE], tweaks[head + BLOCK_SIZE :]
+    # Encrypt: block đầy đủ cuối dùng T_{m-1}; decrypt: dùng T_m trước
+    first_t, second_t = (t_tail, t_last) if decrypt else (t_last, t_tail)
+    cc = _xex(last, first_t, schedule, decrypt)
+    pp = bytes(tail) + cc[rem:]
+    return out + _xex(pp, second_t, schedule, decrypt) + cc[:rem]
+
+
+def _crypt_range(data, key: bytes, first_sector: int, sector_size: int, decrypt):
+    data_keys, tweak_keys = _schedules(key)
+    count = -(-len(data) // sector_size)
+    seeds = _tweak_seeds(first_sector, count, tweak_keys)
+    if sector_size % BLOCK_SIZE == 0 and len(data) % sector_size == 0:
+        # Mọi sector đều đủ block: 1 batch ECB cho cả range
+        per_sector = sector_size // BLOCK_SIZE
+        tweaks = b"".join(
+            _tweak_blocks(seeds[i : i + BLOCK_SIZE], per_sector)
+            for i in range(0, len(seeds), BLOCK_SIZE)
+        )
+        return _xex(data, tweaks, data_keys, decrypt)
+    mv = memoryview(data)
+    return b"".join(
+        _crypt_sector(
+            mv[i * sector_size : (i + 1) * sector_size],
+            seeds[i * BLOCK_SIZE : (i + 1) * BLOCK_SIZE],
+            data_keys,
+            decrypt,
+        )
+        for i in range(count)
+    )
+
+
+def _crypt_shard(args):
+    """Worker (process pool): 1 đoạn sector liên tiếp."""
+    data, key, first_sector, sector_size, decrypt = args
+    return _crypt_range(data, key, first_sector, sector_size, decrypt)
+
+
+def _parallel_range(data, key, first_sector, sector_size, decrypt, workers):
+    key = _check_key(key)
+    if first_sector < 0:
+        raise ValueError("Sector index must be >= 0")
+    if sector_size < BLOCK_SIZE:
+        raise ValueError("XTS sector size must be at least 16 bytes")
+    if not data:
+        return b""
+    count = -(-len(data) // sector_size)
+    if len(data) % sector_size and len(data) % sector_size < BLOCK_SIZE:
+        raise ValueError("XTS sector must be at least 16 bytes")
+    workers = min(workers or 1, count)
+    if workers == 1:
+        return _crypt_range(data, key, first_sector, sector_size, decrypt)
+
+    per_shard = -(-count // workers)
+    shards = [
+        (
+            bytes(data[s * sector_size : (s + per_shard) * sector_size]),
+            key,
+            first_sector + s,
+            sector_size,
+            decrypt,
+        )
+        for s in range(0, count, per_shard)
+    ]
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        return b"".join(pool.map(_crypt_shard, shards))
+
+
+def xts_encrypt_sector(data: bytes, key: bytes, sector: int) -> bytes:
+    """Mã hóa 1 sector (>= 16 bytes) theo chỉ số sector."""
+    return _parallel_range(data, key, sector, max(len(data), BLOCK_SIZE), False, 1)
+
+
+def xts_decrypt_sector(data: bytes, key: bytes, sector: int) -> bytes:
+    """Giải mã 1 sector theo chỉ số, không cần các sector khác."""
+    return _parallel_range(data, key, sector, max(len(data), BLOCK_SIZE), True, 1)
+
+
+def xts_encrypt_range(
+    data: bytes, key: bytes, first_sector: int, sector_size=SECTOR_SIZE, workers=None
+) -> bytes:
+    """
+    Mã hóa các sector liên tiếp bắt đầu từ first_sector (sector cuối có thể
+    ngắn hơn, >= 16 bytes). workers > 1: chia range cho process pool.
+    """
+    return _parallel_range(data, key, first_sector, sector_size, False, workers)
+
+
+def xts_decrypt_range(
+    data: bytes, key: bytes, first_sector: int, sector_size=SECTOR_SIZE, workers=None
+) -> bytes:
+    """Giải mã các sector liên tiếp bắt đầu từ first_sector."""
+    return _parallel_range(data, key, first_sector, sector_size, True, workers)
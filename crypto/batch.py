@@ -0,0 +1,181 @@
+# crypto/batch.py
+"""
+Batch breaker cho Task 1-3
+--------------------------
+Phá nhiều file ciphertext trong một lần chạy:
+- Input: file, thư mục (lấy *.txt) hoặc glob (ví dụ "data/*.txt").
+- Cipher: caesar | substitution | vigenere | auto (tự nhận dạng).
+- Chạy song song trên process pool; n-gram/wordlist load 1 lần mỗi worker.
+- Kết quả: JSON-lines (1 dòng / file, theo thứ tự input) kèm thời gian xử
+  lý từng file.
+
+Usage:
+    python -m crypto.batch "data/*.txt" --cipher auto --workers 4 \\
+        --report batch_report.jsonl --out-dir batch_out
+"""
+
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+
+from .caesar import break_caesar
+from .classifier import classify_cipher
+from .models import preload_models
+from .substitution import ALPHABET, break_substitution
+from .vigenere import break_vigenere
+
+CIPHERS = ("caesar", "substitution", "vigenere")
+
+
+def _collect_inputs(patterns):
+    """Mở rộng danh sách file / thư mục / glob thành list path (đã sort, không trùng)."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "*.txt"))
+        elif os.path.isfile(pattern):
+            matches = [pattern]
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        paths.extend(p for p in matches if os.path.isfile(p))
+    return sorted(set(paths))
+
+
+def _init_worker():
+    """Load mọi model 1 lần khi worker khởi động (không phải mỗi file)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        preload_models(freeze=False)
+
+
+def _break_text(ciphertext: str, cipher: str):
+    """Gọi breaker, trả về (record, nội dung output theo format CLI của module)."""
+    if cipher == "caesar":
+        key, plaintext = break_caesar(ciphertext)
+        return {"key": key}, f"{key}\n{plaintext}"
+    if cipher == "vigenere":
+        key, plaintext, score = break_vigenere(ciphertext)
+        return {"key": key, "score": score}, f"{key}\n{plaintext}"
+
+    score, mapping_str, plaintext = break_substitution(ciphertext)
+    plain_alphabet = mapping_str.split(":")[-1].strip()
+    output = (
+        f"Score / Log-likelihood: {score:.2f}\n"
+        f"cipher: {ALPHABET.upper()}\n"
+        f"plain : {plain_alphabet}\n"
+        f"{plaintext}"
+    )
+    return {"key": plain_alphabet, "score": score}, output
+
+
+def _process_file(path: str, cipher: str, out_dir):
+    """Worker: phá 1 file. Log của breaker bị nuốt để không trộn stdout."""
+    record = {"file": path}
+    t0 = time.perf_counter()
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            ciphertext = f.read()
+        record["chars"] = len(ciphertext)
+
+        detected = classify_cipher(ciphertext)[0] if cipher == "auto" else cipher
+        record["cipher"] = detected
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            result, output = _break_text(ciphertext, detected)
+        record.update(result)
+
+        if out_dir:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            out_path = os.path.join(out_dir, f"{stem}.{detected}.txt")
+            with open(out_path, "w", encoding="utf-8", errors="ignore") as out:
+                out.write(output)
+            record["output"] = out_path
+        record["success"] = True
+    except Exception as e:
+        record["success"] = False
+        record["error"] = str(e)
+
+    record["seconds"] = round(time.perf_counter() - t0, 4)
+    return record
+
+
+def run_batch(paths, cipher="auto", workers=None, report=None, out_dir=None):
+    """
+    Phá toàn bộ paths trên ProcessPoolExecutor, ghi report JSON-lines theo
+    thứ tự input (mỗi dòng ghi ngay khi các file trước nó đã xong, report
+    giống nhau giữa các lần chạy). Trả về list record.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    if cipher != "auto" and cipher not in CIPHERS:
+        raise ValueError(f"Unsupported cipher: {cipher}")
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    records = []
+    report_file = open(report, "w", encoding="utf-8") if report else sys.stdout
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            n = len(paths)
+            results = pool.map(_process_file, paths, [cipher] * n, [out_dir] * n)
+            for record in results:
+                records.append(record)
+                report_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                report_file.flush()
+    finally:
+        if report_file is not sys.stdout:
+            report_file.close()
+    return records
+
+
+def _run_cli():
+    """
+    CLI batch:
+        python -m crypto.batch data/ "more/*.txt" --cipher auto --workers 8
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Batch breaker cho Caesar / Substitution / Vigenère"
+    )
+    parser.add_argument("inputs", nargs="+", help="File, thư mục hoặc glob ciphertext")
+    parser.add_argument(
+        "--cipher",
+        choices=("auto",) + CIPHERS,
+        default="auto",
+        help="Loại cipher (mặc định auto = tự nhận dạng)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Số process (mặc định = số CPU)"
+    )
+    parser.add_argument(
+        "--report", default=None, help="File JSON-lines report (mặc định stdout)"
+    )
+    parser.add_argument(
+        "--out-dir", default=None, help="Thư mục ghi plaintext từng file (tùy chọn)"
+    )
+    args = parser.parse_args()
+
+    paths = _collect_inputs(args.inputs)
+    if not paths:
+        parser.error("Không tìm thấy file input nào")
+
+    t0 = time.perf_counter()
+    records = run_batch(paths, args.cipher, args.workers, args.report, args.out_dir)
+    elapsed = time.perf_counter() - t0
+
+    failed = sum(1 for r in records if not r["success"])
+    print(
+        f"[+] Đã xử lý {len(records)} file ({failed} lỗi) trong {elapsed:.2f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    from .profiling import profile_from_env
+
+    with profile_from_env("batch"):
+        _run_cli()
@@ -0,0 +1,282 @@
+# crypto/bench.py
+"""
+Benchmark harness cho các engine / breaker
+------------------------------------------
+Đo trên input cố định trong data/ với seed cố định:
+- Breaker: break_caesar, break_vigenere, substitution hill-climb
+  (_break_with_hillclimb với số round giới hạn và seed cố định).
+- Block cipher: DES / AES, ECB / CBC, encrypt + decrypt trên nhiều kích
+  thước payload.
+
+Mỗi case chạy `repeat` lần (lấy median) rồi chạy thêm 1 lần dưới
+tracemalloc để lấy peak memory (tách riêng để không làm chậm phép đo).
+Kết quả: JSON gồm seconds, ops/sec, MB/s, score-evaluations/sec, peak KiB.
+
+Usage:
+    python -m crypto.bench --out bench.json
+    python -m crypto.bench --save-baseline bench_baseline.json
+    python -m crypto.bench --baseline bench_baseline.json --tolerance 0.2
+        -> exit code 1 nếu có case chậm hơn baseline quá tolerance
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from . import metrics
+from .aes_modes import aes_decrypt, aes_encrypt
+from .caesar import break_caesar
+from .des_modes import des_decrypt, des_encrypt
+from .models import preload_models
+from .substitution import BASE_DIR, _break_with_hillclimb
+from .vigenere import break_vigenere
+
+DATA_DIR = os.path.join(BASE_DIR, "data")
+# Caesar luôn thử đủ 26 khóa nên input nào cũng đo được tốc độ
+CAESAR_INPUT = "cipher_10000_chars.txt"
+SUBSTITUTION_INPUT = "task2_10000_chars.txt"
+VIGENERE_INPUT = "vigenere_10000_chars_ciphertext.txt"
+
+DEFAULT_SEED = 1337
+DEFAULT_SIZES = (1024, 8192, 32768)
+DEFAULT_REPEAT = 3
+SUB_ROUNDS = 4
+SUB_SAMPLE_LETTERS = 1000
+
+
+def _read_data(name: str) -> str:
+    with open(
+        os.path.join(DATA_DIR, name), "r", encoding="utf-8", errors="ignore"
+    ) as f:
+        return f.read()
+
+
+def _measure(fn, repeat: int):
+    """
+    Chạy fn() repeat lần (log bị nuốt), trả về dict thời gian, số lần chấm
+    điểm trung bình mỗi lần chạy và peak memory (lần chạy thêm dưới tracemalloc).
+    """
+    times = []
+    evals_before = metrics.SCORE_EVALUATIONS.total()
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+    evals = (metrics.SCORE_EVALUATIONS.total() - evals_before) / repeat
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(times)
+    result = {
+        "seconds": round(median, 6),
+        "min_seconds": round(min(times), 6),
+        "ops_per_sec": round(1 / median, 3) if median else None,
+        "peak_kib": round(peak / 1024, 1),
+    }
+    if evals:
+        result["score_evals"] = evals
+        result["score_evals_per_sec"] = round(evals / median, 1)
+    return result
+
+
+def bench_breakers(seed: int, repeat: int, sub_rounds: int = SUB_ROUNDS):
+    caesar_text = _read_data(CAESAR_INPUT)
+    vigenere_text = _read_data(VIGENERE_INPUT)
+    sub_text = _read_data(SUBSTITUTION_INPUT)
+
+    def run_substitution():
+        _break_with_hillclimb(
+            sub_text,
+            rounds=sub_rounds,
+            sample_letters=SUB_SAMPLE_LETTERS,
+            consolidate=sub_rounds + 1,
+            seed=seed,
+        )
+
+    cases = {
+        "break_caesar": lambda: break_caesar(caesar_text),
+        "break_vigenere": lambda: break_vigenere(vigenere_text),
+        f"substitution_hillclimb_{sub_rounds}r": run_substitution,
+    }
+    results = {}
+    for name, fn in cases.items():
+        results[name] = _measure(fn, repeat)
+        print(f"[+] {name}: {results[name]['seconds']:.3f}s", file=sys.stderr)
+    return results
+
+
+def bench_block_ciphers(seed: int, repeat: int, sizes=DEFAULT_SIZES):
+    rng = random.Random(seed)
+    ciphers = {
+        "des": (des_encrypt, des_decrypt, 8, 8),
+        "aes": (aes_encrypt, aes_decrypt, 16, 16),
+    }
+    results = {}
+    for name, (enc, dec, key_len, block) in ciphers.items():
+        key = bytes(rng.getrandbits(8) for _ in range(key_len))
+        iv = bytes(rng.getrandbits(8) for _ in range(block))
+        for mode in ("ECB", "CBC"):
+            mode_iv = iv if mode == "CBC" else None
+            for size in sizes:
+                data = bytes(rng.getrandbits(8) for _ in range(size))
+                ct, _ = enc(data, key, mode, mode_iv)
+                for action, fn in (
+                    ("encrypt", lambda: enc(data, key, mode, mode_iv)),
+                    ("decrypt", lambda: dec(ct, key, mode, mode_iv)),
+                ):
+                    case = f"{name}_{mode.lower()}_{action}_{size}"
+                    res = _measure(fn, repeat)
+                    res["mb_per_sec"] = round(size / res["seconds"] / 1e6, 4)
+                    results[case] = res
+                    print(f"[+] {case}: {res['mb_per_sec']:.4f} MB/s", file=sys.stderr)
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2):
+    """Case có median seconds > baseline * (1 + tolerance) -> regression."""
+    regressions = []
+    for name, res in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("seconds"):
+            continue
+        ratio = res["seconds"] / base["seconds"]
+        res["baseline_seconds"] = base["seconds"]
+        res["ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(
+                {
+                    "case": name,
+                    "baseline_seconds": base["seconds"],
+                    "seconds": res["seconds"],
+                    "ratio": round(ratio, 3),
+                }
+            )
+    return regressions
+
+
+def run_bench(
+    seed=DEFAULT_SEED,
+    repeat=DEFAULT_REPEAT,
+    sizes=DEFAULT_SIZES,
+    sub_rounds=SUB_ROUNDS,
+    skip_breakers=False,
+    skip_ciphers=False,
+):
+    """Chạy toàn bộ benchmark, trả về dict JSON-serializable."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        preload_models(freeze=False)  # load model không tính vào thời gian đo
+
+    results = {}
+    if not skip_breakers:
+        results.update(bench_breakers(seed, repeat, sub_rounds))
+    if not skip_ciphers:
+        results.update(bench_block_ciphers(seed, repeat, sizes))
+    return {
+        "meta": {
+            "seed": seed,
+            "repeat": repeat,
+            "sizes": list(sizes),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def _run_cli():
+    """
+    CLI benchmark:
+        python -m crypto.bench --baseline bench_baseline.json
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark cipher engines / breakers")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed cố định")
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help="Số lần đo mỗi case"
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="Kích thước payload DES/AES (bytes, phân cách bằng dấu phẩy)",
+    )
+    parser.add_argument(
+        "--sub-rounds",
+        type=int,
+        default=SUB_ROUNDS,
+        help=f"Số round hill-climb substitution (mặc định {SUB_ROUNDS})",
+    )
+    parser.add_argument("--skip-breakers", action="store_true")
+    parser.add_argument("--skip-ciphers", action="store_true")
+    parser.add_argument(
+        "--out", default=None, help="File JSON output (mặc định stdout)"
+    )
+    parser.add_argument("--baseline", default=None, help="File baseline để so sánh")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Ngưỡng chậm hơn baseline được chấp nhận (0.2 = 20%%)",
+    )
+    parser.add_argument(
+        "--save-baseline", default=None, help="Ghi kết quả làm baseline mới"
+    )
+    args = parser.parse_args()
+
+    sizes = tuple(int(s) for s in args.sizes.split(",") if s.strip())
+    report = run_bench(
+        args.seed,
+        args.repeat,
+        sizes,
+        args.sub_rounds,
+        args.skip_breakers,
+        args.skip_ciphers,
+    )
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    for r in regressions:
+        print(
+            f"[!] REGRESSION {r['case']}: {r['baseline_seconds']:.4f}s → "
+            f"{r['seconds']:.4f}s (x{r['ratio']})",
+            file=sys.stderr,
+        )
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    from .profiling import profile_from_env
+
+    with profile_from_env("bench"):
+        _run_cli()
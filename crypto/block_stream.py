@@ -0,0 +1,290 @@
+# crypto/block_stream.py
+"""
+Streaming block-cipher object (ECB / CBC + PKCS#7; CFB / CFB8 / OFB)
+--------------------------------------------------------------------
+Dùng chung cho DES và AES: nhận hàm mã hóa / giải mã 1 block và xử lý dữ
+liệu theo từng chunk có kích thước bất kỳ; giữa các lần update() chỉ giữ
+lại phần dư chưa đủ block (decrypt: thêm 1 block cuối).
+
+    stream = BlockStreamCipher(enc_word, dec_word, 16, "CBC", True, iv)
+    for chunk in chunks:
+        out.write(stream.update(chunk))
+    out.write(stream.finalize())
+
+- Encrypt: padding PKCS#7 được thêm ở finalize().
+- Decrypt: block cuối được giữ lại đến finalize() để bỏ padding.
+
+Chaining theo word: block được giữ dạng int (64-bit DES, 128-bit AES) suốt
+vòng lặp ECB / CBC, XOR CBC là 1 phép XOR int; chỉ đổi bytes <-> int ở
+biên buffer (đọc qua memoryview, ghi vào bytearray cấp phát sẵn).
+Dùng chung bởi des_modes, aes_modes và BlockStreamCipher.
+
+CFB / CFB8 / OFB (FeedbackStreamCipher): không padding, cùng giao diện
+update / finalize; one-shot trong *_modes = 1 lần update().
+"""
+
+
+def pkcs7_pad(data: bytes, block_size: int) -> bytes:
+    pad_len = block_size - (len(data) % block_size)
+    return data + bytes([pad_len]) * pad_len
+
+
+def pkcs7_unpad(data: bytes, block_size: int) -> bytes:
+    if not data:
+        raise ValueError("Invalid padding (empty data)")
+    pad_len = data[-1]
+    if pad_len <= 0 or pad_len > block_size:
+        raise ValueError("Invalid padding length")
+    if data[-pad_len:] != bytes([pad_len]) * pad_len:
+        raise ValueError("Invalid PKCS#7 padding")
+    return data[:-pad_len]
+
+
+# ========== Chaining theo word (word_fn: int -> int) ==========
+def ecb_words(data, word_fn, block_size: int) -> bytearray:
+    """ECB trên data (bội số block_size)."""
+    mv = memoryview(data)
+    out = bytearray(len(mv))
+    for i in range(0, len(mv), block_size):
+        j = i + block_size
+        out[i:j] = word_fn(int.from_bytes(mv[i:j], "big")).to_bytes(block_size, "big")
+    return out
+
+
+def cbc_encrypt_words(data, encrypt_word, block_size: int, prev: int):
+    """CBC encrypt; prev = IV (int). Trả về (ciphertext, block cuối dạng int)."""
+    mv = memoryview(data)
+    out = bytearray(len(mv))
+    for i in range(0, len(mv), block_size):
+        j = i + block_size
+        prev = encrypt_word(int.from_bytes(mv[i:j], "big") ^ prev)
+        out[i:j] = prev.to_bytes(block_size, "big")
+    return out, prev
+
+
+def cbc_decrypt_words(data, decrypt_word, block_size: int, prev: int):
+    """CBC decrypt; prev = IV (int). Trả về (plaintext, block cipher cuối dạng int)."""
+    mv = memoryview(data)
+    out = bytearray(len(mv))
+    for i in range(0, len(mv), block_size):
+        j = i + block_size
+        c = int.from_bytes(mv[i:j], "big")
+        out[i:j] = (decrypt_word(c) ^ prev).to_bytes(block_size, "big")
+        prev = c
+    return out, prev
+
+
+def cfb_encrypt_words(data, encrypt_word, block_size: int, prev: int):
+    """CFB full-block encrypt (bội số block_size); trả về (ciphertext, block cuối)."""
+    mv = memoryview(data)
+    out = bytearray(len(mv))
+    for i in range(0, len(mv), block_size):
+        j = i + block_size
+        prev = encrypt_word(prev) ^ int.from_bytes(mv[i:j], "big")
+        out[i:j] = prev.to_bytes(block_size, "big")
+    return out, prev
+
+
+def cfb_decrypt_words(data, encrypt_word, block_size: int, prev: int):
+    """CFB full-block decrypt (dùng hàm mã hóa); trả về (plaintext, block cuối)."""
+    mv = memoryview(data)
+    out = bytearray(len(mv))
+    for i in range(0, len(mv), block_size):
+        j = i + block_size
+        c = int.from_bytes(mv[i:j], "big")
+        out[i:j] = (encrypt_word(prev) ^ c).to_bytes(block_size, "big")
+        prev = c
+    return out, prev
+
+
+def ofb_keystream(encrypt_word, block_size: int, prev: int, blocks: int):
+    """blocks block keystream OFB; trả về (keystream, trạng thái cuối)."""
+    out = bytearray(blocks * block_size)
+    for i in range(0, len(out), block_size):
+        prev = encrypt_word(prev)
+        out[i : i + block_size] = prev.to_bytes(block_size, "big")
+    return out, prev
+
+
+def _xor_bytes(a, b) -> bytes:
+    """XOR 2 chuỗi cùng độ dài bằng 1 phép XOR int."""
+    x = int.from_bytes(a, "big") ^ int.from_bytes(b, "big")
+    return x.to_bytes(len(a), "big")
+
+
+FEEDBACK_MODES = ("CFB", "CFB8", "OFB")
+
+
+class FeedbackStreamCipher:
+    """
+    CFB (segment = 1 block), CFB8 (segment 1 byte), OFB: không padding,
+    ciphertext dài đúng bằng plaintext. update() trả output ngay cho mọi độ
+    dài chunk (không giữ lại block cuối như ECB / CBC), finalize() -> b"".
+    Cả 2 chiều chỉ dùng hàm mã hóa block (encrypt_word: int -> int).
+
+    OFB: keystream không phụ thuộc dữ liệu -> precompute(n) sinh trước vào
+    buffer (bytearray dùng lại), update() chỉ còn XOR.
+    """
+
+    def __init__(self, encrypt_word, block_size, mode, encrypting, iv):
+        mode = mode.upper()
+        if mode not in FEEDBACK_MODES:
+            raise ValueError("Unsupported streaming mode: " + mode)
+        if iv is None or len(iv) != block_size:
+            raise ValueError(f"IV must be {block_size} bytes for {mode}")
+
+        self.encrypt_word = encrypt_word
+        self.block_size = block_size
+        self.mode = mode
+        self.encrypting = encrypting
+        self.iv = iv
+        self._reg = int.from_bytes(iv, "big")  # thanh ghi feedback
+        self._keystream = bytearray()  # keystream chưa dùng
+        self._segment = bytearray()  # CFB: ciphertext của block đang dở
+        self._finalized = False
+
+    def precompute(self, nbytes: int) -> None:
+        """OFB: sinh trước keystream để buffer có ít nhất nbytes."""
+        if self.mode != "OFB":
+            raise ValueError("Keystream precompute chỉ dùng cho OFB")
+        missing = nbytes - len(self._keystream)
+        if missing > 0:
+            blocks = -(-missing // self.block_size)
+            ks, self._reg = ofb_keystream(
+                self.encrypt_word, self.block_size, self._reg, blocks
+            )
+            self._keystream += ks
+
+    def _ofb(self, data) -> bytes:
+        n = len(data)
+        self.precompute(n)
+        out = _xor_bytes(data, self._keystream[:n])
+        del self._keystream[:n]
+        return out
+
+    def _cfb8(self, data) -> bytes:
+        shift = 8 * (self.block_size - 1)
+        mask = (1 << (8 * self.block_size)) - 1
+        reg = self._reg
+        out = bytearray(len(data))
+        for i, b in enumerate(data):
+            c = b ^ (self.encrypt_word(reg) >> shift)
+            out[i] = c
+            reg = ((reg << 8) | (c if self.encrypting else b)) & mask
+        self._reg = reg
+        return bytes(out)
+
+    def _cfb_partial(self, data) -> bytes:
+        """XOR phần data (ngắn hơn phần keystream còn lại) vào block đang dở."""
+        n = len(data)
+        out = _xor_bytes(data, self._keystream[:n])
+        del self._keystream[:n]
+        self._segment += out if self.encrypting else data
+        if not self._keystream:
+            # Đủ 1 block ciphertext -> thành thanh ghi feedback
+            self._reg = int.from_bytes(self._segment, "big")
+            self._segment.clear()
+        return out
+
+    def _cfb(self, data) -> bytes:
+        bs = self.block_size
+        mv = memoryview(data)
+        head = min(len(self._keystream), len(mv))
+        out = [self._cfb_partial(mv[:head])] if head else []
+        mv = mv[head:]
+        full = len(mv) - len(mv) % bs
+        if full:
+            fn = cfb_encrypt_words if self.encrypting else cfb_decrypt_words
+            blocks, self._reg = fn(mv[:full], self.encrypt_word, bs, self._reg)
+            out.append(bytes(blocks))
+        if len(mv) > full:
+            self._keystream[:] = self.encrypt_word(self._reg).to_bytes(bs, "big")
+            out.append(self._cfb_partial(mv[full:]))
+        return b"".join(out)
+
+    def update(self, chunk) -> bytes:
+        """Xử lý chunk bất kỳ độ dài, trả về output cùng độ dài."""
+        if self._finalized:
+            raise ValueError("Stream already finalized")
+        if not chunk:
+            return b""
+        if self.mode == "OFB":
+            return self._ofb(chunk)
+        if self.mode == "CFB8":
+            return self._cfb8(chunk)
+        return self._cfb(chunk)
+
+    def finalize(self) -> bytes:
+        """Không có padding -> không còn output."""
+        if self._finalized:
+            raise ValueError("Stream already finalized")
+        self._finalized = True
+        return b""
+
+
+class BlockStreamCipher:
+    """
+    encrypt_word / decrypt_word: int (block_size bytes, big-endian) -> int
+    mode: 'ECB' | 'CBC'; encrypting: True = mã hóa, False = giải mã.
+    """
+
+    def __init__(
+        self, encrypt_word, decrypt_word, block_size, mode, encrypting, iv=None
+    ):
+        mode = mode.upper()
+        if mode not in ("ECB", "CBC"):
+            raise ValueError("Unsupported streaming mode: " + mode)
+        if mode == "CBC" and (iv is None or len(iv) != block_size):
+            raise ValueError(f"IV must be {block_size} bytes for CBC")
+
+        self.encrypt_word = encrypt_word
+        self.decrypt_word = decrypt_word
+        self.block_size = block_size
+        self.mode = mode
+        self.encrypting = encrypting
+        self.iv = iv
+        self._prev = int.from_bytes(iv, "big") if iv is not None else 0
+        self._buffer = bytearray()
+        self._finalized = False
+
+    def _process(self, data) -> bytes:
+        """Xử lý data (bội số block_size), giữ trạng thái chaining."""
+        bs = self.block_size
+        if self.mode == "ECB":
+            fn = self.encrypt_word if self.encrypting else self.decrypt_word
+            return bytes(ecb_words(data, fn, bs))
+        if self.encrypting:
+            out, self._prev = cbc_encrypt_words(data, self.encrypt_word, bs, self._prev)
+        else:
+            out, self._prev = cbc_decrypt_words(data, self.decrypt_word, bs, self._prev)
+        return bytes(out)
+
+    def update(self, chunk) -> bytes:
+        """Nhận thêm dữ liệu, trả về phần output đã xử lý được."""
+        if self._finalized:
+            raise ValueError("Stream already finalized")
+        self._buffer += chunk
+        bs = self.block_size
+        ready = len(self._buffer) - len(self._buffer) % bs
+        if not self.encrypting and ready == len(self._buffer):
+            # Giữ lại block cuối để unpad ở finalize()
+            ready -= bs
+        if ready <= 0:
+            return b""
+        data = self._buffer[:ready]
+        del self._buffer[:ready]
+        return self._process(data)
+
+    def finalize(self) -> bytes:
+        """Kết thúc stream: thêm padding (encrypt) hoặc kiểm tra + bỏ padding."""
+        if self._finalized:
+            raise ValueError("Stream already finalized")
+        self._finalized = True
+        data = bytes(self._buffer)
+        self._buffer.clear()
+
+        if self.encrypting:
+            return self._process(pkcs7_pad(data, self.block_size))
+        if len(data) != self.block_size:
+            raise ValueError("Ciphertext length not multiple of block size")
+        return pkcs7_unpad(self._process(data), self.block_size)
@@ -12,6 +12,8 @@ Caesar Cipher Breaker (Optimized Version)
 
 import string
 
+from .metrics import SCORE_EVALUATIONS, timed
+
 # Tần suất chữ cái tiếng Anh chuẩn (%) - converted to decimal
 ENGLISH_FREQ = {
     "A": 0.0817,
@@ -119,21 +121,23 @@ def break_caesar(ciphertext: str):
     if ciphertext is None:
         ciphertext = ""
 
-    for k in range(26):
-        plain = decrypt_caesar_with_key(ciphertext, k)
-        score = chi_square_score(plain)
+    with timed("caesar", "brute_force"):
+        for k in range(26):
+            plain = decrypt_caesar_with_key(ciphertext, k)
+            score = chi_square_score(plain)
 
-        # Cập nhật best trước khi log
-        if score < best_score:
-            best_score = score
-            best_key = k
-            best_plain = plain
-            status = "✓ BEST"
-        else:
-            status = ""
+            # Cập nhật best trước khi log
+            if score < best_score:
+                best_score = score
+                best_key = k
+                best_plain = plain
+                status = "✓ BEST"
+            else:
+                status = ""
 
-        # Log mỗi khóa được thử
-        print(f"Khóa {k:2d}: Chi-square = {score:8.2f} {status}")
+            # Log mỗi khóa được thử
+            print(f"Khóa {k:2d}: Chi-square = {score:8.2f} {status}")
+    SCORE_EVALUATIONS.inc(26, solver="caesar")
 
     print("-" * 60)
     print(f"KẾT QUẢ TỐT NHẤT:")
@@ -186,4 +190,7 @@ def _run_cli():
 
 
 if __name__ == "__main__":
-    _run_cli()
+    from .profiling import profile_from_env
+
+    with profile_from_env("caesar"):
+        _run_cli()
@@ -0,0 +1,227 @@
+# crypto/chatbot_client.py
+"""
+Gemini client cho /api/chatbot
+------------------------------
+- Connection pool: 1 requests.Session dùng chung (keep-alive), không mở
+  kết nối mới cho mỗi lần gọi.
+- Cache câu trả lời theo câu hỏi đã chuẩn hóa (lowercase, gộp khoảng
+  trắng, bỏ dấu câu cuối) với TTL -> câu hỏi lặp lại không tốn API call.
+- Circuit breaker theo model: model trả 429 / 404 bị bỏ qua trong một
+  khoảng cooldown thay vì bị gọi lại ở mỗi request.
+- Không sleep trên worker thread: lỗi / timeout -> chuyển sang model kế tiếp.
+- Transport pluggable (mặc định RequestsTransport) và base_url cấu hình
+  được (GEMINI_BASE_URL) để test với stub server local.
+
+    client = GeminiClient(api_key)
+    text, error = client.ask("AES là gì?", system_prompt)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+DEFAULT_MODELS = ("gemini-flash-latest", "gemini-2.5-flash", "gemini-2.0-flash-exp")
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) giây
+CACHE_TTL = 3600  # giây
+CACHE_MAX_ENTRIES = 512
+# status -> thời gian (giây) bỏ qua model sau khi gặp lỗi đó
+BREAKER_COOLDOWN = {429: 60, 404: 3600}
+
+GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "maxOutputTokens": 2048,
+    "topP": 0.9,
+    "topK": 40,
+}
+
+
+class TransportError(Exception):
+    """Lỗi mạng / timeout từ transport (không có HTTP status)."""
+
+
+class RequestsTransport:
+    """Transport mặc định: requests.Session với connection pool."""
+
+    def __init__(self, pool_maxsize: int = 10):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._requests = requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post(self, url: str, payload: dict, headers: dict, timeout):
+        """Trả về (status_code, body JSON hoặc None)."""
+        try:
+            response = self.session.post(
+                url, json=payload, headers=headers, timeout=timeout
+            )
+        except self._requests.exceptions.Timeout:
+            raise TransportError("Timeout")
+        except self._requests.exceptions.RequestException as e:
+            raise TransportError(str(e))
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+
+def normalize_question(question: str) -> str:
+    """Key cache: lowercase, gộp khoảng trắng, bỏ dấu câu ở cuối."""
+    return " ".join(question.lower().split()).rstrip(" ?!.")
+
+
+class TTLCache:
+    """Cache LRU có TTL, thread-safe."""
+
+    def __init__(
+        self,
+        ttl: float = CACHE_TTL,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        clock=time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < self.clock():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (self.clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class CircuitBreaker:
+    """Đánh dấu model 'open' (bị bỏ qua) đến một thời điểm."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._open_until = {}
+        self._lock = threading.Lock()
+
+    def trip(self, model: str, seconds: float):
+        with self._lock:
+            self._open_until[model] = self.clock() + seconds
+
+    def is_open(self, model: str) -> bool:
+        with self._lock:
+            until = self._open_until.get(model)
+            if until is None:
+                return False
+            if until <= self.clock():
+                del self._open_until[model]
+                return False
+            return True
+
+
+def _extract_text(body):
+    if not isinstance(body, dict):
+        return None
+    candidates = body.get("candidates") or []
+    if not candidates:
+        return None
+    content = candidates[0].get("content") or {}
+    parts = content.get("parts") or []
+    if not parts:
+        return None
+    return parts[0].get("text", "")
+
+
+class GeminiClient:
+    """
+    Failover qua danh sách model; mỗi model được thử tối đa 1 lần / câu hỏi.
+    ask() trả về (text, None) khi thành công, (None, last_error) khi mọi
+    model đều lỗi / đang bị circuit breaker chặn.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = None,
+        models=DEFAULT_MODELS,
+        transport=None,
+        cache_ttl: float = CACHE_TTL,
+        timeout=DEFAULT_TIMEOUT,
+        clock=time.monotonic,
+    ):
+        self.api_key = api_key
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.models = tuple(models)
+        self.transport = transport or RequestsTransport()
+        self.timeout = timeout
+        self.cache = TTLCache(cache_ttl, clock=clock)
+        self.breaker = CircuitBreaker(clock=clock)
+
+    def _url(self, model: str) -> str:
+        return f"{self.base_url}/models/{model}:generateContent"
+
+    def ask(self, question: str, system_prompt: str = ""):
+        key = normalize_question(question)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, None
+
+        prompt = f"{system_prompt}\n\nUser: {question}" if system_prompt else question
+        payload = {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": GENERATION_CONFIG,
+        }
+        # API key trong header (không nằm trong URL / log)
+        headers = {"Content-Type": "application/json", "x-goog-api-key": self.api_key}
+
+        last_error = None
+        for model in self.models:
+            if self.breaker.is_open(model):
+                last_error = f"Circuit open: {model}"
+                continue
+            try:
+                status, body = self.transport.post(
+                    self._url(model), payload, headers, self.timeout
+                )
+            except TransportError as e:
+                last_error = f"{e}: {model}"
+                continue
+
+            if status in BREAKER_COOLDOWN:
+                self.breaker.trip(model, BREAKER_COOLDOWN[status])
+                last_error = (
+                    f"Rate limit: {model}"
+                    if status == 429
+                    else f"Model not available: {model}"
+                )
+                continue
+            if status >= 400:
+                last_error = f"HTTP {status}: {model}"
+                continue
+
+            text = _extract_text(body)
+            if text is None:
+                last_error = "No valid response"
+                continue
+            self.cache.set(key, text)
+            return text, None
+
+        return None, last_error
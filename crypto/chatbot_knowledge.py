@@ -3,8 +3,16 @@
 Knowledge base cho chatbot (offline) với nội dung tiếng Việt đầy đủ dấu.
 Chỉ mô tả các mode được hỗ trợ trong code: ECB, CBC.
 Version: 2.0 - Cải thiện với nhiều thông tin chi tiết và ví dụ thực tế
+
+FAQ key và KEYWORDS được tokenize + đưa vào automaton Aho-Corasick 1 lần
+khi import; mỗi câu hỏi chỉ cần 1 lượt duyệt token (xem find_best_match).
 """
 
+import math
+import re
+import unicodedata
+from collections import deque
+
 KNOWLEDGE_BASE = {
     "caesar": {
         "description": "Caesar Cipher là mã hóa thay thế đơn giản, dịch chuyển mỗi chữ cái trong bảng chữ cái theo một khóa k (0-25). Đây là một trong những phương pháp mã hóa cổ điển nhất.",
@@ -257,30 +265,143 @@ KEYWORDS = {
 }
 
 
-def find_best_match(query: str):
-    """Tìm câu trả lời phù hợp nhất từ knowledge base."""
-    q = query.lower().strip()
-
-    # Exact match trong FAQ
-    for k, v in FAQ.items():
-        if k.lower() == q or k in q:
-            return v
-
-    # Partial match trong FAQ keys
-    for k, v in FAQ.items():
-        if k in q or q in k:
-            return v
-
-    # Keyword matching với scoring
-    best_topic = None
-    best_score = 0
+# ====================
+# Index từ khóa (build 1 lần khi import)
+# ====================
+# Chữ và số là token riêng: "aes256" -> aes 256, "rot13" -> rot 13,
+# "128-bit" -> 128 bit (query và keyword tách giống nhau)
+_TOKEN_RE = re.compile(r"[^\W\d_]+|\d+")
+
+
+def tokenize(text: str):
+    """Lowercase + NFC (dấu tiếng Việt dựng sẵn), tách token chữ / số."""
+    return tuple(_TOKEN_RE.findall(unicodedata.normalize("NFC", text).lower()))
+
+
+class TokenAutomaton:
+    """
+    Aho-Corasick trên chuỗi token: tìm mọi pattern (tuple token) xuất hiện
+    liên tiếp trong query bằng 1 lượt duyệt, chỉ khớp đúng ranh giới token
+    ("ic" không còn khớp bên trong "cipher").
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+    def add(self, tokens, value):
+        state = 0
+        for tok in tokens:
+            nxt = self._goto[state].get(tok)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][tok] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(value)
+
+    def build(self):
+        """Tính fail link (BFS) và gộp output theo fail link."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for tok, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and tok not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(tok, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        return self
+
+    def matches(self, tokens):
+        """Sinh (vị trí token cuối, value) của mọi pattern khớp trong tokens."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for end, tok in enumerate(tokens):
+            while state and tok not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(tok, 0)
+            for value in out[state]:
+                yield end, value
+
+
+def _idf(df: int, n: int) -> float:
+    return math.log(1 + n / df)
+
+
+def _build_index():
+    """
+    - FAQ key: value mang số token của key -> key dài / cụ thể hơn thắng
+      key con ("caesar là gì" > "caesar"); cùng độ dài thì key xuất hiện
+      trước trong query thắng ("DES-CBC" -> des).
+    - Keyword: trọng số IDF theo số topic chứa keyword; điểm topic = Σ tf·idf.
+    - Dict mọi dãy token con liên tiếp của FAQ key -> key đầu tiên chứa nó
+      (thay cho phép thử "query in key"), và FAQ key đã nối token cho
+      fallback chuỗi con khi không có token nào khớp.
+    """
+    automaton = TokenAutomaton()
+    faq_tokens = {k: tokenize(k) for k in FAQ}
+    for order, (key, toks) in enumerate(faq_tokens.items()):
+        automaton.add(toks, ("faq", key, len(toks), order))
+
+    kw_topics = {}
     for topic, kws in KEYWORDS.items():
-        score = sum(1 for kw in kws if kw.lower() in q)
-        if score > best_score:
-            best_score = score
-            best_topic = topic
+        for kw in kws:
+            kw_topics.setdefault(tokenize(kw), set()).add(topic)
+    topic_order = {t: i for i, t in enumerate(KEYWORDS)}
+    for toks, topics in kw_topics.items():
+        weight = _idf(len(topics), len(KEYWORDS))
+        for topic in topics:
+            automaton.add(toks, ("kw", topic, weight, topic_order[topic]))
+
+    subsequences = {}
+    for key, toks in faq_tokens.items():
+        for i in range(len(toks)):
+            for j in range(i + 1, len(toks) + 1):
+                subsequences.setdefault(toks[i:j], key)
+
+    joined = [(" ".join(toks), key) for key, toks in faq_tokens.items()]
+    return automaton.build(), subsequences, joined
 
-    if best_topic and best_score > 0:
+
+_AUTOMATON, _FAQ_SUBSEQUENCES, _FAQ_JOINED = _build_index()
+
+
+def find_best_match(query: str):
+    """Tìm câu trả lời phù hợp nhất từ knowledge base (1 lượt qua index)."""
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+
+    best_faq = None  # (số token, -vị trí bắt đầu, -order, key)
+    topic_scores = {}
+    for end, (kind, target, weight, order) in _AUTOMATON.matches(tokens):
+        if kind == "faq":
+            cand = (weight, weight - 1 - end, -order, target)
+            if best_faq is None or cand > best_faq:
+                best_faq = cand
+        else:
+            score, _ = topic_scores.get(target, (0.0, order))
+            topic_scores[target] = (score + weight, order)
+
+    # FAQ key xuất hiện trọn vẹn trong query
+    if best_faq:
+        return FAQ[best_faq[-1]]
+
+    # Query là một phần của FAQ key
+    key = _FAQ_SUBSEQUENCES.get(tokens)
+    if key:
+        return FAQ[key]
+
+    # Keyword matching với scoring tf-idf (hòa -> topic khai báo trước)
+    if topic_scores:
+        best_topic = max(
+            topic_scores, key=lambda t: (topic_scores[t][0], -topic_scores[t][1])
+        )
         kb = KNOWLEDGE_BASE.get(best_topic, {})
         if "description" in kb:
             # Trả về description chi tiết
@@ -291,6 +412,13 @@ def find_best_match(query: str):
                 result += "\n\n" + kb["breaking"]
             return result
 
+    # Fallback: query là chuỗi con của FAQ key ("best practice" -> "best
+    # practices"); chỉ chạy khi index không khớp gì
+    text = " ".join(tokens)
+    for joined, key in _FAQ_JOINED:
+        if text in joined:
+            return FAQ[key]
+
     return None
 
 
@@ -302,10 +430,12 @@ def get_response(user_message: str) -> str:
     msg = user_message.strip()
     if not msg:
         return "Vui lòng nhập nội dung câu hỏi."
+    msg_lower = msg.lower()
+    word_count = len(msg.split())
 
     # Chào hỏi
     greetings = ["hello", "hi", "chào", "xin chào", "hey", "helo", "hii"]
-    if any(g in msg.lower() for g in greetings) and len(msg.split()) <= 3:
+    if any(g in msg_lower for g in greetings) and word_count <= 3:
         return """Xin chào! 👋
 
 Tôi là **Crypto Assistant** - trợ lý mã hóa của bạn!
@@ -327,7 +457,7 @@ Hãy hỏi tôi bất cứ điều gì về mã hóa! 🚀"""
 
     # Câu hỏi về trợ giúp
     help_keywords = ["help", "giúp", "hỗ trợ", "hướng dẫn", "làm gì", "có thể", "biết"]
-    if any(h in msg.lower() for h in help_keywords) and len(msg.split()) <= 5:
+    if any(h in msg_lower for h in help_keywords) and word_count <= 5:
         return """📖 **Hướng dẫn sử dụng Chatbot**
 
 Tôi có thể trả lời các câu hỏi về:
@@ -373,8 +503,7 @@ Hãy thử hỏi tôi! 😊"""
         return answer
 
     # Câu hỏi so sánh (A vs B)
-    if " vs " in msg.lower() or " và " in msg.lower():
-        msg_lower = msg.lower()
+    if " vs " in msg_lower or " và " in msg_lower:
         comparisons = {
             ("aes", "des"): KNOWLEDGE_BASE["aes"]["comparison"],
             ("des", "aes"): KNOWLEDGE_BASE["aes"]["comparison"],
@@ -386,26 +515,26 @@ Hãy thử hỏi tôi! 😊"""
                 return result
 
     # Câu hỏi về ví dụ
-    if "ví dụ" in msg.lower() or "example" in msg.lower():
+    if "ví dụ" in msg_lower or "example" in msg_lower:
         for cipher in ["caesar", "substitution", "vigenere", "des", "aes"]:
-            if cipher in msg.lower():
+            if cipher in msg_lower:
                 kb = KNOWLEDGE_BASE.get(cipher, {})
                 if "example" in kb:
                     return f"**Ví dụ {cipher.upper()}:**\n\n{kb['example']}"
 
     # Câu hỏi về độ an toàn
     if any(
-        w in msg.lower() for w in ["an toàn", "bảo mật", "secure", "safe", "security"]
+        w in msg_lower for w in ["an toàn", "bảo mật", "secure", "safe", "security"]
     ):
         for cipher in ["caesar", "substitution", "vigenere", "des", "aes"]:
-            if cipher in msg.lower():
+            if cipher in msg_lower:
                 kb = KNOWLEDGE_BASE.get(cipher, {})
                 if "security" in kb:
                     return f"**Độ bảo mật của {cipher.upper()}:**\n\n{kb['security']}"
 
     # Câu hỏi về lỗi
     error_keywords = ["lỗi", "error", "không hoạt động", "không chạy", "bị lỗi"]
-    if any(e in msg.lower() for e in error_keywords):
+    if any(e in msg_lower for e in error_keywords):
         return """**Xử lý lỗi thường gặp:**
 
 🔴 **Lỗi Key không hợp lệ:**
@@ -0,0 +1,217 @@
+# crypto/des_bitslice.py
+"""
+DES bitsliced bằng NumPy (tùy chọn)
+-----------------------------------
+Mỗi bit của state DES là 1 "bit-plane": mảng uint64 (W,), bit thứ i của
+plane là bit đó của lane i (lane = 1 block hoặc 1 key) -> 64*W lane chạy
+song song bằng phép bitwise.
+
+- IP / FP / E / P / PC1 / PC2 / quay key: chỉ là đánh chỉ số lại các plane.
+- S-box: mạch boolean dạng tổng các minterm, sinh từ bảng S_BOXES
+  (decoder 3+3 bit -> 64 minterm, OR các minterm có bit output = 1),
+  chạy cho cả 8 S-box trong vài phép NumPy.
+
+Hai layout:
+- nhiều block, 1 key  : encrypt_blocks / decrypt_blocks / crypt_blocks
+                        (ECB bulk, 3DES)
+- 1 block, nhiều key  : encrypt_many_keys / search_keys (thử key)
+
+    from crypto.des_bitslice import encrypt_blocks, search_keys
+    ct = encrypt_blocks(padded_plaintext, subkeys)
+    hits = search_keys(pt_block, ct_block, candidate_keys)
+"""
+
+try:
+    import numpy as np
+except ImportError:  # NumPy không bắt buộc, des_modes fallback về des_core
+    np = None
+
+from .des_core import E, FP, IP, P, PC1, PC2, S_BOXES, SHIFTS
+
+HAVE_NUMPY = np is not None
+BITSLICE_MIN_BLOCKS = 16  # dưới ngưỡng này des_core từng block nhanh hơn
+BATCH_LANES = 64 * 256  # số lane mỗi lần chạy (giới hạn bộ nhớ trung gian)
+
+
+def _key_bit_indices():
+    """KS[r][j] = vị trí bit (0-based, MSB trước) trong key 64-bit của bit j subkey r."""
+    key56 = [pos - 1 for pos in PC1]
+    c, d = key56[:28], key56[28:]
+    rounds = []
+    for shift in SHIFTS:
+        c = c[shift:] + c[:shift]
+        d = d[shift:] + d[:shift]
+        cd = c + d
+        rounds.append([cd[pos - 1] for pos in PC2])
+    return rounds
+
+
+KEY_BIT_INDICES = _key_bit_indices()
+
+if HAVE_NUMPY:
+    _ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+    _IP = np.array(IP) - 1
+    _FP = np.array(FP) - 1
+    _E = np.array(E) - 1
+    _P = np.array(P) - 1
+    _KS = [np.array(r) for r in KEY_BIT_INDICES]
+    # _SBOX_MASK[s, v, j] = ~0 nếu bit j (MSB trước) của S_s(v) = 1, v = 6 bit input
+    _SBOX_MASK = np.zeros((8, 64, 4), dtype=np.uint64)
+    for _s, _box in enumerate(S_BOXES):
+        for _v in range(64):
+            _val = _box[((_v >> 4) & 2) | (_v & 1)][(_v >> 1) & 0xF]
+            for _j in range(4):
+                if (_val >> (3 - _j)) & 1:
+                    _SBOX_MASK[_s, _v, _j] = _ONES
+
+
+def _require_numpy():
+    if not HAVE_NUMPY:
+        raise ValueError("NumPy chưa được cài (pip install numpy)")
+
+
+# ========== Chuyển đổi bytes <-> bit-plane ==========
+def _to_planes(data: bytes, lanes: int):
+    """data: n*8 bytes (n <= lanes) -> planes uint64 (64, lanes // 64)."""
+    rows = np.frombuffer(data, dtype=np.uint8).reshape(-1, 8)
+    bits = np.zeros((lanes, 64), dtype=np.uint8)
+    bits[: len(rows)] = np.unpackbits(rows, axis=1)
+    packed = np.packbits(bits.T, axis=1, bitorder="little")
+    return np.ascontiguousarray(packed).view("<u8")
+
+
+def _from_planes(planes, count: int) -> bytes:
+    bits = np.unpackbits(planes.view(np.uint8), axis=1, bitorder="little")
+    return np.packbits(bits.T[:count], axis=1).tobytes()
+
+
+def _const_planes(value: int, nbits: int):
+    """Số nbits bit (MSB trước) -> planes (nbits, 1) toàn 0 / toàn 1."""
+    return np.array(
+        [_ONES if (value >> (nbits - 1 - i)) & 1 else 0 for i in range(nbits)],
+        dtype=np.uint64,
+    ).reshape(nbits, 1)
+
+
+# ========== Lõi DES trên bit-plane ==========
+def _sboxes(x):
+    """x: (48, W) -> (32, W), 8 S-box song song."""
+    bits = x.reshape(8, 6, -1)
+    lits = np.stack((~bits, bits))  # (2, 8, 6, W): literal âm / dương
+
+    def decode(a, b, c):  # minterm 3 bit -> (8 S-box, 8, W)
+        m = lits[:, None, None, :, a] & lits[None, :, None, :, b]
+        m = m & lits[None, None, :, :, c]
+        return m.reshape(8, 8, -1).transpose(1, 0, 2)
+
+    hi, lo = decode(0, 1, 2), decode(3, 4, 5)
+    minterms = (hi[:, :, None, :] & lo[:, None, :, :]).reshape(8, 64, 1, -1)
+    out = np.bitwise_or.reduce(minterms & _SBOX_MASK[..., None], axis=1)
+    return out.reshape(32, -1)
+
+
+def _des_planes(block_planes, round_keys):
+    """block_planes: (64, W|1); round_keys: 16 mảng (48, W|1) theo thứ tự dùng."""
+    state = block_planes[_IP]
+    left, right = state[:32], state[32:]
+    for k in round_keys:
+        f = _sboxes(right[_E] ^ k)[_P]
+        left, right = right, left ^ f
+    return np.concatenate((right, left))[_FP]
+
+
+# ========== Layout 1: nhiều block, 1 key ==========
+def _ecb(data: bytes, stages) -> bytes:
+    """stages: list lượt DES, mỗi lượt 16 mảng round key (48, 1)."""
+    if len(data) % 8 != 0:
+        raise ValueError("Data length not multiple of block size")
+    out = []
+    step = BATCH_LANES * 8
+    for i in range(0, len(data), step):
+        chunk = data[i : i + step]
+        count = len(chunk) // 8
+        planes = _to_planes(chunk, -(-count // 64) * 64)
+        for round_keys in stages:
+            planes = _des_planes(planes, round_keys)
+        out.append(_from_planes(planes, count))
+    return b"".join(out)
+
+
+def crypt_blocks(data: bytes, schedules) -> bytes:
+    """
+    Nhiều lượt DES liên tiếp trên mọi block (vd 3DES: (K1, K2[::-1], K3));
+    data giữ dạng bit-plane giữa các lượt.
+    """
+    _require_numpy()
+    return _ecb(
+        data, [[_const_planes(k, 48) for k in subkeys] for subkeys in schedules]
+    )
+
+
+def encrypt_blocks(data: bytes, subkeys) -> bytes:
+    """ECB trên data đã pad (bội số 8 byte), subkeys từ des_key_schedule."""
+    return crypt_blocks(data, [subkeys])
+
+
+def decrypt_blocks(data: bytes, subkeys) -> bytes:
+    """Giải mã ECB từng block (chưa bỏ padding)."""
+    return crypt_blocks(data, [subkeys[::-1]])
+
+
+def cbc_decrypt_blocks(data: bytes, schedules, iv: bytes) -> bytes:
+    """
+    CBC decrypt: P_i = D(C_i) XOR C_{i-1} (C_0 = iv), chưa bỏ padding.
+    schedules: các lượt của phép giải mã (DES: (subkeys[::-1],)).
+    """
+    plain = np.frombuffer(crypt_blocks(data, schedules), dtype=np.uint8)
+    prev = np.frombuffer(iv + data[:-8], dtype=np.uint8)
+    return (plain ^ prev).tobytes()
+
+
+# ========== Layout 2: 1 block, nhiều key ==========
+def _keys_bytes(keys) -> bytes:
+    data = keys if isinstance(keys, (bytes, bytearray, memoryview)) else b"".join(keys)
+    if len(data) % 8 != 0:
+        raise ValueError("DES key must be 8 bytes")
+    return bytes(data)
+
+
+def _many_keys(block8: bytes, keys: bytes, decrypt: bool):
+    """Sinh (offset, số key, planes output) cho từng batch key."""
+    if len(block8) != 8:
+        raise ValueError("DES block must be 8 bytes")
+    block = _const_planes(int.from_bytes(block8, "big"), 64)
+    order = _KS[::-1] if decrypt else _KS
+    step = BATCH_LANES * 8
+    for i in range(0, len(keys), step):
+        chunk = keys[i : i + step]
+        count = len(chunk) // 8
+        key_planes = _to_planes(chunk, -(-count // 64) * 64)
+        yield i // 8, count, _des_planes(block, [key_planes[ks] for ks in order])
+
+
+def encrypt_many_keys(block8: bytes, keys, decrypt: bool = False):
+    """Mã hóa (decrypt=True: giải mã) 1 block với từng key -> list 8 bytes."""
+    _require_numpy()
+    out = []
+    for _, count, planes in _many_keys(block8, _keys_bytes(keys), decrypt):
+        data = _from_planes(planes, count)
+        out.extend(data[j : j + 8] for j in range(0, len(data), 8))
+    return out
+
+
+def search_keys(plaintext8: bytes, ciphertext8: bytes, keys):
+    """
+    Chỉ số các key k (theo thứ tự trong keys) mà DES_k(plaintext8) == ciphertext8.
+    So sánh trực tiếp trên bit-plane, không chuyển output về bytes.
+    """
+    _require_numpy()
+    if len(ciphertext8) != 8:
+        raise ValueError("DES block must be 8 bytes")
+    target = _const_planes(int.from_bytes(ciphertext8, "big"), 64)
+    hits = []
+    for offset, count, planes in _many_keys(plaintext8, _keys_bytes(keys), False):
+        mismatch = np.bitwise_or.reduce(planes ^ target, axis=0)
+        match = np.unpackbits((~mismatch).view(np.uint8), bitorder="little")[:count]
+        hits.extend(offset + int(j) for j in np.flatnonzero(match))
+    return hits
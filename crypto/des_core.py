@@ -5,6 +5,8 @@ DES core implementation (1 block = 8 bytes)
 - des_key_schedule(key_8bytes) -> list of 16 subkeys (48-bit int)
 - des_encrypt_block(block8, subkeys) -> 8 bytes
 - des_decrypt_block(block8, subkeys) -> 8 bytes
+- des_pipeline_block(block8, schedules) -> 8 bytes (nhiều lượt DES, vd 3DES)
+- des_pipeline_word(block_int, schedules) -> int 64-bit
 """
 
 # Các bảng DES tiêu chuẩn
@@ -201,19 +203,51 @@ def _feistel(R: int, subkey: int) -> int:
     return perm
 
 
-def des_encrypt_block(block8: bytes, subkeys) -> bytes:
-    """
-    Mã hóa 1 block 8 bytes bằng DES với list 16 subkeys.
-    """
-    block = int.from_bytes(block8, "big")
-
-    # Initial Permutation
+def _initial_permutation(block: int):
+    """IP trên int 64-bit -> (L, R) 32-bit."""
     perm = 0
     for pos in IP:
         perm = (perm << 1) | ((block >> (64 - pos)) & 1)
+    return (perm >> 32) & 0xFFFFFFFF, perm & 0xFFFFFFFF
+
+
+def _final_permutation(L: int, R: int) -> int:
+    """Swap L, R rồi FP -> int 64-bit."""
+    pre_output = (R << 32) | L
+    out = 0
+    for pos in FP:
+        out = (out << 1) | ((pre_output >> (64 - pos)) & 1)
+    return out
+
+
+def des_pipeline_block(block8: bytes, schedules) -> bytes:
+    """
+    Chạy liên tiếp nhiều lượt DES (mỗi phần tử schedules = 16 subkey, đã đảo
+    nếu là lượt giải mã) trên 1 block, ví dụ 3DES EDE: (K1, K2[::-1], K3).
+    FP của lượt trước và IP của lượt sau triệt tiêu nhau, nên chỉ IP 1 lần
+    đầu, FP 1 lần cuối; giữa các lượt chỉ giữ (L, R) dạng int.
+    """
+    return des_pipeline_word(int.from_bytes(block8, "big"), schedules).to_bytes(
+        8, "big"
+    )
+
+
+def des_pipeline_word(block: int, schedules) -> int:
+    """Như des_pipeline_block nhưng vào / ra là int 64-bit (dùng cho chaining)."""
+    L, R = _initial_permutation(block)
+    for subkeys in schedules:
+        for k in subkeys:
+            L, R = R, L ^ _feistel(R, k)
+        # Swap cuối lượt (= FP rồi IP của lượt kế)
+        L, R = R, L
+    return _final_permutation(R, L)
+
 
-    L = (perm >> 32) & 0xFFFFFFFF
-    R = perm & 0xFFFFFFFF
+def des_encrypt_block(block8: bytes, subkeys) -> bytes:
+    """
+    Mã hóa 1 block 8 bytes bằng DES với list 16 subkeys.
+    """
+    L, R = _initial_permutation(int.from_bytes(block8, "big"))
 
     # 16 vòng
     for i in range(16):
@@ -221,15 +255,7 @@ def des_encrypt_block(block8: bytes, subkeys) -> bytes:
         new_R = L ^ _feistel(R, subkeys[i])
         L, R = new_L, new_R
 
-    # Swap L, R
-    pre_output = (R << 32) | L
-
-    # Final Permutation
-    out = 0
-    for pos in FP:
-        out = (out << 1) | ((pre_output >> (64 - pos)) & 1)
-
-    return out.to_bytes(8, "big")
+    return _final_permutation(L, R).to_bytes(8, "big")
 
 
 def des_decrypt_block(block8: bytes, subkeys) -> bytes:
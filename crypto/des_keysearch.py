@@ -0,0 +1,561 @@
+# crypto/des_keysearch.py
+"""
+Tìm key DES từ cặp plaintext / ciphertext đã biết (keyspace rút gọn)
+-------------------------------------------------------------------
+Dùng cho bài tập / audit: key không hoàn toàn ngẫu nhiên nên keyspace nhỏ.
+
+Keyspace:
+- MaskKeyspace   : key đã biết một phần + mask hex (bit 1 = chưa biết).
+                   Bit parity (bit thấp mỗi byte) bị DES bỏ qua (PC1) nên
+                   không cần thử -> số key thực sự = 2^(bit chưa biết không
+                   phải parity).
+- CharsetKeyspace: key 8 ký tự ASCII (key_format="plaintext" ở Task 4) lấy
+                   từ charset, có thể biết trước prefix. Ký tự chỉ khác bit
+                   thấp cho cùng key schedule -> charset được gộp theo lớp
+                   tương đương, key tìm được là 1 đại diện.
+
+Keyspace được chia thành chunk, chạy trên process pool (spawn, an toàn khi
+gọi từ thread của web server), dừng sớm khi tìm thấy key (trừ find_all),
+báo tiến độ qua callback. Mỗi chunk thử key bằng des_bitslice.search_keys
+nếu có NumPy, ngược lại dùng des_key_schedule + des_encrypt_block.
+
+Job chạy nền (app.py) ghi trạng thái vào JOB_DIR (env KEYSEARCH_JOB_DIR):
+mọi worker gunicorn trên cùng máy / volume đều poll và hủy được job.
+
+Usage:
+    python -m crypto.des_keysearch --plaintext "HELLO123" --ciphertext-hex 8a1b... \\
+        --key-hex 133457799BBC0000 --mask-hex 000000000000FFFF
+    python -m crypto.des_keysearch --plaintext "HELLO123" --ciphertext-hex 8a1b... \\
+        --charset lower --prefix "sec"
+"""
+
+import contextlib
+import json
+import multiprocessing
+import os
+import re
+import string
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from . import des_bitslice
+from .des_core import des_encrypt_block, des_key_schedule
+
+BLOCK_SIZE = 8
+CHUNK_SIZE = 1 << 16  # số key mỗi task gửi cho worker
+PARITY_MASK = 0x0101010101010101  # bit thấp mỗi byte (DES bỏ qua)
+MAX_JOBS = 32  # số file trạng thái job giữ lại trong JOB_DIR
+MAX_ACTIVE_JOBS = 1  # tính trên mọi worker (mỗi job đã dùng hết CPU)
+
+CHARSETS = {
+    "printable": "".join(chr(c) for c in range(0x20, 0x7F)),
+    "alnum": string.ascii_letters + string.digits,
+    "lower": string.ascii_lowercase,
+    "upper": string.ascii_uppercase,
+    "digits": string.digits,
+    "hex": "0123456789abcdef",
+}
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# ========== Keyspace ==========
+class MaskKeyspace:
+    """Key = known với các bit trong mask được thay bằng bit của index."""
+
+    def __init__(self, known: bytes, mask: bytes):
+        if len(known) != BLOCK_SIZE or len(mask) != BLOCK_SIZE:
+            raise ValueError("Key và mask phải là 8 bytes (16 ký tự hex)")
+        mask_int = int.from_bytes(mask, "big") & ~PARITY_MASK
+        self.known = int.from_bytes(known, "big") & ~mask_int
+        # vị trí bit (0 = LSB) chưa biết, bit thấp của index -> bit thấp của key
+        self.positions = [b for b in range(64) if (mask_int >> b) & 1]
+        self.size = 1 << len(self.positions)
+
+    def describe(self) -> str:
+        return f"mask: {len(self.positions)} bit chưa biết (bỏ qua bit parity)"
+
+    def key_at(self, index: int) -> bytes:
+        key = self.known
+        for j, pos in enumerate(self.positions):
+            key |= ((index >> j) & 1) << pos
+        return key.to_bytes(BLOCK_SIZE, "big")
+
+    def keys_range(self, start: int, stop: int) -> bytes:
+        if np is None:
+            return b"".join(self.key_at(i) for i in range(start, stop))
+        index = np.arange(start, stop, dtype=np.uint64)
+        keys = np.full(stop - start, self.known, dtype=np.uint64)
+        for j, pos in enumerate(self.positions):
+            keys |= ((index >> np.uint64(j)) & np.uint64(1)) << np.uint64(pos)
+        return keys.astype(">u8").tobytes()
+
+
+class CharsetKeyspace:
+    """Key 8 ký tự = prefix + (8 - len(prefix)) ký tự từ charset."""
+
+    def __init__(self, charset: str, prefix: str = ""):
+        charset = CHARSETS.get(charset, charset)
+        if not charset or any(ord(c) > 0x7F for c in charset):
+            raise ValueError("Charset phải gồm ký tự ASCII")
+        prefix_bytes = prefix.encode("ascii", errors="strict")
+        if len(prefix_bytes) > BLOCK_SIZE:
+            raise ValueError("Prefix dài quá 8 ký tự")
+        # 1 đại diện cho mỗi lớp ký tự chỉ khác bit parity
+        reps = {}
+        for c in charset:
+            reps.setdefault(ord(c) & 0xFE, ord(c))
+        self.symbols = bytes(sorted(reps.values()))
+        self.prefix = prefix_bytes
+        self.free = BLOCK_SIZE - len(prefix_bytes)
+        self.size = len(self.symbols) ** self.free
+
+    def describe(self) -> str:
+        return (
+            f"charset: {len(self.symbols)} lớp ký tự ^ {self.free} vị trí"
+            f" (prefix {self.prefix.decode('ascii')!r})"
+        )
+
+    def key_at(self, index: int) -> bytes:
+        base = len(self.symbols)
+        tail = bytearray(self.free)
+        for pos in range(self.free - 1, -1, -1):
+            index, digit = divmod(index, base)
+            tail[pos] = self.symbols[digit]
+        return self.prefix + bytes(tail)
+
+    def keys_range(self, start: int, stop: int) -> bytes:
+        if np is None:
+            return b"".join(self.key_at(i) for i in range(start, stop))
+        base = len(self.symbols)
+        symbols = np.frombuffer(self.symbols, dtype=np.uint8)
+        keys = np.empty((stop - start, BLOCK_SIZE), dtype=np.uint8)
+        keys[:, : len(self.prefix)] = np.frombuffer(self.prefix, dtype=np.uint8)
+        index = np.arange(start, stop, dtype=np.uint64)
+        for pos in range(BLOCK_SIZE - 1, len(self.prefix) - 1, -1):
+            keys[:, pos] = symbols[index % np.uint64(base)]
+            index //= np.uint64(base)
+        return keys.tobytes()
+
+
+def make_pairs(plaintext: bytes, ciphertext: bytes, iv: bytes = None):
+    """
+    Cặp block (P, C) với C = DES_k(P). CBC: P_i' = P_i XOR C_{i-1} (C_0 = iv).
+    Block đầu dùng để tìm, các block sau để xác nhận key.
+    """
+    count = min(len(plaintext), len(ciphertext)) // BLOCK_SIZE
+    if count == 0:
+        raise ValueError("Cần ít nhất 1 block (8 bytes) plaintext và ciphertext")
+    if iv is not None and len(iv) != BLOCK_SIZE:
+        raise ValueError("IV phải là 8 bytes")
+    pairs = []
+    prev = iv
+    for i in range(0, count * BLOCK_SIZE, BLOCK_SIZE):
+        p, c = plaintext[i : i + BLOCK_SIZE], ciphertext[i : i + BLOCK_SIZE]
+        if prev is not None:
+            p = bytes(a ^ b for a, b in zip(p, prev))
+            prev = c
+        pairs.append((p, c))
+    return pairs
+
+
+def _verify(key: bytes, pairs) -> bool:
+    subkeys = des_key_schedule(key)
+    return all(des_encrypt_block(p, subkeys) == c for p, c in pairs)
+
+
+# ========== Worker ==========
+_STOP = None  # multiprocessing.Event dùng chung trong worker
+
+
+def _init_worker(stop_event):
+    global _STOP
+    _STOP = stop_event
+
+
+def _search_chunk(keyspace, start: int, stop: int, pairs):
+    """Thử key [start, stop). Trả về (số key đã thử, list key khớp mọi cặp)."""
+    if _STOP is not None and _STOP.is_set():
+        return 0, []
+    keys = keyspace.keys_range(start, stop)
+    (p0, c0), rest = pairs[0], pairs[1:]
+    if des_bitslice.HAVE_NUMPY:
+        idx = des_bitslice.search_keys(p0, c0, keys)
+        hits = [keys[8 * i : 8 * i + 8] for i in idx]
+    else:
+        hits = []
+        for i in range(0, len(keys), BLOCK_SIZE):
+            key = keys[i : i + BLOCK_SIZE]
+            if des_encrypt_block(p0, des_key_schedule(key)) == c0:
+                hits.append(key)
+    return stop - start, [k for k in hits if _verify(k, rest)]
+
+
+# ========== Search ==========
+def search(
+    pairs,
+    keyspace,
+    workers=None,
+    find_all=False,
+    progress=None,
+    stop_event=None,
+    chunk_size=CHUNK_SIZE,
+):
+    """
+    Duyệt keyspace trên process pool.
+    progress(tested, total, elapsed) được gọi sau mỗi chunk.
+    stop_event (multiprocessing Event): set từ ngoài để hủy.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    stop_event = stop_event or ctx.Event()
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    tested, found = 0, []
+    chunks = (
+        (s, min(s + chunk_size, keyspace.size))
+        for s in range(0, keyspace.size, chunk_size)
+    )
+
+    def collect(count, hits):
+        nonlocal tested
+        tested += count
+        found.extend(hits)
+        if hits and not find_all:
+            stop_event.set()
+        if progress:
+            progress(tested, keyspace.size, time.perf_counter() - t0)
+
+    if workers == 1:
+        _init_worker(stop_event)
+        for start, stop in chunks:
+            if stop_event.is_set():
+                break
+            collect(*_search_chunk(keyspace, start, stop, pairs))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(stop_event,),
+        ) as pool:
+            pending = set()
+            for start, stop in chunks:
+                if stop_event.is_set():
+                    break
+                pending.add(pool.submit(_search_chunk, keyspace, start, stop, pairs))
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        collect(*fut.result())
+            for fut in pending:
+                collect(*fut.result())
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "found": bool(found),
+        "keys": [k.hex().upper() for k in found],
+        "keys_text": [k.decode("ascii", errors="replace") for k in found],
+        "tested": tested,
+        "keyspace": keyspace.size,
+        "complete": tested >= keyspace.size,
+        "cancelled": stop_event.is_set() and not found,
+        "seconds": round(elapsed, 3),
+        "keys_per_sec": round(tested / elapsed) if elapsed else None,
+    }
+
+
+# ========== Job queue (dùng bởi app.py) ==========
+# Trạng thái job nằm trong JOB_DIR (file JSON / job) để mọi worker gunicorn
+# đọc được: job chạy trên thread của worker nhận POST, GET / DELETE có thể
+# rơi vào worker khác. Giới hạn MAX_ACTIVE_JOBS dùng file slot tạo bằng
+# O_EXCL (nguyên tử giữa các process), slot của process đã chết được thu hồi.
+JOB_DIR = os.getenv("KEYSEARCH_JOB_DIR") or os.path.join(
+    tempfile.gettempdir(), "lab06_keysearch"
+)
+PROGRESS_WRITE_INTERVAL = 0.5  # giây giữa 2 lần ghi tiến độ ra file
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def _job_path(job_id: str, suffix: str = ".json") -> str:
+    return os.path.join(JOB_DIR, job_id + suffix)
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":  # os.kill(pid, 0) trên Windows sẽ kill process
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _acquire_slot(job_id: str) -> str:
+    """Giữ 1 trong MAX_ACTIVE_JOBS slot; raise ValueError nếu đã đủ job chạy."""
+    for i in range(MAX_ACTIVE_JOBS):
+        path = os.path.join(JOB_DIR, f"active-{i}.lock")
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    with open(path, encoding="ascii") as f:
+                        pid = int(f.read().split()[0])
+                except (OSError, ValueError, IndexError):
+                    break  # đang được ghi bởi process khác
+                if _pid_alive(pid):
+                    break
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)  # slot của worker đã chết
+                continue
+            with os.fdopen(fd, "w", encoding="ascii") as f:
+                f.write(f"{os.getpid()} {job_id}")
+            return path
+    raise ValueError("Đang có job tìm key khác chạy, thử lại sau")
+
+
+class KeySearchJob:
+    """1 lần search chạy nền trên thread riêng; trạng thái ghi ra JOB_DIR."""
+
+    def __init__(self, pairs, keyspace, workers=None, find_all=False):
+        self.id = uuid.uuid4().hex
+        self.pairs = pairs
+        self.keyspace = keyspace
+        self.workers = workers
+        self.find_all = find_all
+        self.status = "queued"
+        self.tested = 0
+        self.elapsed = 0.0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.slot = None
+        self._stop = multiprocessing.get_context("spawn").Event()
+        self._written = 0.0
+
+    def _progress(self, tested, total, elapsed):
+        self.tested, self.elapsed = tested, elapsed
+        if os.path.exists(_job_path(self.id, ".cancel")):
+            self._stop.set()
+        if time.monotonic() - self._written >= PROGRESS_WRITE_INTERVAL:
+            self.save()
+
+    def save(self):
+        """Ghi trạng thái (ghi file tạm rồi os.replace: người đọc không thấy file dở)."""
+        self._written = time.monotonic()
+        state = dict(self.to_dict(), pid=os.getpid(), created=self.created)
+        tmp = _job_path(self.id, f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, _job_path(self.id))
+
+    def run(self):
+        self.status = "running"
+        try:
+            self.save()
+            self.result = search(
+                self.pairs,
+                self.keyspace,
+                self.workers,
+                self.find_all,
+                self._progress,
+                self._stop,
+            )
+            self.status = "cancelled" if self.result["cancelled"] else "done"
+        except Exception as e:
+            self.error = str(e)
+            self.status = "error"
+        finally:
+            # trả slot trước khi ghi trạng thái cuối: ai thấy "done" là submit được
+            for path in (self.slot, _job_path(self.id, ".cancel")):
+                if path:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(path)
+            self.save()
+            with _JOBS_LOCK:
+                _JOBS.pop(self.id, None)
+
+    def cancel(self):
+        self._stop.set()
+
+    def to_dict(self):
+        total = self.keyspace.size
+        return {
+            "id": self.id,
+            "status": self.status,
+            "keyspace": total,
+            "description": self.keyspace.describe(),
+            "tested": self.tested,
+            "percent": round(100 * self.tested / total, 2) if total else 100.0,
+            "elapsed": round(self.elapsed, 3),
+            "keys_per_sec": round(self.tested / self.elapsed) if self.elapsed else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+_JOBS = {}  # job đang chạy trong process này
+_JOBS_LOCK = threading.Lock()
+
+
+def _prune_jobs():
+    """Giữ lại MAX_JOBS file trạng thái mới nhất."""
+    states = []
+    for name in os.listdir(JOB_DIR):
+        if _JOB_ID.fullmatch(name[:-5]) and name.endswith(".json"):
+            path = os.path.join(JOB_DIR, name)
+            with contextlib.suppress(FileNotFoundError):
+                states.append((os.path.getmtime(path), path))
+    for _, path in sorted(states)[:-MAX_JOBS]:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+
+def submit_job(pairs, keyspace, workers=None, find_all=False) -> KeySearchJob:
+    """
+    Tạo job và chạy trên daemon thread của process hiện tại.
+    Raise ValueError nếu (ở bất kỳ worker nào) đã có MAX_ACTIVE_JOBS job chạy.
+    """
+    os.makedirs(JOB_DIR, exist_ok=True)
+    job = KeySearchJob(pairs, keyspace, workers, find_all)
+    job.slot = _acquire_slot(job.id)
+    job.save()
+    with _JOBS_LOCK:
+        _JOBS[job.id] = job
+    _prune_jobs()
+    threading.Thread(target=job.run, daemon=True).start()
+    return job
+
+
+def get_job(job_id: str):
+    """Trạng thái job (dict, giống KeySearchJob.to_dict()) hoặc None."""
+    if not _JOB_ID.fullmatch(job_id):
+        return None
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+    if job is not None:
+        return job.to_dict()
+    try:
+        with open(_job_path(job_id), encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    pid = state.pop("pid", None)
+    state.pop("created", None)
+    if state["status"] in ("queued", "running") and pid and not _pid_alive(pid):
+        state["status"] = "error"
+        state["error"] = "Worker chạy job đã dừng"
+    return state
+
+
+def cancel_job(job_id: str):
+    """
+    Hủy job: job của process này dừng ngay; job ở worker khác nhận file
+    <id>.cancel sau chunk đang chạy. Trả về trạng thái hiện tại hoặc None.
+    """
+    state = get_job(job_id)
+    if state is None:
+        return None
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+    if job is not None:
+        job.cancel()
+    elif state["status"] in ("queued", "running"):
+        with open(_job_path(job_id, ".cancel"), "w", encoding="ascii"):
+            pass
+    return state
+
+
+def _run_cli():
+    """
+    CLI:
+        python -m crypto.des_keysearch --plaintext P --ciphertext-hex C \\
+            (--key-hex K --mask-hex M | --charset printable [--prefix abc])
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Tìm key DES (known-plaintext) trên keyspace rút gọn"
+    )
+    pt = parser.add_mutually_exclusive_group(required=True)
+    pt.add_argument("--plaintext", help="Plaintext dạng text (UTF-8)")
+    pt.add_argument("--plaintext-hex", help="Plaintext dạng hex")
+    parser.add_argument("--ciphertext-hex", required=True, help="Ciphertext dạng hex")
+    parser.add_argument("--iv", default=None, help="IV hex nếu ciphertext là CBC")
+    parser.add_argument("--key-hex", help="Key đã biết một phần (hex, 16 ký tự)")
+    parser.add_argument("--mask-hex", help="Mask bit chưa biết (hex, 1 = chưa biết)")
+    parser.add_argument(
+        "--charset",
+        help=f"Key ASCII 8 ký tự: {', '.join(CHARSETS)} hoặc chuỗi ký tự tùy ý",
+    )
+    parser.add_argument("--prefix", default="", help="Prefix key đã biết (charset)")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Số process (mặc định = số CPU)"
+    )
+    parser.add_argument(
+        "--all", action="store_true", help="Duyệt hết keyspace, không dừng sớm"
+    )
+    args = parser.parse_args()
+
+    try:
+        plaintext = (
+            args.plaintext.encode("utf-8")
+            if args.plaintext is not None
+            else bytes.fromhex(args.plaintext_hex)
+        )
+        ciphertext = bytes.fromhex(args.ciphertext_hex)
+        iv = bytes.fromhex(args.iv) if args.iv else None
+        if args.charset:
+            keyspace = CharsetKeyspace(args.charset, args.prefix)
+        elif args.key_hex and args.mask_hex:
+            keyspace = MaskKeyspace(
+                bytes.fromhex(args.key_hex), bytes.fromhex(args.mask_hex)
+            )
+        else:
+            raise ValueError("Cần --charset hoặc cả --key-hex và --mask-hex")
+        pairs = make_pairs(plaintext, ciphertext, iv)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(
+        f"[*] Keyspace {keyspace.size:,} key ({keyspace.describe()})", file=sys.stderr
+    )
+    last = [0.0]
+
+    def progress(tested, total, elapsed):
+        if elapsed - last[0] >= 1 or tested >= total:
+            last[0] = elapsed
+            rate = tested / elapsed if elapsed else 0
+            print(
+                f"[*] {100 * tested / total:6.2f}%  {tested:,}/{total:,}"
+                f"  {rate:,.0f} key/s",
+                file=sys.stderr,
+            )
+
+    result = search(pairs, keyspace, args.workers, args.all, progress)
+    if result["found"]:
+        for key_hex, key_text in zip(result["keys"], result["keys_text"]):
+            print(f"[+] Key: {key_hex}  ({key_text!r})")
+    else:
+        print("[-] Không tìm thấy key trong keyspace")
+    print(
+        f"[+] Đã thử {result['tested']:,} key trong {result['seconds']}s"
+        f" ({result['keys_per_sec'] or 0:,} key/s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    from .profiling import profile_from_env
+
+    with profile_from_env("des_keysearch"):
+        _run_cli()
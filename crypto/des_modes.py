@@ -1,123 +1,233 @@
 # crypto/des_modes.py
 """
-DES modes (ECB, CBC) with PKCS#7 padding
-----------------------------------------
+DES / 3DES modes (ECB, CBC with PKCS#7 padding; CFB, CFB8, OFB)
+---------------------------------------------------------------
 API:
 - des_encrypt(plaintext: bytes, key: bytes, mode: str, iv: bytes|None)
     -> (ciphertext: bytes, iv_used: bytes|None)
 - des_decrypt(ciphertext: bytes, key: bytes, mode: str, iv: bytes|None)
     -> plaintext: bytes
+
+Key 8 bytes -> DES; 16 bytes -> 3DES EDE2 (K1, K2, K1); 24 bytes -> 3DES
+EDE3 (K1, K2, K3). Block size luôn 8 bytes.
+
+CFB (CFB-64) / CFB8 / OFB: không padding, iv 8 bytes (encrypt không truyền
+-> tự sinh); des_stream xử lý được từng record khi nhận.
+
+ECB encrypt/decrypt và CBC decrypt với payload lớn tự dùng DES bitsliced
+(crypto/des_bitslice.py) nếu có cài numpy. Đường từng block chạy theo word
+int 64-bit (block_stream.ecb_words / cbc_*_words).
 """
 
 import os
-from .des_core import des_key_schedule, des_encrypt_block, des_decrypt_block
+from functools import lru_cache, partial
+from .block_stream import (
+    FEEDBACK_MODES,
+    BlockStreamCipher,
+    FeedbackStreamCipher,
+    cbc_decrypt_words,
+    cbc_encrypt_words,
+    ecb_words,
+    pkcs7_pad,
+    pkcs7_unpad,
+)
+from .des_core import des_key_schedule, des_pipeline_word
+from . import des_bitslice
+from .metrics import CIPHER_BYTES, register_cache
 
 BLOCK_SIZE = 8
+KEY_SIZES = (8, 16, 24)  # DES, 3DES EDE2, 3DES EDE3
 
 
-def pkcs7_pad(data: bytes, block_size: int = BLOCK_SIZE) -> bytes:
-    pad_len = block_size - (len(data) % block_size)
-    if pad_len == 0:
-        pad_len = block_size
-    return data + bytes([pad_len]) * pad_len
+@lru_cache(maxsize=256)
+def _key_schedule(key: bytes):
+    """16 subkey cho key, cache theo key (batch cùng key chỉ tính 1 lần)."""
+    return tuple(des_key_schedule(key))
 
 
-def pkcs7_unpad(data: bytes) -> bytes:
-    if not data:
-        raise ValueError("Invalid padding (empty data)")
-    pad_len = data[-1]
-    if pad_len <= 0 or pad_len > BLOCK_SIZE:
-        raise ValueError("Invalid padding length")
-    if data[-pad_len:] != bytes([pad_len]) * pad_len:
-        raise ValueError("Invalid PKCS#7 padding")
-    return data[:-pad_len]
+@lru_cache(maxsize=256)
+def _schedules(key: bytes, decrypt: bool = False):
+    """
+    Các lượt DES theo thứ tự áp dụng (mỗi lượt 16 subkey), cache theo key:
+    - DES : (K,)                   giải mã: (K đảo,)
+    - 3DES: E_K3(D_K2(E_K1(P))) -> (K1, K2 đảo, K3), EDE2 có K3 = K1
+            giải mã: (K3 đảo, K2, K1 đảo)
+    """
+    if len(key) == 8:
+        enc = (_key_schedule(key),)
+    else:
+        k1 = _key_schedule(key[:8])
+        k2 = _key_schedule(key[8:16])
+        k3 = _key_schedule(key[16:24]) if len(key) == 24 else k1
+        enc = (k1, k2[::-1], k3)
+    if decrypt:
+        return tuple(subkeys[::-1] for subkeys in reversed(enc))
+    return enc
 
 
-def _ecb_encrypt(plaintext: bytes, subkeys) -> bytes:
-    plaintext = pkcs7_pad(plaintext, BLOCK_SIZE)
-    out = []
-    for i in range(0, len(plaintext), BLOCK_SIZE):
-        block = plaintext[i : i + BLOCK_SIZE]
-        out.append(des_encrypt_block(block, subkeys))
-    return b"".join(out)
+register_cache("des_key_schedule", _key_schedule)
+register_cache("des_schedules", _schedules)
+
+
+def _check_key(key: bytes) -> bytes:
+    if len(key) not in KEY_SIZES:
+        raise ValueError("DES key must be 8 bytes (3DES: 16 or 24 bytes)")
+    return bytes(key)
+
+
+def cipher_label(key: bytes) -> str:
+    """Nhãn metrics / hiển thị theo độ dài key: 8 bytes = DES, 16 / 24 = 3DES."""
+    return "DES" if len(key) == 8 else "3DES"
+
+
+def _use_bitslice(data: bytes) -> bool:
+    """Batch đủ lớn và có NumPy -> dùng engine bitsliced (des_bitslice)."""
+    return (
+        des_bitslice.HAVE_NUMPY
+        and len(data) >= des_bitslice.BITSLICE_MIN_BLOCKS * BLOCK_SIZE
+    )
+
+
+def _word_fn(schedules):
+    """Hàm int 64-bit -> int 64-bit cho block_stream (chaining theo word)."""
+    return partial(des_pipeline_word, schedules=schedules)
+
+
+def _feedback_stream(key: bytes, mode: str, encrypting: bool, iv: bytes):
+    """CFB / CFB8 / OFB: cả 2 chiều đều dùng phép mã hóa block."""
+    return FeedbackStreamCipher(
+        _word_fn(_schedules(key)), BLOCK_SIZE, mode, encrypting, iv
+    )
+
+
+# schedules: kết quả _schedules(key) cho encrypt, _schedules(key, True) cho decrypt
+def _ecb_blocks(data: bytes, schedules) -> bytes:
+    """ECB trên data bội số block, không pad / unpad."""
+    if _use_bitslice(data):
+        return des_bitslice.crypt_blocks(data, schedules)
+    return bytes(ecb_words(data, _word_fn(schedules), BLOCK_SIZE))
+
+
+def _cbc_decrypt_blocks(ciphertext: bytes, schedules, iv: bytes) -> bytes:
+    """CBC decrypt trên data bội số block, chưa bỏ padding."""
+    if _use_bitslice(ciphertext):
+        return des_bitslice.cbc_decrypt_blocks(ciphertext, schedules, iv)
+    out, _ = cbc_decrypt_words(
+        ciphertext, _word_fn(schedules), BLOCK_SIZE, int.from_bytes(iv, "big")
+    )
+    return bytes(out)
 
 
-def _ecb_decrypt(ciphertext: bytes, subkeys) -> bytes:
+def _ecb_encrypt(plaintext: bytes, schedules) -> bytes:
+    return _ecb_blocks(pkcs7_pad(plaintext, BLOCK_SIZE), schedules)
+
+
+def _ecb_decrypt(ciphertext: bytes, schedules) -> bytes:
     if len(ciphertext) % BLOCK_SIZE != 0:
         raise ValueError("Ciphertext length not multiple of block size")
-    out = []
-    for i in range(0, len(ciphertext), BLOCK_SIZE):
-        block = ciphertext[i : i + BLOCK_SIZE]
-        out.append(des_decrypt_block(block, subkeys))
-    return pkcs7_unpad(b"".join(out))
+    return pkcs7_unpad(_ecb_blocks(ciphertext, schedules), BLOCK_SIZE)
 
 
-def _cbc_encrypt(plaintext: bytes, subkeys, iv: bytes) -> tuple[bytes, bytes]:
+def _cbc_encrypt(plaintext: bytes, schedules, iv: bytes) -> tuple[bytes, bytes]:
     if iv is None:
         iv = os.urandom(BLOCK_SIZE)
     if len(iv) != BLOCK_SIZE:
         raise ValueError("IV must be 8 bytes for DES CBC")
     plaintext = pkcs7_pad(plaintext, BLOCK_SIZE)
-    out = []
-    prev = iv
-    for i in range(0, len(plaintext), BLOCK_SIZE):
-        block = plaintext[i : i + BLOCK_SIZE]
-        x = bytes(a ^ b for a, b in zip(block, prev))
-        c = des_encrypt_block(x, subkeys)
-        out.append(c)
-        prev = c
-    return b"".join(out), iv
-
-
-def _cbc_decrypt(ciphertext: bytes, subkeys, iv: bytes) -> bytes:
+    out, _ = cbc_encrypt_words(
+        plaintext, _word_fn(schedules), BLOCK_SIZE, int.from_bytes(iv, "big")
+    )
+    return bytes(out), iv
+
+
+def _cbc_decrypt(ciphertext: bytes, schedules, iv: bytes) -> bytes:
     if iv is None or len(iv) != BLOCK_SIZE:
         raise ValueError("IV must be 8 bytes for DES CBC decryption")
     if len(ciphertext) % BLOCK_SIZE != 0:
         raise ValueError("Ciphertext length not multiple of block size")
-
-    out = []
-    prev = iv
-    for i in range(0, len(ciphertext), BLOCK_SIZE):
-        block = ciphertext[i : i + BLOCK_SIZE]
-        x = des_decrypt_block(block, subkeys)
-        p = bytes(a ^ b for a, b in zip(x, prev))
-        out.append(p)
-        prev = block
-    return pkcs7_unpad(b"".join(out))
+    return pkcs7_unpad(_cbc_decrypt_blocks(ciphertext, schedules, iv), BLOCK_SIZE)
 
 
 def des_encrypt(plaintext: bytes, key: bytes, mode: str, iv: bytes = None):
-    """Main API for Flask."""
-    if len(key) != 8:
-        raise ValueError("DES key must be 8 bytes")
-    subkeys = des_key_schedule(key)
+    """Main API for Flask. Key 8 bytes = DES, 16 / 24 bytes = 3DES."""
+    key = _check_key(key)
+    schedules = _schedules(key)
     mode = mode.upper()
+    CIPHER_BYTES.inc(len(plaintext), cipher=cipher_label(key), direction="encrypt")
 
     if mode == "ECB":
-        c = _ecb_encrypt(plaintext, subkeys)
+        c = _ecb_encrypt(plaintext, schedules)
         return c, None
     elif mode == "CBC":
-        c, iv_used = _cbc_encrypt(plaintext, subkeys, iv)
+        c, iv_used = _cbc_encrypt(plaintext, schedules, iv)
         return c, iv_used
+    elif mode in FEEDBACK_MODES:
+        iv = os.urandom(BLOCK_SIZE) if iv is None else iv
+        return _feedback_stream(key, mode, True, iv).update(plaintext), iv
     else:
         raise ValueError("Unsupported DES mode: " + mode)
 
 
 def des_decrypt(ciphertext: bytes, key: bytes, mode: str, iv: bytes = None):
-    """Main API for Flask."""
-    if len(key) != 8:
-        raise ValueError("DES key must be 8 bytes")
-    subkeys = des_key_schedule(key)
+    """Main API for Flask. Key 8 bytes = DES, 16 / 24 bytes = 3DES."""
+    key = _check_key(key)
+    schedules = _schedules(key, True)
     mode = mode.upper()
+    CIPHER_BYTES.inc(len(ciphertext), cipher=cipher_label(key), direction="decrypt")
 
     if mode == "ECB":
-        return _ecb_decrypt(ciphertext, subkeys)
+        return _ecb_decrypt(ciphertext, schedules)
     elif mode == "CBC":
-        return _cbc_decrypt(ciphertext, subkeys, iv)
+        return _cbc_decrypt(ciphertext, schedules, iv)
+    elif mode in FEEDBACK_MODES:
+        return _feedback_stream(key, mode, False, iv).update(ciphertext)
     else:
         raise ValueError("Unsupported DES mode: " + mode)
 
 
+def des_crypt_blocks(data: bytes, key: bytes, mode: str, action: str, iv: bytes = None):
+    """
+    ECB (encrypt / decrypt) hoặc CBC decrypt trên data bội số 8 byte, không
+    pad / unpad. Mỗi đoạn xử lý độc lập (CBC: iv = block ciphertext ngay trước
+    đoạn) -> dùng để chia file thành window / process (crypto/file_cli.py).
+    """
+    key = _check_key(key)
+    if len(data) % BLOCK_SIZE != 0:
+        raise ValueError("Data length not multiple of block size")
+    decrypt = action == "decrypt"
+    schedules = _schedules(key, decrypt)
+    mode = mode.upper()
+    if mode == "ECB":
+        return _ecb_blocks(data, schedules)
+    if mode == "CBC" and decrypt:
+        if iv is None or len(iv) != BLOCK_SIZE:
+            raise ValueError("IV must be 8 bytes for DES CBC decryption")
+        return _cbc_decrypt_blocks(data, schedules, iv)
+    raise ValueError(f"DES {mode} {action} cannot be split into blocks")
+
+
+def des_stream(key: bytes, mode: str, action: str, iv: bytes = None):
+    """
+    Streaming object (update/finalize) cho DES / 3DES ECB/CBC/CFB/CFB8/OFB.
+    Encrypt không truyền iv (mode khác ECB) -> tự sinh, đọc lại qua .iv
+    """
+    key = _check_key(key)
+    mode = mode.upper()
+    encrypting = action == "encrypt"
+    if mode != "ECB" and iv is None and encrypting:
+        iv = os.urandom(BLOCK_SIZE)
+    if mode in FEEDBACK_MODES:
+        return _feedback_stream(key, mode, encrypting, iv)
+    return BlockStreamCipher(
+        _word_fn(_schedules(key)),
+        _word_fn(_schedules(key, True)),
+        BLOCK_SIZE,
+        mode,
+        encrypting,
+        iv,
+    )
+
+
 # ===== Wrapper theo đúng API của đề bài: encrypt / decrypt =====
 import base64
 
@@ -161,3 +271,21 @@ def decrypt(
 
     # Dùng hàm gốc des_decrypt
     return des_decrypt(raw_ct, key, mode, iv)
+
+
+def _run_cli():
+    """
+    CLI file (mmap, xem crypto/file_cli.py):
+        python -m crypto.des_modes encrypt in.bin out.bin --key HEX --mode CBC
+        python -m crypto.des_modes decrypt out.bin in.bin --key HEX --mode CBC --iv IV
+    """
+    from .file_cli import run_cli
+
+    run_cli("DES")
+
+
+if __name__ == "__main__":
+    from .profiling import profile_from_env
+
+    with profile_from_env("des_modes"):
+        _run_cli()
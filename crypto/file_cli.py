@@ -0,0 +1,275 @@
+# crypto/file_cli.py
+"""
+Mã hóa / giải mã file lớn bằng mmap (DES / 3DES / AES)
+------------------------------------------------------
+Input được mmap (không đọc cả file vào bytes) và xử lý theo window căn block
+(mặc định WINDOW_SIZE); output ghi thẳng vào file đã cấp phát sẵn kích thước
+(cũng qua mmap). Bộ nhớ chỉ phụ thuộc kích thước window.
+
+- ECB (2 chiều) và CBC decrypt: các window độc lập (CBC: iv = block
+  ciphertext ngay trước window) -> chia cho nhiều process (workers), mỗi
+  worker tự mmap input / output, không truyền dữ liệu qua pipe.
+- CBC encrypt, CFB, CFB8, OFB: tuần tự qua aes_stream / des_stream.
+- PKCS#7 (ECB / CBC): encrypt pad phần đuôi; decrypt kiểm tra block cuối
+  rồi truncate file output.
+
+    python -m crypto.aes_modes encrypt disk.img disk.enc --key K --mode CBC
+    python -m crypto.des_modes decrypt disk.enc disk.img --key K --mode ECB \\
+        --workers 4
+"""
+
+import mmap
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .aes_modes import BLOCK_SIZE as AES_BLOCK_SIZE, aes_crypt_blocks, aes_stream
+from .block_stream import pkcs7_pad, pkcs7_unpad
+from .des_modes import BLOCK_SIZE as DES_BLOCK_SIZE, des_crypt_blocks, des_stream
+
+WINDOW_SIZE = 4 << 20  # 4 MiB, bội số của 8 và 16
+MODES = ("ECB", "CBC", "CFB", "CFB8", "OFB")
+# cipher -> (xử lý block độc lập, stream factory, block size)
+ENGINES = {
+    "AES": (aes_crypt_blocks, aes_stream, AES_BLOCK_SIZE),
+    "DES": (des_crypt_blocks, des_stream, DES_BLOCK_SIZE),
+}
+
+
+def _splittable(mode: str, action: str) -> bool:
+    """Các window xử lý độc lập được (chạy song song)."""
+    return mode == "ECB" or (mode == "CBC" and action == "decrypt")
+
+
+def _crypt_window(cipher, src_mm, start, end, key, mode, action, iv):
+    crypt_blocks, _, block_size = ENGINES[cipher]
+    if mode == "CBC" and start:
+        iv = src_mm[start - block_size : start]
+    return crypt_blocks(src_mm[start:end], key, mode, action, iv)
+
+
+def _window_task(args):
+    """Worker: mmap input / output, xử lý 1 window, ghi thẳng vào output."""
+    cipher, src, dst, key, mode, action, iv, start, end = args
+    with open(src, "rb") as fin, open(dst, "r+b") as fout:
+        with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as src_mm:
+            with mmap.mmap(fout.fileno(), 0) as dst_mm:
+                dst_mm[start:end] = _crypt_window(
+                    cipher, src_mm, start, end, key, mode, action, iv
+                )
+    return end - start
+
+
+def _process(cipher, src, dst, key, mode, action, iv, workers, window, report):
+    """Xử lý file, trả về (số byte output, số process đã dùng)."""
+    crypt_blocks, stream_factory, bs = ENGINES[cipher]
+    size = os.path.getsize(src)
+    padded = mode in ("ECB", "CBC")
+    if padded and action == "decrypt" and (size == 0 or size % bs):
+        raise ValueError("Ciphertext length not multiple of block size")
+    # Kiểm tra key / IV trước khi tạo file output
+    stream = stream_factory(key, mode, action, iv)
+    out_size = size + bs - size % bs if padded and action == "encrypt" else size
+
+    with open(src, "rb") as fin, open(dst, "w+b") as fout:
+        fout.truncate(out_size)
+        src_mm = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        dst_mm = mmap.mmap(fout.fileno(), 0) if out_size else bytearray()
+        try:
+            if _splittable(mode, action):
+                aligned = size - size % bs
+                windows = [
+                    (s, min(s + window, aligned)) for s in range(0, aligned, window)
+                ]
+                workers = min(workers or os.cpu_count() or 1, len(windows) or 1)
+                if workers > 1:
+                    tasks = [
+                        (cipher, src, dst, key, mode, action, iv, s, e)
+                        for s, e in windows
+                    ]
+                    ctx = multiprocessing.get_context("spawn")
+                    with ProcessPoolExecutor(workers, mp_context=ctx) as pool:
+                        futures = [pool.submit(_window_task, t) for t in tasks]
+                        for future in as_completed(futures):
+                            report(future.result())
+                else:
+                    for s, e in windows:
+                        dst_mm[s:e] = _crypt_window(
+                            cipher, src_mm, s, e, key, mode, action, iv
+                        )
+                        report(e - s)
+                if action == "encrypt":
+                    tail = pkcs7_pad(src_mm[aligned:size], bs)
+                    dst_mm[aligned:] = crypt_blocks(tail, key, mode, action)
+                    report(size - aligned)
+            else:
+                workers = 1
+                pos = 0
+                for s in range(0, size, window):
+                    out = stream.update(src_mm[s : s + window])
+                    dst_mm[pos : pos + len(out)] = out
+                    pos += len(out)
+                    report(min(window, size - s))
+                out = stream.finalize()
+                dst_mm[pos : pos + len(out)] = out
+            if padded and action == "decrypt":
+                last = dst_mm[out_size - bs : out_size]
+                out_size -= bs - len(pkcs7_unpad(last, bs))
+        finally:
+            if size:
+                src_mm.close()
+            if isinstance(dst_mm, mmap.mmap):
+                dst_mm.close()
+        fout.truncate(out_size)
+    return out_size, workers
+
+
+def process_file(
+    cipher: str,
+    src: str,
+    dst: str,
+    key: bytes,
+    mode: str,
+    action: str,
+    iv: bytes = None,
+    workers=None,
+    window: int = WINDOW_SIZE,
+    progress=None,
+):
+    """
+    Mã hóa / giải mã file src -> dst (cipher 'AES' | 'DES', key 16/24 bytes
+    với DES = 3DES). Encrypt mode khác ECB không truyền iv -> tự sinh.
+    workers: số process cho ECB / CBC decrypt (mặc định = số CPU).
+    progress(done_bytes, total_bytes, elapsed) được gọi sau mỗi window.
+
+    Trả về dict: bytes_in, bytes_out, seconds, mb_per_sec, iv (hex), workers.
+    Lỗi (key / IV / padding) -> ValueError, file output dở dang bị xóa.
+    """
+    cipher, mode = cipher.upper(), mode.upper()
+    if cipher not in ENGINES:
+        raise ValueError("Unsupported cipher: " + cipher)
+    if mode not in MODES:
+        raise ValueError("Unsupported file mode: " + mode)
+    if action not in ("encrypt", "decrypt"):
+        raise ValueError("action phải là 'encrypt' hoặc 'decrypt'")
+    if os.path.abspath(src) == os.path.abspath(dst):
+        raise ValueError("File output phải khác file input")
+    bs = ENGINES[cipher][2]
+    window = max(bs, window - window % bs)
+    if mode != "ECB" and iv is None and action == "encrypt":
+        iv = os.urandom(bs)
+
+    size = os.path.getsize(src)
+    done = 0
+    start = time.perf_counter()
+
+    def report(nbytes):
+        nonlocal done
+        done += nbytes
+        if progress:
+            progress(done, size, time.perf_counter() - start)
+
+    try:
+        out_size, used = _process(
+            cipher, src, dst, key, mode, action, iv, workers, window, report
+        )
+    except Exception:
+        if os.path.exists(dst):
+            os.remove(dst)
+        raise
+    seconds = time.perf_counter() - start
+    return {
+        "bytes_in": size,
+        "bytes_out": out_size,
+        "seconds": round(seconds, 3),
+        "mb_per_sec": round(size / 1e6 / seconds, 2) if seconds else None,
+        "iv": iv.hex() if iv else "",
+        "workers": used,
+    }
+
+
+def run_cli(cipher: str):
+    """CLI chung cho python -m crypto.aes_modes / crypto.des_modes."""
+    import argparse
+
+    key_help = (
+        "Key hex (16 / 24 / 32 bytes)"
+        if cipher == "AES"
+        else "Key hex (8 bytes; 16 / 24 bytes = 3DES)"
+    )
+    parser = argparse.ArgumentParser(
+        prog=f"python -m crypto.{cipher.lower()}_modes",
+        description=f"Mã hóa / giải mã file bằng {cipher} (mmap, theo window)",
+    )
+    parser.add_argument("action", choices=["encrypt", "decrypt"])
+    parser.add_argument("input", help="File input")
+    parser.add_argument("output", help="File output (ghi đè)")
+    parser.add_argument("--key", required=True, help=key_help)
+    parser.add_argument(
+        "--key-format",
+        choices=["hex", "plaintext"],
+        default="hex",
+        help="Định dạng key (mặc định hex)",
+    )
+    parser.add_argument("--mode", required=True, type=str.upper, choices=MODES)
+    parser.add_argument("--iv", default=None, help="IV hex (encrypt: tự sinh nếu bỏ)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Số process cho ECB / CBC decrypt (mặc định = số CPU)",
+    )
+    parser.add_argument(
+        "--window-mb", type=float, default=WINDOW_SIZE / (1 << 20), help="MiB / window"
+    )
+    args = parser.parse_args()
+
+    try:
+        key = (
+            args.key.encode("utf-8")
+            if args.key_format == "plaintext"
+            else bytes.fromhex(args.key)
+        )
+        iv = bytes.fromhex(args.iv) if args.iv else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    last = [0.0]
+
+    def progress(done, total, elapsed):
+        if elapsed - last[0] >= 1 or done >= total:
+            last[0] = elapsed
+            rate = done / 1e6 / elapsed if elapsed else 0
+            print(
+                f"[*] {100 * done / (total or 1):6.2f}%  {done / 1e6:,.1f}"
+                f"/{total / 1e6:,.1f} MB  {rate:,.1f} MB/s",
+                file=sys.stderr,
+            )
+
+    try:
+        result = process_file(
+            cipher,
+            args.input,
+            args.output,
+            key,
+            args.mode,
+            args.action,
+            iv,
+            args.workers,
+            int(args.window_mb * (1 << 20)),
+            progress,
+        )
+    except (OSError, ValueError) as e:
+        print(f"[-] {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if result["iv"]:
+        print(f"[+] IV: {result['iv']}")
+    print(
+        f"[+] {result['bytes_in'] / 1e6:,.1f} MB -> {args.output}"
+        f" ({result['bytes_out']:,} bytes) trong {result['seconds']}s"
+        f" ({result['mb_per_sec'] or 0:,} MB/s, {result['workers']} process)",
+        file=sys.stderr,
+    )
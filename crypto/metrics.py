@@ -0,0 +1,215 @@
+# crypto/metrics.py
+"""
+Metrics kiểu Prometheus (không cần thư viện ngoài)
+-------------------------------------------------
+Registry tự viết gồm Counter / Histogram có label, xuất ra text format
+0.0.4 tại GET /metrics (app.py):
+
+- lab06_http_request_duration_seconds{route,method,status}   histogram
+- lab06_solver_phase_seconds{solver,phase}                   histogram
+- lab06_score_evaluations_total{solver}                      counter
+- lab06_cipher_bytes_total{cipher,direction}                 counter
+- lab06_cache_hits_total / lab06_cache_misses_total{cache}   đọc từ lru_cache
+
+    with timed("vigenere", "refine"):
+        ...
+    SCORE_EVALUATIONS.inc(26, solver="caesar")
+
+Mỗi process có registry riêng (gunicorn nhiều worker -> scrape theo worker).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+)
+
+_REGISTRY = []  # các metric theo thứ tự đăng ký
+_CACHES = {}  # tên cache -> hàm lru_cache (đọc cache_info() khi render)
+_LOCK = threading.Lock()
+
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(
+            k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Counter đơn điệu tăng, label truyền bằng keyword: c.inc(2, solver="x")."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        _REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _LOCK:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def total(self):
+        """Tổng trên mọi tổ hợp label."""
+        return sum(self._values.values())
+
+    def samples(self):
+        for key, value in sorted(self._values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    """Histogram tích lũy theo bucket (le), kèm _sum và _count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # key -> [counts từng bucket..., sum, count]
+        _REGISTRY.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with _LOCK:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        for key, state in sorted(self._values.items()):
+            for i, bound in enumerate(self.buckets):
+                labels = _format_labels(self.labelnames, key, ("le", bound))
+                yield self.name + "_bucket", labels, state[i]
+            labels = _format_labels(self.labelnames, key, ("le", "+Inf"))
+            yield self.name + "_bucket", labels, state[-1]
+            labels = _format_labels(self.labelnames, key)
+            yield self.name + "_sum", labels, state[-2]
+            yield self.name + "_count", labels, state[-1]
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "lab06_http_request_duration_seconds",
+    "Thời gian xử lý request theo route (stream: đến khi gửi header)",
+    ("route", "method", "status"),
+)
+SOLVER_PHASE_SECONDS = Histogram(
+    "lab06_solver_phase_seconds",
+    "Thời gian từng phase trong solver / load model",
+    ("solver", "phase"),
+)
+SCORE_EVALUATIONS = Counter(
+    "lab06_score_evaluations_total",
+    "Số lần chấm điểm ứng viên key (chi-square / n-gram / quadgram)",
+    ("solver",),
+)
+CIPHER_BYTES = Counter(
+    "lab06_cipher_bytes_total",
+    "Số byte DES/AES đã xử lý",
+    ("cipher", "direction"),
+)
+STREAM_CHARS = Counter(
+    "lab06_stream_chars_total",
+    "Số ký tự / chữ cái đã thống kê ở pass 1 của pipeline stream phá mã",
+    ("cipher", "kind"),
+)
+
+
+@contextmanager
+def timed(solver: str, phase: str):
+    """Đo thời gian 1 phase: with timed("substitution", "hill_climb"): ..."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        SOLVER_PHASE_SECONDS.observe(
+            time.perf_counter() - t0, solver=solver, phase=phase
+        )
+
+
+def register_cache(name: str, cached_fn):
+    """Đăng ký hàm @lru_cache để xuất hit/miss qua cache_info()."""
+    _CACHES[name] = cached_fn
+
+
+def _cache_samples():
+    hits, misses = [], []
+    for name, fn in sorted(_CACHES.items()):
+        info = fn.cache_info()
+        labels = _format_labels(("cache",), (name,))
+        hits.append(("lab06_cache_hits_total", labels, info.hits))
+        misses.append(("lab06_cache_misses_total", labels, info.misses))
+    return hits, misses
+
+
+def render() -> str:
+    """Toàn bộ registry ở Prometheus text format."""
+    lines = []
+    with _LOCK:
+        for metric in _REGISTRY:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+
+    hits, misses = _cache_samples()
+    for name, help_text, samples in (
+        ("lab06_cache_hits_total", "Số lần trúng lru_cache", hits),
+        ("lab06_cache_misses_total", "Số lần trượt lru_cache", misses),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for sample_name, labels, value in samples:
+            lines.append(f"{sample_name}{labels} {value}")
+    return "\n".join(lines) + "\n"
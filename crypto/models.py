@@ -0,0 +1,73 @@
+# crypto/models.py
+"""
+Preload model thống kê (n-gram, wordlist, bảng quadgram)
+--------------------------------------------------------
+Các model trong substitution.py / vigenere.py được load lazy ở request đầu
+tiên. Khi chạy nhiều worker (gunicorn --preload), gọi preload_models() ở
+process master TRƯỚC khi fork để:
+- request đầu tiên không phải chờ load file (~400k dict entries);
+- các worker dùng chung trang bộ nhớ copy-on-write thay vì mỗi worker một
+  bản riêng. gc.freeze() chuyển các object đã load sang permanent
+  generation để GC của worker không ghi vào (và làm copy) các trang đó.
+"""
+
+import gc
+import time
+
+from . import substitution as _substitution
+from . import vigenere as _vigenere
+from .metrics import SOLVER_PHASE_SECONDS
+
+_LOADERS = (
+    ("monograms", _substitution._load_monograms),
+    ("bigrams", _substitution._load_bigrams),
+    ("trigrams", _substitution._load_trigrams),
+    ("quadgrams", _substitution._load_quadgrams),
+    ("wordlist", _substitution._load_wordlist),
+    ("quad_table", _vigenere._load_quad_table),
+)
+
+_LOAD_SECONDS = {}  # tên model -> thời gian load (s)
+_FROZEN = False
+
+
+def preload_models(freeze: bool = True) -> dict:
+    """
+    Load mọi model (idempotent). freeze=True: gc.freeze() sau khi load,
+    chỉ nên dùng ở process master trước khi fork worker.
+    Trả về model_status().
+    """
+    global _FROZEN
+    for name, loader in _LOADERS:
+        if name in _LOAD_SECONDS:
+            continue
+        t0 = time.perf_counter()
+        loader()
+        elapsed = time.perf_counter() - t0
+        _LOAD_SECONDS[name] = round(elapsed, 4)
+        SOLVER_PHASE_SECONDS.observe(elapsed, solver="models", phase=name)
+        print(f"[+] Loaded {name} in {_LOAD_SECONDS[name]:.2f}s")
+
+    if freeze and not _FROZEN and hasattr(gc, "freeze"):
+        gc.collect()
+        gc.freeze()
+        _FROZEN = True
+    return model_status()
+
+
+def model_status() -> dict:
+    """Trạng thái từng model (đọc trực tiếp global cache, không trigger load)."""
+    loaded = {
+        "monograms": _substitution._MONO_FREQ is not None,
+        "bigrams": _substitution._BI_LOG is not None,
+        "trigrams": _substitution._TRI_LOG is not None,
+        "quadgrams": _substitution._QUAD_LOG is not None,
+        "wordlist": _substitution._WORDSET is not None,
+        "quad_table": _vigenere._QUAD_TABLE is not None,
+    }
+    return {
+        "ready": all(loaded.values()),
+        "models": loaded,
+        "load_seconds": dict(_LOAD_SECONDS),
+        "gc_frozen": _FROZEN,
+    }
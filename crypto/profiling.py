@@ -0,0 +1,173 @@
+# crypto/profiling.py
+"""
+Profiling theo yêu cầu (cProfile / sampling profiler)
+-----------------------------------------------------
+Bật profiling cho 1 request hoặc 1 lần chạy CLI mà không cần sửa code:
+
+- Web (app.py, khi LAB06_PROFILING=1): header "X-Profile: cprofile|sample"
+  hoặc query ?profile=cprofile|sample. File kết quả trả về trong header
+  X-Profile-File; xem / tải qua GET /debug/profiles[/<name>].
+- CLI: biến môi trường LAB06_PROFILE=cprofile|sample, ví dụ
+      LAB06_PROFILE=sample python -m crypto.substitution -i c.txt -o p.txt
+
+Output:
+- cprofile -> *.pstats (đọc bằng pstats / snakeviz)
+- sample   -> *.folded: collapsed stack "a;b;c count" cho flamegraph.pl /
+              speedscope. Sampler là 1 thread đọc sys._current_frames()
+              mỗi SAMPLE_INTERVAL giây, overhead thấp hơn cProfile.
+
+Thư mục PROFILE_DIR giữ tối đa MAX_PROFILES file (xóa file cũ nhất).
+"""
+
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+PROFILE_DIR = os.getenv("LAB06_PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+MAX_PROFILES = int(os.getenv("LAB06_PROFILE_MAX_FILES", "50"))
+SAMPLE_INTERVAL = 0.005  # giây giữa 2 lần lấy mẫu stack
+MODES = {"cprofile": ".pstats", "sample": ".folded"}
+
+
+class SamplingProfiler:
+    """Lấy mẫu stack của 1 thread (mặc định thread gọi start()) theo chu kỳ."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self._target = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                module = os.path.splitext(os.path.basename(code.co_filename))[0]
+                names.append(f"{module}.{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+def _prune():
+    """Giữ tối đa MAX_PROFILES file mới nhất trong PROFILE_DIR."""
+    entries = list_profiles()
+    for entry in entries[MAX_PROFILES:]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, entry["name"]))
+        except OSError:
+            pass
+
+
+def _output_path(label: str, mode: str) -> str:
+    safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in label)
+    now = time.time()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+    name = f"{stamp}-{int(now * 1e6) % 10**6:06d}_{os.getpid()}_{safe[:80]}"
+    return os.path.join(PROFILE_DIR, name + MODES[mode])
+
+
+class Profile:
+    """
+    Profiler start/stop tách rời (dùng cho before/after_request):
+        prof = Profile("api_task2", "sample"); prof.start(); ...; path = prof.stop()
+    """
+
+    def __init__(self, label: str, mode: str = "cprofile"):
+        if mode not in MODES:
+            raise ValueError(f"Unsupported profile mode: {mode}")
+        self.label = label
+        self.mode = mode
+        self.path = None
+        self._profiler = None
+
+    def start(self):
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler = SamplingProfiler()
+            self._profiler.start()
+        return self
+
+    def stop(self) -> str:
+        """Dừng, ghi file, prune thư mục. Trả về đường dẫn file."""
+        if self._profiler is None:
+            return self.path
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = _output_path(self.label, self.mode)
+        if self.mode == "cprofile":
+            self._profiler.disable()
+            self._profiler.dump_stats(path)
+        else:
+            self._profiler.stop()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self._profiler.collapsed())
+        self._profiler = None
+        self.path = path
+        _prune()
+        return path
+
+
+@contextmanager
+def profile(label: str, mode: str = "cprofile"):
+    """with profile("substitution", "sample") as prof: ...  -> prof.path"""
+    prof = Profile(label, mode).start()
+    try:
+        yield prof
+    finally:
+        prof.stop()
+        print(f"[+] Profile ({mode}) saved: {prof.path}", file=sys.stderr)
+
+
+def profile_from_env(label: str):
+    """Context manager cho CLI: LAB06_PROFILE=cprofile|sample (1 = cprofile)."""
+    mode = os.getenv("LAB06_PROFILE", "").strip().lower()
+    if mode in ("1", "true", "yes"):
+        mode = "cprofile"
+    if mode not in MODES:
+        return nullcontext()
+    return profile(label, mode)
+
+
+def list_profiles():
+    """Các file profile (mới nhất trước): name, size, mtime."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    entries = []
+    for name in os.listdir(PROFILE_DIR):
+        if os.path.splitext(name)[1] not in MODES.values():
+            continue
+        st = os.stat(os.path.join(PROFILE_DIR, name))
+        entries.append({"name": name, "size": st.st_size, "mtime": st.st_mtime})
+    entries.sort(key=lambda e: e["mtime"], reverse=True)
+    return entries
+
+
+def profile_path(name: str):
+    """Đường dẫn file profile theo tên (chỉ file đang có trong list_profiles)."""
+    if name not in {e["name"] for e in list_profiles()}:
+        return None
+    return os.path.join(PROFILE_DIR, name)
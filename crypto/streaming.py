@@ -0,0 +1,206 @@
+# crypto/streaming.py
+"""
+Streaming pipeline cho Task 1-3 (Caesar / Substitution / Vigenère)
+-------------------------------------------------------------------
+Cho phép phá mã file lớn (nhiều MB) mà không load toàn bộ vào bộ nhớ:
+
+1. Pass 1 (stream): đếm 26 chữ cái, ma trận bigram 26x26, IC và giữ lại
+   sample prefix có giới hạn (SAMPLE_CHARS ký tự).
+2. Solver chạy trên sample (Caesar dùng luôn histogram toàn file).
+3. Pass 2 (stream): áp key tìm được lên từng chunk. Vigenère xoay key theo
+   số chữ cái đã đi qua; autokey mang theo L chữ plaintext cuối làm primer.
+
+    stats = StreamStats()
+    for chunk in open_chunks():
+        stats.update(chunk)
+    info = solve_stats(stats, "auto")
+    for out in decrypt_chunks(open_chunks(), info["cipher"], info["key"], info["variant"]):
+        ...
+"""
+
+import codecs
+import re
+
+from .caesar import decrypt_caesar_with_key
+from .classifier import classify_counts
+from .substitution import _apply_key, break_substitution
+from .vigenere import (
+    ALPHABET,
+    VARIANTS,
+    _OPS,
+    _best_shift_from_counts,
+    _ic_from_counts,
+    _transform,
+    break_vigenere_variant,
+    decrypt_autokey,
+)
+
+CHUNK_SIZE = 64 * 1024  # bytes đọc mỗi lần từ file
+SAMPLE_CHARS = 15000  # độ dài sample cho solver (bằng giới hạn cũ của app)
+CIPHERS = ("caesar", "substitution", "vigenere")
+
+_NON_LETTERS = re.compile(r"[^A-Za-z]+")
+
+
+def iter_text_chunks(fileobj, chunk_size: int = CHUNK_SIZE):
+    """
+    Đọc file nhị phân theo chunk, decode UTF-8 tăng dần (ký tự nhiều byte
+    bị cắt giữa 2 chunk vẫn đúng, byte lỗi bị bỏ qua như process_input).
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    while True:
+        raw = fileobj.read(chunk_size)
+        if not raw:
+            break
+        text = decoder.decode(raw)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_string_chunks(text: str, chunk_size: int = CHUNK_SIZE):
+    """Chia string có sẵn thành chunk (cùng interface với iter_text_chunks)."""
+    for i in range(0, len(text), chunk_size):
+        yield text[i : i + chunk_size]
+
+
+class StreamStats:
+    """Thống kê tích lũy qua các chunk: counts, bigram, IC, sample prefix."""
+
+    def __init__(self, sample_chars: int = SAMPLE_CHARS):
+        self.counts = [0] * 26
+        self.bigrams = [[0] * 26 for _ in range(26)]
+        self.chars = 0
+        self.sample_chars = sample_chars
+        self._sample = []
+        self._sample_len = 0
+        self._last = None  # chữ cái cuối chunk trước (bigram nối chunk)
+
+    def update(self, chunk: str):
+        self.chars += len(chunk)
+        if self._sample_len < self.sample_chars:
+            part = chunk[: self.sample_chars - self._sample_len]
+            self._sample.append(part)
+            self._sample_len += len(part)
+
+        letters = _NON_LETTERS.sub("", chunk).upper()
+        if not letters:
+            return
+        for i, ch in enumerate(ALPHABET):
+            self.counts[i] += letters.count(ch)
+
+        codes = [ord(ch) - 65 for ch in letters]
+        bigrams = self.bigrams
+        prev = self._last
+        for c in codes:
+            if prev is not None:
+                bigrams[prev][c] += 1
+            prev = c
+        self._last = prev
+
+    @property
+    def letters(self) -> int:
+        return sum(self.counts)
+
+    @property
+    def sample(self) -> str:
+        return "".join(self._sample)
+
+    @property
+    def ic(self) -> float:
+        return _ic_from_counts(self.counts, self.letters)
+
+    def top_bigrams(self, k: int = 10):
+        pairs = [
+            (ALPHABET[a] + ALPHABET[b], n)
+            for a, row in enumerate(self.bigrams)
+            for b, n in enumerate(row)
+            if n
+        ]
+        pairs.sort(key=lambda p: -p[1])
+        return pairs[:k]
+
+    def summary(self) -> dict:
+        return {
+            "chars": self.chars,
+            "letters": self.letters,
+            "ic": round(self.ic, 5),
+            "sample_chars": self._sample_len,
+            "top_bigrams": self.top_bigrams(5),
+        }
+
+
+def solve_stats(stats: StreamStats, cipher: str = "auto", variant: str = "vigenere"):
+    """
+    Tìm key từ thống kê stream. cipher: 'auto' | caesar | substitution | vigenere.
+    Trả về dict {cipher, variant, key, score, stats}.
+    """
+    info = {"cipher": cipher, "variant": None, "key": None, "score": None}
+    summary = stats.summary()
+
+    if cipher == "auto":
+        sample_letters = _NON_LETTERS.sub("", stats.sample).upper()
+        cipher, detected = classify_counts(stats.counts, sample_letters)
+        summary["classifier"] = detected
+        info["cipher"] = cipher
+    elif cipher not in CIPHERS:
+        raise ValueError(f"Unsupported cipher: {cipher}")
+    info["stats"] = summary
+
+    if cipher == "caesar":
+        # Caesar chỉ cần histogram -> dùng toàn file, không cần sample
+        total = stats.letters
+        if total:
+            shift, chi = _best_shift_from_counts(stats.counts)
+            info["key"], info["score"] = shift, chi
+        else:
+            info["key"] = 0
+    elif cipher == "substitution":
+        score, mapping_str, _ = break_substitution(stats.sample)
+        info["key"] = mapping_str.split(":")[-1].strip().upper()
+        info["score"] = score
+    else:
+        if variant not in VARIANTS:
+            raise ValueError(f"Unsupported variant: {variant}")
+        key, _, score = break_vigenere_variant(stats.sample, variant)
+        info["variant"] = variant
+        info["key"], info["score"] = key, score
+    return info
+
+
+def decrypt_chunks(chunks, cipher: str, key, variant: str = None):
+    """
+    Áp key lên từng chunk, giữ trạng thái giữa các chunk:
+    - vigenere / beaufort / variant_beaufort: xoay key theo số chữ cái đã qua
+    - autokey: primer của chunk sau = L chữ (primer + plaintext) cuối
+    """
+    if cipher == "caesar":
+        for chunk in chunks:
+            yield decrypt_caesar_with_key(chunk, key)
+        return
+    if cipher == "substitution":
+        sub_key = key.lower()
+        for chunk in chunks:
+            yield _apply_key(chunk, sub_key)
+        return
+
+    variant = variant or "vigenere"
+    if variant == "autokey":
+        primer = key.upper()
+        key_len = len(primer)
+        for chunk in chunks:
+            plain = decrypt_autokey(chunk, primer)
+            primer = (primer + _NON_LETTERS.sub("", plain).upper())[-key_len:]
+            yield plain
+        return
+
+    op = _OPS[variant, "decrypt"]
+    key = key.upper()
+    key_len = len(key)
+    offset = 0
+    for chunk in chunks:
+        shift = offset % key_len
+        yield _transform(chunk, key[shift:] + key[:shift], op)
+        offset += len(_NON_LETTERS.sub("", chunk))
@@ -13,8 +13,12 @@ import os
 import re
 import string
 import random
+import time
 from math import log
 
+from .metrics import SCORE_EVALUATIONS, timed
+from .trace import FLAG_ANNEAL, FLAG_FREQ_SEED, TraceWriter
+
 ALPHABET = string.ascii_lowercase
 
 # Pre-compile regex for better performance
@@ -392,9 +396,9 @@ def _apply_key(ciphertext: str, key: str) -> str:
     return "".join(res)
 
 
-def _random_key() -> str:
+def _random_key(rng=random) -> str:
     lst = list(ALPHABET)
-    random.shuffle(lst)
+    rng.shuffle(lst)
     return "".join(lst)
 
 
@@ -466,7 +470,8 @@ def _hill_climb(
     max_iterations: int = 2000,
     use_annealing: bool = False,
     round_num: int = 0,
-) -> tuple[float, str]:
+    rng=None,
+) -> tuple[float, str, int]:
     """
     Hill-climbing tối ưu:
     - Bắt đầu với key frequency-based HOẶC random.
@@ -482,7 +487,12 @@ def _hill_climb(
         max_iterations: Số iteration tối đa (giảm từ 3000 xuống 2000 cho web)
         use_annealing: Nếu True, dùng simulated annealing để tránh local optimum
         round_num: Số thứ tự round hiện tại (cho logging)
+        rng: random.Random của round (seed riêng -> replay được từng round)
+
+    Trả về (best_score, best_key, swap_count).
     """
+    if rng is None:
+        rng = random.Random()
     seed_type = "Frequency" if use_freq_seed else "Random"
     anneal_str = " + Annealing" if use_annealing else ""
     print(f"  Round {round_num+1}: {seed_type} seed{anneal_str}", end="", flush=True)
@@ -490,13 +500,14 @@ def _hill_climb(
     if use_freq_seed:
         key = _frequency_seed(cipher_sample)
     else:
-        key = _random_key()
+        key = _random_key(rng)
 
     plaintext = _apply_key(cipher_sample, key)
     best_score = _language_score(plaintext)
     best_key = key
     current_score = best_score
     current_key = key
+    evaluations = 1
 
     # Simulated annealing với nhiệt độ cao hơn cho accuracy
     temperature = 30.0 if use_annealing else 0.0
@@ -513,6 +524,7 @@ def _hill_climb(
                 cand_key = _swap_positions(current_key, i, j)
                 cand_plain = _apply_key(cipher_sample, cand_key)
                 cand_score = _language_score(cand_plain)
+                evaluations += 1
 
                 # Standard hill-climbing: always accept better
                 if cand_score > current_score:
@@ -535,7 +547,7 @@ def _hill_climb(
 
                     delta = cand_score - current_score
                     acceptance_prob = math.exp(delta / temperature)
-                    if random.random() < acceptance_prob:
+                    if rng.random() < acceptance_prob:
                         current_score = cand_score
                         current_key = cand_key
                         improved = True
@@ -552,8 +564,39 @@ def _hill_climb(
         if use_annealing:
             temperature *= cooling_rate
 
+    SCORE_EVALUATIONS.inc(evaluations, solver="substitution")
     print(f" → Score: {best_score:.2f} (Swaps: {swap_count})")
-    return best_score, best_key
+    return best_score, best_key, swap_count
+
+
+def _letter_sample(ciphertext: str, sample_letters: int):
+    """(sample = sample_letters chữ cái đầu, tổng số chữ cái)."""
+    letters = [c for c in ciphertext if c.isalpha()]
+    return "".join(letters[:sample_letters]), len(letters)
+
+
+def _round_flags(round_num: int) -> int:
+    """
+    Round đầu: frequency seed (baseline tốt nhất)
+    Mỗi 4 round: dùng annealing để escape local optimum (tần suất cao)
+    Các round khác: random restart
+    """
+    flags = FLAG_FREQ_SEED if round_num == 0 else 0
+    if round_num > 0 and round_num % 4 == 0:
+        flags |= FLAG_ANNEAL
+    return flags
+
+
+def _replay_round(ciphertext: str, sample_letters: int, round_seed: int, flags: int):
+    """Chạy lại đúng 1 round từ trace; trả về (score, swaps)."""
+    sample, _ = _letter_sample(ciphertext, sample_letters)
+    score, _, swaps = _hill_climb(
+        sample,
+        use_freq_seed=bool(flags & FLAG_FREQ_SEED),
+        use_annealing=bool(flags & FLAG_ANNEAL),
+        rng=random.Random(round_seed),
+    )
+    return score, swaps
 
 
 def _break_with_hillclimb(
@@ -561,6 +604,8 @@ def _break_with_hillclimb(
     rounds: int = 80,
     sample_letters: int = 8000,
     consolidate: int = 6,
+    seed: int = None,
+    trace: str = None,
 ):
     """
     Random-restart hill-climbing - TỐI ƯU CHO ACCURACY:
@@ -568,19 +613,24 @@ def _break_with_hillclimb(
     - Sample size lớn để phân tích chính xác
     - Consolidate cao để xác nhận kết quả
     - Sử dụng cả frequency seed và simulated annealing
+
+    seed: seed gốc (None -> lấy ngẫu nhiên và in ra log). Mỗi round nhận
+          round_seed riêng sinh từ seed gốc -> cùng seed cho cùng kết quả.
+    trace: đường dẫn file trace nhị phân (xem crypto/trace.py), tùy chọn.
     """
-    letters = [c for c in ciphertext if c.isalpha()]
-    if not letters:
+    with timed("substitution", "sampling"):
+        sample, total_letters = _letter_sample(ciphertext, sample_letters)
+    if not sample:
         return 0.0, ALPHABET
 
-    if len(letters) > sample_letters:
-        sample = "".join(letters[:sample_letters])
-    else:
-        sample = "".join(letters)
+    if seed is None:
+        seed = random.randrange(2**32)
+    master = random.Random(seed)
 
-    print(f"Sample size: {len(sample)} chữ cái (từ tổng {len(letters)})")
+    print(f"Sample size: {len(sample)} chữ cái (từ tổng {total_letters})")
     print(f"Số rounds tối đa: {rounds}")
     print(f"Consolidate threshold: {consolidate} lần")
+    print(f"Seed: {seed}")
     print("-" * 60)
 
     global_best_score = float("-inf")
@@ -588,42 +638,60 @@ def _break_with_hillclimb(
     local_maximum_hits = 0
     no_improvement_count = 0
 
-    for round_num in range(rounds):
-        # Round đầu: frequency seed (baseline tốt nhất)
-        # Mỗi 4 round: dùng annealing để escape local optimum (tần suất cao)
-        # Các round khác: random restart
-        use_freq = round_num == 0
-        use_anneal = round_num > 0 and round_num % 4 == 0
-
-        score, key = _hill_climb(
-            sample,
-            use_freq_seed=use_freq,
-            use_annealing=use_anneal,
-            round_num=round_num,
+    writer = None
+    if trace:
+        writer = TraceWriter(
+            trace, "substitution", seed, ciphertext, rounds, sample_letters, consolidate
         )
 
-        if score > global_best_score + 0.3:  # Chấp nhận cải thiện nhỏ hơn
-            print(
-                f"    ✓ CẢI THIỆN: {global_best_score:.2f} → {score:.2f} (+{score-global_best_score:.2f})"
-            )
-            global_best_score = score
-            global_best_key = key
-            local_maximum_hits = 1
-            no_improvement_count = 0
-        elif abs(score - global_best_score) < 0.3:  # Tolerance nhỏ hơn
-            local_maximum_hits += 1
-            print(f"    = Trùng lặp kết quả tốt ({local_maximum_hits}/{consolidate})")
-            if local_maximum_hits >= consolidate:
-                # Đã confirm nhiều lần - đây là kết quả tốt nhất
-                print(f"    ✓ XÁC NHẬN: Đạt {consolidate} lần trùng lặp → Kết thúc sớm")
-                break
-        else:
-            no_improvement_count += 1
+    try:
+        for round_num in range(rounds):
+            round_seed = master.getrandbits(32)
+            flags = _round_flags(round_num)
+
+            t0 = time.perf_counter()
+            with timed("substitution", "hill_climb_round"):
+                score, key, swaps = _hill_climb(
+                    sample,
+                    use_freq_seed=bool(flags & FLAG_FREQ_SEED),
+                    use_annealing=bool(flags & FLAG_ANNEAL),
+                    round_num=round_num,
+                    rng=random.Random(round_seed),
+                )
+            if writer:
+                writer.record(
+                    round_num, round_seed, score, swaps, flags, time.perf_counter() - t0
+                )
+
+            if score > global_best_score + 0.3:  # Chấp nhận cải thiện nhỏ hơn
+                print(
+                    f"    ✓ CẢI THIỆN: {global_best_score:.2f} → {score:.2f} (+{score-global_best_score:.2f})"
+                )
+                global_best_score = score
+                global_best_key = key
+                local_maximum_hits = 1
+                no_improvement_count = 0
+            elif abs(score - global_best_score) < 0.3:  # Tolerance nhỏ hơn
+                local_maximum_hits += 1
+                print(
+                    f"    = Trùng lặp kết quả tốt ({local_maximum_hits}/{consolidate})"
+                )
+                if local_maximum_hits >= consolidate:
+                    # Đã confirm nhiều lần - đây là kết quả tốt nhất
+                    print(
+                        f"    ✓ XÁC NHẬN: Đạt {consolidate} lần trùng lặp → Kết thúc sớm"
+                    )
+                    break
+            else:
+                no_improvement_count += 1
 
-        # Kiên nhẫn hơn - chỉ stop nếu thực sự stuck
-        if no_improvement_count > 20:
-            print(f"    ✗ DỪNG: Không cải thiện sau 20 rounds")
-            break
+            # Kiên nhẫn hơn - chỉ stop nếu thực sự stuck
+            if no_improvement_count > 20:
+                print(f"    ✗ DỪNG: Không cải thiện sau 20 rounds")
+                break
+    finally:
+        if writer:
+            writer.close()
 
     print("-" * 60)
     print(f"KẾT QUẢ TỐT NHẤT:")
@@ -636,7 +704,13 @@ def _break_with_hillclimb(
 # ============================= 5. Public API ============================ #
 
 
-def break_substitution(ciphertext: str, rounds: int = 80, consolidate: int = 6):
+def break_substitution(
+    ciphertext: str,
+    rounds: int = 80,
+    consolidate: int = 6,
+    seed: int = None,
+    trace: str = None,
+):
     """
     Hàm dùng trong Flask - TỐI ƯU CHO ĐỘ CHÍNH XÁC CAO NHẤT.
 
@@ -649,6 +723,8 @@ def break_substitution(ciphertext: str, rounds: int = 80, consolidate: int = 6):
         ciphertext: văn bản mã hóa cần giải
         rounds: số vòng hill-climb tối đa (80 - cao để đảm bảo accuracy)
         consolidate: số lần cần đạt cùng kết quả để xác nhận (6 - chắc chắn)
+        seed: seed cố định để tái hiện kết quả (None = ngẫu nhiên, in ra log)
+        trace: file trace nhị phân để replay (xem crypto/trace.py)
     """
     print("\n" + "=" * 60)
     print("[TASK 2] BẮT ĐẦU PHÁ MÃ SUBSTITUTION CIPHER")
@@ -658,8 +734,6 @@ def break_substitution(ciphertext: str, rounds: int = 80, consolidate: int = 6):
     print("Scoring: Quadgram + Trigram + Bigram + Word bonus")
     print("-" * 60)
 
-    random.seed()
-
     if not ciphertext:
         mapping_str = "cipher: " + ALPHABET + " | plain : " + ALPHABET
         return 0.0, mapping_str, ""
@@ -675,10 +749,16 @@ def break_substitution(ciphertext: str, rounds: int = 80, consolidate: int = 6):
         sample_size = len(letters)  # File nhỏ -> dùng hết
 
     score, key = _break_with_hillclimb(
-        ciphertext, rounds=rounds, sample_letters=sample_size, consolidate=consolidate
+        ciphertext,
+        rounds=rounds,
+        sample_letters=sample_size,
+        consolidate=consolidate,
+        seed=seed,
+        trace=trace,
     )
 
-    plaintext = _apply_key(ciphertext, key)
+    with timed("substitution", "decrypt"):
+        plaintext = _apply_key(ciphertext, key)
 
     # Format mapping rõ ràng hơn (theo đề bài)
     cipher_line = "CIPHER: " + ALPHABET.upper()
@@ -724,17 +804,24 @@ def _run_cli():
         default=8,
         help="Số lần cần đạt cùng kết quả (mặc định 8)",
     )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Seed cố định (mặc định ngẫu nhiên)"
+    )
+    parser.add_argument(
+        "--trace", default=None, help="Ghi search trace nhị phân (crypto.trace)"
+    )
     args = parser.parse_args()
 
     with open(args.input, "r", encoding="utf-8", errors="ignore") as f:
         ciphertext = f.read()
 
-    random.seed()
     score, key = _break_with_hillclimb(
         ciphertext,
         rounds=args.rounds,
         sample_letters=args.sample,
         consolidate=args.consolidate,
+        seed=args.seed,
+        trace=args.trace,
     )
     plaintext = _apply_key(ciphertext, key)
 
@@ -757,4 +844,7 @@ def _run_cli():
 
 
 if __name__ == "__main__":
-    _run_cli()
+    from .profiling import profile_from_env
+
+    with profile_from_env("substitution"):
+        _run_cli()
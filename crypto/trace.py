@@ -0,0 +1,246 @@
+# crypto/trace.py
+"""
+Search trace nhị phân cho substitution / Vigenère
+-------------------------------------------------
+Ghi lại quá trình tìm key để tái hiện chính xác một lần giải chậm:
+
+Header (struct "<4sBBQIII32s"):
+    magic b"L6TR", version, solver (1 = substitution, 2 = vigenere),
+    seed, rounds, sample_letters, consolidate, sha256(ciphertext)
+    (vigenere: rounds = top_k, sample_letters = max_key_len,
+     consolidate = refine_top; seed = 0 vì solver không random)
+Record (struct "<IIdIBf"), mỗi round / ứng viên 1 record:
+    round, round_seed, score, swaps, flags, seconds
+
+flags: FLAG_FREQ_SEED | FLAG_ANNEAL (substitution), FLAG_REFINE (vigenere).
+
+Usage:
+    python -m crypto.substitution -i c.txt -o p.txt --seed 42 --trace run.l6tr
+    python -m crypto.trace show run.l6tr
+    python -m crypto.trace replay run.l6tr -i c.txt [--round 17]
+"""
+
+import hashlib
+import struct
+import time
+
+MAGIC = b"L6TR"
+VERSION = 1
+SOLVERS = {"substitution": 1, "vigenere": 2}
+_SOLVER_NAMES = {v: k for k, v in SOLVERS.items()}
+
+HEADER = struct.Struct("<4sBBQIII32s")
+RECORD = struct.Struct("<IIdIBf")
+
+FLAG_FREQ_SEED = 1
+FLAG_ANNEAL = 2
+FLAG_REFINE = 4
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8", errors="ignore")).digest()
+
+
+class TraceWriter:
+    """
+    Ghi trace ra file; dùng như context manager:
+        with TraceWriter(path, "substitution", seed, ciphertext, rounds=80) as tr:
+            tr.record(0, round_seed, score, swaps, flags, seconds)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        solver: str,
+        seed: int,
+        ciphertext: str,
+        rounds: int = 0,
+        sample_letters: int = 0,
+        consolidate: int = 0,
+    ):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unsupported trace solver: {solver}")
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                SOLVERS[solver],
+                seed or 0,
+                rounds,
+                sample_letters,
+                consolidate,
+                text_digest(ciphertext),
+            )
+        )
+
+    def record(self, round_num, round_seed, score, swaps=0, flags=0, seconds=0.0):
+        self._file.write(
+            RECORD.pack(round_num, round_seed, score, swaps, flags, seconds)
+        )
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_trace(path: str):
+    """Trả về (header dict, list record dict)."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if len(raw) < HEADER.size:
+        raise ValueError("Trace file quá ngắn")
+    magic, version, solver, seed, rounds, sample, consolidate, digest = (
+        HEADER.unpack_from(raw)
+    )
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Không phải trace L6TR hợp lệ")
+    header = {
+        "solver": _SOLVER_NAMES.get(solver, str(solver)),
+        "seed": seed,
+        "rounds": rounds,
+        "sample_letters": sample,
+        "consolidate": consolidate,
+        "digest": digest,
+    }
+    records = []
+    for off in range(HEADER.size, len(raw) - RECORD.size + 1, RECORD.size):
+        round_num, round_seed, score, swaps, flags, seconds = RECORD.unpack_from(
+            raw, off
+        )
+        records.append(
+            {
+                "round": round_num,
+                "round_seed": round_seed,
+                "score": score,
+                "swaps": swaps,
+                "flags": flags,
+                "seconds": seconds,
+            }
+        )
+    return header, records
+
+
+def replay(path: str, ciphertext: str, round_num: int = None):
+    """
+    Chạy lại từ trace. round_num=None: chạy lại toàn bộ solve với cùng seed
+    và tham số; ngược lại chỉ chạy lại 1 round hill-climb (substitution).
+    Trả về list (recorded, replayed) để so sánh score / swaps.
+    """
+    import os
+    import tempfile
+
+    header, records = read_trace(path)
+    if header["digest"] != text_digest(ciphertext):
+        raise ValueError("Ciphertext không khớp với trace (sha256 khác)")
+
+    if header["solver"] == "vigenere":
+        from .vigenere import _break_vigenere_internal
+
+        fd, tmp = tempfile.mkstemp(suffix=".l6tr")
+        os.close(fd)
+        try:
+            _break_vigenere_internal(
+                ciphertext,
+                max_key_len=header["sample_letters"],
+                top_k=header["rounds"],
+                refine_top=header["consolidate"],
+                trace=tmp,
+            )
+            _, replayed = read_trace(tmp)
+        finally:
+            os.remove(tmp)
+        return list(zip(records, replayed))
+
+    from .substitution import _break_with_hillclimb, _replay_round
+
+    if round_num is not None:
+        matches = [r for r in records if r["round"] == round_num]
+        if not matches:
+            raise ValueError(f"Trace không có round {round_num}")
+        rec = matches[0]
+        t0 = time.perf_counter()
+        score, swaps = _replay_round(
+            ciphertext, header["sample_letters"], rec["round_seed"], rec["flags"]
+        )
+        seconds = time.perf_counter() - t0
+        return [(rec, dict(rec, score=score, swaps=swaps, seconds=seconds))]
+
+    fd, tmp = tempfile.mkstemp(suffix=".l6tr")
+    os.close(fd)
+    try:
+        _break_with_hillclimb(
+            ciphertext,
+            rounds=header["rounds"],
+            sample_letters=header["sample_letters"],
+            consolidate=header["consolidate"],
+            seed=header["seed"],
+            trace=tmp,
+        )
+        _, replayed = read_trace(tmp)
+    finally:
+        os.remove(tmp)
+    return list(zip(records, replayed))
+
+
+def _run_cli():
+    """
+    CLI:
+        python -m crypto.trace show run.l6tr
+        python -m crypto.trace replay run.l6tr -i cipher.txt [--round N]
+    """
+    import argparse
+    import contextlib
+    import io
+
+    parser = argparse.ArgumentParser(description="Xem / replay search trace")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="In header và các record")
+    show.add_argument("trace")
+    rep = sub.add_parser("replay", help="Chạy lại solve từ trace và so sánh")
+    rep.add_argument("trace")
+    rep.add_argument("-i", "--input", required=True, help="File ciphertext gốc")
+    rep.add_argument("--round", type=int, default=None, help="Chỉ replay 1 round")
+    args = parser.parse_args()
+
+    if args.command == "show":
+        header, records = read_trace(args.trace)
+        print(
+            f"solver={header['solver']} seed={header['seed']} "
+            f"rounds={header['rounds']} sample={header['sample_letters']} "
+            f"consolidate={header['consolidate']} records={len(records)}"
+        )
+        for r in records:
+            print(
+                f"  round {r['round']:3d}  seed={r['round_seed']:10d}  "
+                f"score={r['score']:12.2f}  swaps={r['swaps']:4d}  "
+                f"flags={r['flags']}  {r['seconds']:.3f}s"
+            )
+        return
+
+    with open(args.input, "r", encoding="utf-8", errors="ignore") as f:
+        ciphertext = f.read()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pairs = replay(args.trace, ciphertext, args.round)
+
+    mismatches = 0
+    for rec, new in pairs:
+        same = rec["score"] == new["score"] and rec["swaps"] == new["swaps"]
+        mismatches += not same
+        print(
+            f"  round {rec['round']:3d}  score {rec['score']:12.2f} -> "
+            f"{new['score']:12.2f}  swaps {rec['swaps']} -> {new['swaps']}  "
+            f"{'OK' if same else 'MISMATCH'}  ({new['seconds']:.3f}s)"
+        )
+    print(f"[+] {len(pairs) - mismatches}/{len(pairs)} record khớp")
+
+
+if __name__ == "__main__":
+    _run_cli()
@@ -8,13 +8,31 @@ Task 3 - Vigenère cipher breaker (dùng Index of Coincidence + chi-square)
     + Chia ciphertext thành các "Caesar-subsets".
     + Giải từng subset bằng phân tích tần suất (chi-square).
 - Bước 3: Chọn key cho ra plaintext tiếng Anh nhất (chi-square nhỏ nhất).
+- Bước 4: Tinh chỉnh các key tốt nhất bằng coordinate-ascent trên quadgram
+  (sửa các ký tự khóa sai trên cột ngắn).
+
+Biến thể (dùng chung core mã số 0..25 + thống kê theo cột):
+- vigenere:         C = P + K
+- beaufort:         C = K - P   (tự nghịch đảo)
+- variant_beaufort: C = P - K
+- autokey:          C = P + K, K = primer + plaintext
 """
 
+import atexit
+import math
+import multiprocessing
 import string
-import random
+import threading
+import time
+from array import array
+
+from . import substitution as _substitution
+from .metrics import SCORE_EVALUATIONS, SOLVER_PHASE_SECONDS, timed
+from .trace import FLAG_REFINE, TraceWriter
 
 ALPHABET = string.ascii_uppercase
 ALPHABET_SET = set(ALPHABET)  # For faster membership testing
+LOWER_SET = set(ALPHABET.lower())
 
 # Tần suất chữ cái tiếng Anh chuẩn
 ENGLISH_FREQ = {
@@ -46,55 +64,168 @@ ENGLISH_FREQ = {
     "Z": 0.00074,
 }
 
+# Refinement bằng quadgram: số key ứng viên được tinh chỉnh, số chữ cái
+# tối đa dùng để chấm điểm, số vòng coordinate-ascent tối đa.
+REFINE_TOP = 3
+REFINE_SAMPLE_LETTERS = 3000
+REFINE_MAX_PASSES = 5
+# Phạt mỗi chữ cái khóa khi so sánh quadgram giữa các độ dài khác nhau: mỗi
+# chữ tự do chọn 1 trong 26 nên "mua" thêm được ~ln(26) fitness dù sai
+# (key dài overfit trên text ngắn).
+REFINE_LETTER_PENALTY = math.log(26)
+
+_QUAD_TABLE = None  # array('d') 26^4 phần tử: log P(quadgram) theo mã số nguyên
+
 
 # ===================== 1. Mã hóa / giải mã cơ bản ======================= #
 
+VARIANTS = ("vigenere", "beaufort", "variant_beaufort", "autokey")
 
-def encrypt_vigenere(plaintext: str, key: str) -> str:
+_EXPECTED = [ENGLISH_FREQ[ch] for ch in ALPHABET]
+
+# Phép biến đổi từng chữ cái (x = mã chữ vào, k = mã chữ khóa), theo biến thể
+_OPS = {
+    ("vigenere", "encrypt"): lambda x, k: x + k,
+    ("vigenere", "decrypt"): lambda x, k: x - k,
+    ("beaufort", "encrypt"): lambda x, k: k - x,
+    ("beaufort", "decrypt"): lambda x, k: k - x,
+    ("variant_beaufort", "encrypt"): lambda x, k: x - k,
+    ("variant_beaufort", "decrypt"): lambda x, k: x + k,
+}
+
+# Đảo dấu bảng chữ cái: x -> -x (mod 26), giữ hoa/thường
+_NEGATE = str.maketrans(
+    ALPHABET + ALPHABET.lower(),
+    "".join(ALPHABET[-i % 26] for i in range(26))
+    + "".join(ALPHABET[-i % 26] for i in range(26)).lower(),
+)
+
+
+def _key_codes(key: str):
+    """Key -> list mã số 0..25 (bỏ ký tự không phải A-Z)."""
+    codes = [ord(ch) - 65 for ch in key.upper() if ch in ALPHABET_SET]
+    if not codes:
+        raise ValueError("Key must contain at least one letter A-Z")
+    return codes
+
+
+def _negate_key(key: str) -> str:
+    return key.upper().translate(_NEGATE)
+
+
+def _transform(text: str, key: str, op) -> str:
     """
-    Vigenère chuẩn: C = P + K (mod 26).
-    Dùng cho test / demo, không dùng trong solver chính.
+    Core chung cho các biến thể khóa lặp: mỗi vị trí khóa có 1 bảng dịch
+    52 chữ cái dựng sẵn từ op(x, k); chỉ A-Z/a-z đẩy con trỏ khóa, ký tự
+    khác giữ nguyên, bảo toàn hoa/thường.
     """
-    key = key.upper()
+    tables = []
+    for k in _key_codes(key):
+        table = {}
+        for x in range(26):
+            y = op(x, k) % 26
+            table[ALPHABET[x]] = ALPHABET[y]
+            table[ALPHABET[x].lower()] = ALPHABET[y].lower()
+        tables.append(table)
+
+    key_len = len(tables)
     res = []
     ki = 0
-    for ch in plaintext:
-        if ch.isalpha():
-            base = "A" if ch.isupper() else "a"
-            p = ord(ch.upper()) - ord("A")
-            k = ord(key[ki % len(key)]) - ord("A")
-            c = (p + k) % 26
-            res.append(chr(ord(base) + c))
-            ki += 1
-        else:
+    for ch in text:
+        table = tables[ki % key_len]
+        out = table.get(ch)
+        if out is None:
             res.append(ch)
+        else:
+            res.append(out)
+            ki += 1
     return "".join(res)
 
 
+def encrypt_vigenere(plaintext: str, key: str) -> str:
+    """
+    Vigenère chuẩn: C = P + K (mod 26).
+    Dùng cho test / demo, không dùng trong solver chính.
+    """
+    return _transform(plaintext, key, _OPS["vigenere", "encrypt"])
+
+
 def decrypt_vigenere(ciphertext: str, key: str) -> str:
     """
     Giải mã Vigenère chuẩn: P = C - K (mod 26).
     Chỉ dịch A–Z/a–z, giữ nguyên ký tự khác, bảo toàn hoa/thường.
     """
-    key = key.upper()
+    return _transform(ciphertext, key, _OPS["vigenere", "decrypt"])
+
+
+def encrypt_beaufort(plaintext: str, key: str) -> str:
+    """Beaufort: C = K - P (mod 26)."""
+    return _transform(plaintext, key, _OPS["beaufort", "encrypt"])
+
+
+def decrypt_beaufort(ciphertext: str, key: str) -> str:
+    """Beaufort tự nghịch đảo: P = K - C (mod 26)."""
+    return _transform(ciphertext, key, _OPS["beaufort", "decrypt"])
+
+
+def encrypt_variant_beaufort(plaintext: str, key: str) -> str:
+    """Variant Beaufort: C = P - K (mod 26)."""
+    return _transform(plaintext, key, _OPS["variant_beaufort", "encrypt"])
+
+
+def decrypt_variant_beaufort(ciphertext: str, key: str) -> str:
+    """Variant Beaufort: P = C + K (mod 26)."""
+    return _transform(ciphertext, key, _OPS["variant_beaufort", "decrypt"])
+
+
+def _autokey(text: str, primer: str, decrypt: bool) -> str:
+    """
+    Autokey Vigenère: key stream = primer rồi đến chính plaintext.
+    Ký tự không phải A-Z/a-z giữ nguyên và không đẩy key stream.
+    """
+    stream = _key_codes(primer)
     res = []
     ki = 0
-    for ch in ciphertext:
-        if ch.isalpha():
-            base = "A" if ch.isupper() else "a"
-            c = ord(ch.upper()) - ord("A")
-            k = ord(key[ki % len(key)]) - ord("A")
-            p = (c - k) % 26
-            res.append(chr(ord(base) + p))
-            ki += 1
+    for ch in text:
+        if ch in ALPHABET_SET:
+            base = 65
+        elif ch in LOWER_SET:
+            base = 97
         else:
             res.append(ch)
+            continue
+        x = ord(ch) - base
+        if decrypt:
+            p = (x - stream[ki]) % 26
+            res.append(chr(base + p))
+        else:
+            p = x
+            res.append(chr(base + (x + stream[ki]) % 26))
+        stream.append(p)
+        ki += 1
     return "".join(res)
 
 
+def encrypt_autokey(plaintext: str, primer: str) -> str:
+    """Autokey: C[i] = P[i] + K[i], K = primer + P."""
+    return _autokey(plaintext, primer, decrypt=False)
+
+
+def decrypt_autokey(ciphertext: str, primer: str) -> str:
+    """Autokey: P[i] = C[i] - K[i], K = primer + P (đã giải)."""
+    return _autokey(ciphertext, primer, decrypt=True)
+
+
 # ========================= 2. Index of Coincidence ======================= #
 
 
+def _ic_from_counts(counts, total: int) -> float:
+    """IC từ histogram 26 chữ cái (total = tổng số chữ)."""
+    if total <= 1:
+        return 0.0
+    return sum(c * (c - 1) for c in counts) / (total * (total - 1))
+
+
 def _index_of_coincidence(seq: str) -> float:
     """
     IC cho chuỗi seq (chỉ gồm A-Z).
@@ -109,28 +240,13 @@ def _index_of_coincidence(seq: str) -> float:
         if ch in ALPHABET_SET:
             counts[ord(ch) - 65] += 1
 
-    # Calculate IC efficiently
-    numerator = sum(c * (c - 1) for c in counts)
-    return numerator / (N * (N - 1))
-
-
-def _guess_key_lengths_by_ic(letters: str, max_key_len: int = 30, top_k: int = 10):
-    """
-    Dùng Index of Coincidence để ước lượng các độ dài khóa tiềm năng.
-
-    Với mỗi key_len:
-        - Chia letters thành key_len subset: vị trí i, i+k, i+2k, ...
-        - Tính IC của từng subset, lấy trung bình.
-    IC càng cao (gần IC tiếng Anh ~0.065) thì key_len càng có khả năng đúng.
+    return _ic_from_counts(counts, N)
 
-    Trả về list (key_len, avg_ic) đã sort giảm dần theo avg_ic, lấy top_k.
 
-    Optimized: list comprehension, reduced allocations.
-    """
+def _ic_for_key_lengths(letters: str, key_lens):
+    """IC trung bình các subset cho từng key_len -> list (key_len, avg_ic)."""
     candidates = []
-    letters_len = len(letters)
-
-    for key_len in range(2, min(max_key_len + 1, letters_len // 4)):
+    for key_len in key_lens:
         # Calculate IC for all subsets
         ics = [
             _index_of_coincidence(letters[i::key_len])
@@ -141,51 +257,87 @@ def _guess_key_lengths_by_ic(letters: str, max_key_len: int = 30, top_k: int = 1
         if ics:
             avg_ic = sum(ics) / len(ics)
             candidates.append((key_len, avg_ic))
+    return candidates
+
+
+def _guess_key_lengths_by_ic(
+    letters: str, max_key_len: int = 30, top_k: int = 10, workers: int = 1
+):
+    """
+    Dùng Index of Coincidence để ước lượng các độ dài khóa tiềm năng.
+
+    Với mỗi key_len:
+        - Chia letters thành key_len subset: vị trí i, i+k, i+2k, ...
+        - Tính IC của từng subset, lấy trung bình.
+    IC càng cao (gần IC tiếng Anh ~0.065) thì key_len càng có khả năng đúng.
+
+    workers > 1: chia các key_len thành workers nhóm, mỗi nhóm 1 task trên
+    process pool dùng chung (_get_pool).
 
-    # Sort by IC (higher is better) and return top_k
-    candidates.sort(key=lambda x: -x[1])
+    Trả về list (key_len, avg_ic) đã sort giảm dần theo avg_ic, lấy top_k.
+    """
+    key_lens = list(range(2, min(max_key_len + 1, len(letters) // 4)))
+    if workers > 1 and len(key_lens) > 1:
+        candidates = _pool_map(_ic_for_key_lengths, letters, key_lens, workers)
+    else:
+        candidates = _ic_for_key_lengths(letters, key_lens)
+
+    # Sort by IC (higher is better), hòa thì key_len nhỏ trước; return top_k
+    candidates.sort(key=lambda x: (-x[1], x[0]))
     return candidates[:top_k]
 
 
 # ======================== 3. Phân tích tần suất Caesar =================== #
 
 
-def _best_shift_for_subset(subset: str) -> int:
-    """
-    subset: chuỗi chỉ gồm A-Z, thuộc về 1 vị trí khóa.
-    Tìm shift (0..25) sao cho chi-square so với ENGLISH_FREQ là nhỏ nhất.
-    shift chính là giá trị key-letter (A=0, B=1, ...).
+def _letter_counts(codes):
+    counts = [0] * 26
+    for c in codes:
+        counts[c] += 1
+    return counts
+
 
-    Optimized: reduced memory allocations, faster calculation.
+def _best_shift_from_counts(minus, plus=None):
     """
-    N = len(subset)
+    Thống kê theo cột dùng chung cho mọi biến thể: cột được mô tả bằng
+    histogram (không cần giải mã lại từng shift).
+        minus[a]: số phần tử có plaintext = a - k
+        plus[a]:  số phần tử có plaintext = a + k (autokey, vị trí lẻ)
+    Trả về (shift, chi) với chi-square nhỏ nhất - O(26*26) thay vì O(26*N).
+    """
+    if plus is None:
+        plus = [0] * 26
+    N = sum(minus) + sum(plus)
     if N == 0:
-        return 0
+        return 0, float("inf")
 
+    expected = [f * N for f in _EXPECTED]
     best_shift = 0
     best_chi = float("inf")
-
-    # Pre-convert subset to indices for faster processing
-    subset_indices = [ord(ch) - 65 for ch in subset if ch in ALPHABET_SET]
-    N = len(subset_indices)
-
     for shift in range(26):
-        counts = [0] * 26
-        for idx in subset_indices:
-            counts[(idx - shift) % 26] += 1
-
-        # Calculate chi-square
-        chi = sum(
-            (obs - ENGLISH_FREQ[ALPHABET[i]] * N) ** 2 / (ENGLISH_FREQ[ALPHABET[i]] * N)
-            for i, obs in enumerate(counts)
-            if ENGLISH_FREQ[ALPHABET[i]] > 0
-        )
-
+        chi = 0.0
+        for x in range(26):
+            obs = minus[(x + shift) % 26] + plus[(x - shift) % 26]
+            chi += (obs - expected[x]) ** 2 / expected[x]
         if chi < best_chi:
             best_chi = chi
             best_shift = shift
+    return best_shift, best_chi
+
 
-    return best_shift
+def _best_shift_for_subset(subset: str) -> int:
+    """
+    subset: chuỗi chỉ gồm A-Z, thuộc về 1 vị trí khóa.
+    Tìm shift (0..25) sao cho chi-square so với ENGLISH_FREQ là nhỏ nhất.
+    shift chính là giá trị key-letter (A=0, B=1, ...).
+
+    Optimized: đếm histogram 1 lần, thử 26 shift bằng cách xoay histogram.
+    """
+    counts = [0] * 26
+    for ch in subset:
+        if ch in ALPHABET_SET:
+            counts[ord(ch) - 65] += 1
+    return _best_shift_from_counts(counts)[0]
 
 
 # =========================== 4. Scoring plaintext ======================== #
@@ -211,10 +363,200 @@ def _chi_square_text(text: str) -> float:
     return chi
 
 
+# ====================== 4b. Quadgram refinement ========================== #
+
+
+def _load_quad_table():
+    """
+    Mã hóa quadgram log-prob của substitution.py thành mảng phẳng 26^4,
+    index = ((a*26 + b)*26 + c)*26 + d (A=0..Z=25) để tra cứu không cần
+    tạo chuỗi con. Trả về None nếu không có dữ liệu quadgram.
+    """
+    global _QUAD_TABLE
+    if _QUAD_TABLE is not None:
+        return _QUAD_TABLE or None
+
+    _substitution._load_quadgrams()
+    quad_log = _substitution._QUAD_LOG
+    if not quad_log:
+        _QUAD_TABLE = array("d")
+        return None
+
+    table = array("d", [_substitution._QUAD_DEFAULT]) * (26**4)
+    for g, lp in quad_log.items():
+        a, b, c, d = (ord(ch) - 97 for ch in g)
+        table[((a * 26 + b) * 26 + c) * 26 + d] = lp
+
+    _QUAD_TABLE = table
+    return table
+
+
+def _quad_sum(table, plain, starts) -> float:
+    """Tổng log-prob của các quadgram bắt đầu tại các vị trí starts."""
+    total = 0.0
+    for s in starts:
+        total += table[
+            ((plain[s] * 26 + plain[s + 1]) * 26 + plain[s + 2]) * 26 + plain[s + 3]
+        ]
+    return total
+
+
+def _refine_key_quadgram(codes, shifts, max_passes: int = REFINE_MAX_PASSES, sign=None):
+    """
+    Coordinate-ascent bằng quadgram (xem _coordinate_ascent), đếm số lần
+    chấm điểm vào SCORE_EVALUATIONS. Trả về (shifts_mới, quadgram_score).
+    """
+    shifts, score, evaluations = _coordinate_ascent(codes, shifts, max_passes, sign)
+    SCORE_EVALUATIONS.inc(evaluations, solver="vigenere")
+    return shifts, score
+
+
+def _coordinate_ascent(codes, shifts, max_passes: int = REFINE_MAX_PASSES, sign=None):
+    """
+    Coordinate-ascent trên từng vị trí khóa:
+    - Với mỗi vị trí i, thử cả 26 shift, giữ shift cho quadgram score cao nhất.
+    - Chỉ chấm lại các quadgram chứa ít nhất 1 chữ cái của cột i
+      (incremental), không giải mã + chấm điểm lại toàn bộ text.
+    - Lặp đến khi không còn cải thiện (tối đa max_passes vòng).
+
+    codes: list mã số 0..25 của ciphertext (chỉ chữ cái).
+    sign: None cho khóa lặp (P = C - K). Với autokey, codes là base và
+          P[p] = base[p] + sign[p] * K (xem _autokey_chain).
+    Trả về (shifts_mới, quadgram_score, số lần chấm điểm).
+    """
+    table = _load_quad_table()
+    n = len(codes)
+    key_len = len(shifts)
+    if table is None or n < 4 or key_len == 0:
+        return list(shifts), float("-inf"), 0
+
+    if sign is None:
+        sign = [-1] * n
+    shifts = list(shifts)
+    plain = [(c + sign[i] * shifts[i % key_len]) % 26 for i, c in enumerate(codes)]
+    last_start = n - 4
+
+    # Quadgram bị ảnh hưởng khi đổi cột i: mọi start trong [p-3, p] với p thuộc cột i
+    affected = []
+    for col in range(key_len):
+        starts = set()
+        for p in range(col, n, key_len):
+            starts.update(range(max(0, p - 3), min(p, last_start) + 1))
+        affected.append(sorted(starts))
+
+    score = _quad_sum(table, plain, range(last_start + 1))
+    evaluations = 1
+
+    for _ in range(max_passes):
+        improved = False
+        for col in range(key_len):
+            positions = range(col, n, key_len)
+            starts = affected[col]
+            current = shifts[col]
+            base = _quad_sum(table, plain, starts)
+            best_shift, best_part = current, base
+
+            for shift in range(26):
+                if shift == current:
+                    continue
+                for p in positions:
+                    plain[p] = (codes[p] + sign[p] * shift) % 26
+                part = _quad_sum(table, plain, starts)
+                evaluations += 1
+                if part > best_part:
+                    best_shift, best_part = shift, part
+
+            for p in positions:
+                plain[p] = (codes[p] + sign[p] * best_shift) % 26
+            if best_shift != current:
+                shifts[col] = best_shift
+                score += best_part - base
+                improved = True
+
+        if not improved:
+            break
+
+    return shifts, score, evaluations
+
+
+# ===================== 4c. Đánh giá key length song song ================== #
+
+# Process pool dùng chung giữa các lần gọi (tạo 1 lần, spawn worker tốn
+# ~100ms + load bảng quadgram): (số worker, ProcessPoolExecutor)
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool(workers: int):
+    """Pool >= workers process, tạo lại chỉ khi cần nhiều worker hơn."""
+    global _POOL
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _POOL_LOCK:
+        if _POOL is None or _POOL[0] < workers:
+            if _POOL is not None:
+                _POOL[1].shutdown(wait=False)
+            ctx = multiprocessing.get_context("spawn")
+            _POOL = (workers, ProcessPoolExecutor(workers, mp_context=ctx))
+        return _POOL[1]
+
+
+def shutdown_pool():
+    """Đóng process pool dùng chung (tự gọi khi thoát interpreter)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL[1].shutdown()
+            _POOL = None
+
+
+atexit.register(shutdown_pool)
+
+
+def _pool_map(fn, letters: str, items, workers: int):
+    """
+    Chia items thành workers nhóm (xen kẽ để cân tải: key_len lớn tốn hơn),
+    mỗi nhóm là 1 task fn(letters, nhóm) -> list; ghép kết quả.
+    """
+    groups = [items[i::workers] for i in range(workers) if items[i::workers]]
+    pool = _get_pool(workers)
+    futures = [pool.submit(fn, letters, group) for group in groups]
+    return [row for fut in futures for row in fut.result()]
+
+
+def _score_shifts(letters: str, shifts) -> float:
+    """Chi-square của letters sau khi giải bằng shifts (chỉ chữ cái đếm)."""
+    key = "".join(ALPHABET[s] for s in shifts)
+    return _chi_square_text(decrypt_vigenere(letters, key))
+
+
+def _evaluate_key_lengths(letters: str, key_lens):
+    """Worker: giải mọi cột của từng key length -> list (key_len, shifts, chi)."""
+    results = []
+    for key_len in key_lens:
+        shifts = [_best_shift_for_subset(letters[i::key_len]) for i in range(key_len)]
+        results.append((key_len, shifts, _score_shifts(letters, shifts)))
+    return results
+
+
+def _refine_task(codes, shifts):
+    """Worker: refine 1 key -> (shifts, score, số lần chấm điểm, giây)."""
+    t0 = time.perf_counter()
+    refined, fitness, evaluations = _coordinate_ascent(codes, shifts)
+    return refined, fitness, evaluations, time.perf_counter() - t0
+
+
 # ========================== 5. Solver chính ============================== #
 
 
-def _break_vigenere_internal(ciphertext: str, max_key_len: int = 30, top_k: int = 10):
+def _break_vigenere_internal(
+    ciphertext: str,
+    max_key_len: int = 30,
+    top_k: int = 10,
+    refine_top: int = REFINE_TOP,
+    workers: int = 1,
+    trace: str = None,
+):
     """
     Solver chinh:
     - Lay chuoi letters = chi cac chu cai A-Z tu ciphertext.
@@ -223,7 +565,19 @@ def _break_vigenere_internal(ciphertext: str, max_key_len: int = 30, top_k: int
         + Chia letters thanh key_len subset.
         + Moi subset giai bang chi-square -> 1 ky tu khoa.
         + Ghep thanh key, giai toan ciphertext, tinh chi-square toan cuc.
-    - Chon key co chi-square nho nhat.
+    - Tinh chinh refine_top key length co IC cao nhat (bo qua boi so cua
+      length da chon) bang quadgram coordinate-ascent (refine_top=0 de tat),
+      chon key co quadgram - REFINE_LETTER_PENALTY * do dai key cao nhat.
+      Chi-square thien vi key dai (moi cot tu chon shift) nen khong dung de
+      chon ung vien o buoc nay.
+    - workers > 1: quet IC, danh gia key_len ung vien va tinh chinh chay
+      tren process pool dung chung (moi task 1 nhom key_len / 1 key), ket
+      qua giong het che do tuan tu.
+    - trace: file trace nhi phan (crypto/trace.py). Solver tat dinh (khong
+      random) nen header chi luu tham so: rounds=top_k,
+      sample_letters=max_key_len, consolidate=refine_top. Moi ung vien buoc 2
+      la 1 record (score=chi), moi key tinh chinh buoc 3 la 1 record
+      FLAG_REFINE (score=quadgram, swaps=so vi tri khoa bi doi).
     """
     print("\n" + "=" * 60)
     print("[TASK 3] BẮT ĐẦU PHÁ MÃ VIGENÈRE CIPHER")
@@ -241,7 +595,8 @@ def _break_vigenere_internal(ciphertext: str, max_key_len: int = 30, top_k: int
         return "A", decrypt_vigenere(ciphertext, "A"), float("inf")
 
     print("\nBƯỚC 1: Tính Index of Coincidence để ước lượng độ dài khóa...")
-    candidates = _guess_key_lengths_by_ic(letters, max_key_len, top_k)
+    with timed("vigenere", "key_length"):
+        candidates = _guess_key_lengths_by_ic(letters, max_key_len, top_k, workers)
 
     print(f"\nCác độ dài khóa ứng viên (top {top_k}):")
     for i, (klen, ic) in enumerate(candidates, 1):
@@ -250,39 +605,110 @@ def _break_vigenere_internal(ciphertext: str, max_key_len: int = 30, top_k: int
     print("\nBƯỚC 2: Thử giải mã với từng độ dài khóa...")
     print("-" * 60)
 
+    step2_start = time.perf_counter()
+    trace_records = []  # (round, round_seed, score, swaps, flags, seconds)
+    parallel = None
+    if workers > 1 and len(candidates) > 1:
+        print(f"Chế độ song song: {workers} worker process")
+        key_lens = [key_len for key_len, _ in candidates]
+        parallel = {
+            key_len: (shifts, chi)
+            for key_len, shifts, chi in _pool_map(
+                _evaluate_key_lengths, letters, key_lens, workers
+            )
+        }
+
     best_key = None
     best_plain = None
     best_score = float("inf")
+    evaluated = []  # (chi, key_len, shifts)
 
     for idx, (key_len, ic_val) in enumerate(candidates, 1):
         print(
             f"\n[{idx}/{len(candidates)}] Thử key length = {key_len} (IC={ic_val:.4f})"
         )
-        shifts = []
-        for i in range(key_len):
-            subset = "".join(letters[j] for j in range(i, len(letters), key_len))
-            shift = _best_shift_for_subset(subset)
-            shifts.append(shift)
-            print(f"  Vị trí {i+1}/{key_len}: shift = {shift:2d} → '{ALPHABET[shift]}'")
+        if parallel is not None:
+            shifts, chi = parallel[key_len]
+        else:
+            shifts = []
+            for i in range(key_len):
+                shift = _best_shift_for_subset(letters[i::key_len])
+                shifts.append(shift)
+                print(
+                    f"  Vị trí {i+1}/{key_len}: shift = {shift:2d} → '{ALPHABET[shift]}'"
+                )
+            chi = _score_shifts(letters, shifts)
 
         key = "".join(ALPHABET[s] for s in shifts)
-        plain = decrypt_vigenere(ciphertext, key)
-
-        chi = _chi_square_text(plain)
         status = "✓ BEST" if chi < best_score else ""
         print(f"  → Key: '{key}' | Chi-square: {chi:.2f} {status}")
+        evaluated.append((chi, key_len, shifts))
+        trace_records.append((idx - 1, 0, chi, 0, 0, 0.0))
 
         if chi < best_score:
             best_score = chi
             best_key = key
-            best_plain = plain
+
+    SOLVER_PHASE_SECONDS.observe(
+        time.perf_counter() - step2_start, solver="vigenere", phase="column_solve"
+    )
+    SCORE_EVALUATIONS.inc(26 * sum(k for k, _ in candidates), solver="vigenere")
+
+    if refine_top > 0 and evaluated and _load_quad_table() is not None:
+        print("\nBƯỚC 3: Tinh chỉnh key bằng quadgram (coordinate-ascent)...")
+        codes = [ord(ch) - 65 for ch in letters[:REFINE_SAMPLE_LETTERS]]
+        # evaluated theo thứ tự IC giảm dần; bội số của length đã chọn cho
+        # cùng key (lặp lại) nên bỏ qua để thử thêm chu kỳ khác
+        selected = []
+        for chi, key_len, shifts in evaluated:
+            if len(selected) == refine_top:
+                break
+            if all(key_len % other for _, other, _ in selected):
+                selected.append((chi, key_len, shifts))
+        if workers > 1 and len(selected) > 1:
+            pool = _get_pool(workers)
+            futures = [pool.submit(_refine_task, codes, s) for _, _, s in selected]
+            refinements = [fut.result() for fut in futures]
+        else:
+            refinements = [_refine_task(codes, s) for _, _, s in selected]
+
+        best_fitness = float("-inf")
+        for (chi, key_len, shifts), result in zip(selected, refinements):
+            refined, fitness, evaluations, seconds = result
+            SCORE_EVALUATIONS.inc(evaluations, solver="vigenere")
+            SOLVER_PHASE_SECONDS.observe(seconds, solver="vigenere", phase="refine")
+            before = "".join(ALPHABET[s] for s in shifts)
+            changed = sum(a != b for a, b in zip(shifts, refined))
+            trace_records.append(
+                (len(trace_records), 0, fitness, changed, FLAG_REFINE, seconds)
+            )
+            key = _reduce_repeating_key("".join(ALPHABET[s] for s in refined))
+            penalized = fitness - REFINE_LETTER_PENALTY * len(key)
+            status = "✓ BEST" if penalized > best_fitness else ""
+            print(
+                f"  '{before}' → '{key}' | Quadgram: {fitness:.2f}"
+                f" (phạt độ dài: {penalized:.2f}) {status}"
+            )
+            if penalized > best_fitness:
+                best_fitness = penalized
+                best_key = key
+
+        best_score = _chi_square_text(decrypt_vigenere(letters, best_key))
 
     if best_key is not None:
         original_key = best_key
         best_key = _reduce_repeating_key(best_key)
         if best_key != original_key:
             print(f"\n✓ Phát hiện key lặp lại: '{original_key}' → '{best_key}'")
-        best_plain = decrypt_vigenere(ciphertext, best_key)
+        with timed("vigenere", "decrypt"):
+            best_plain = decrypt_vigenere(ciphertext, best_key)
+
+    if trace:
+        with TraceWriter(
+            trace, "vigenere", 0, ciphertext, top_k, max_key_len, refine_top
+        ) as writer:
+            for record in trace_records:
+                writer.record(*record)
 
     print("-" * 60)
     print(f"KẾT QUẢ TỐT NHẤT:")
@@ -294,17 +720,194 @@ def _break_vigenere_internal(ciphertext: str, max_key_len: int = 30, top_k: int
     return best_key, best_plain, best_score
 
 
-def break_vigenere(ciphertext: str):
+def break_vigenere(ciphertext: str, workers: int = 1, trace: str = None):
     """
     Hàm public dùng trong Flask.
 
+    workers > 1: đánh giá các key length ứng viên song song (process pool).
+    trace: ghi search trace nhị phân (crypto/trace.py). Solver không dùng
+    random nên cùng input luôn cho cùng kết quả, không cần seed.
+
     Trả về:
         key (str): khóa Vigenère (A-Z).
         plaintext (str): ciphertext đã giải.
         score (float): chi-square (càng nhỏ càng giống tiếng Anh).
     """
-    random.seed()
-    return _break_vigenere_internal(ciphertext, max_key_len=30, top_k=10)
+    return _break_vigenere_internal(
+        ciphertext, max_key_len=30, top_k=10, workers=workers, trace=trace
+    )
+
+
+# ======================= 5b. Beaufort / Autokey ========================== #
+
+# Autokey: độ dài primer tối đa, số chữ cái dùng để tìm primer
+AUTOKEY_MAX_PRIMER = 20
+AUTOKEY_SAMPLE_LETTERS = 3000
+
+
+def _break_beaufort_family(
+    ciphertext: str,
+    variant: str,
+    max_key_len: int,
+    top_k: int,
+    refine_top: int,
+    workers: int,
+):
+    """
+    Beaufort và variant Beaufort quy về Vigenère trên cùng core:
+    - beaufort:         P = K - C = (-C) - (-K) -> phá Vigenère trên -C
+    - variant_beaufort: P = C + K = C - (-K)    -> phá Vigenère trên C
+    Plaintext giữ nguyên, khóa thật = -(khóa Vigenère tìm được).
+    """
+    source = ciphertext.translate(_NEGATE) if variant == "beaufort" else ciphertext
+    key, plaintext, score = _break_vigenere_internal(
+        source, max_key_len, top_k, refine_top=refine_top, workers=workers
+    )
+    return _negate_key(key), plaintext, score
+
+
+def _autokey_chain(codes, primer_len: int):
+    """
+    Với primer độ dài L, plaintext của mỗi vị trí là hàm tuyến tính theo
+    chữ primer của cột đó: P[p] = base[p] + sign[p] * K[p % L] (mod 26).
+        p < L : base = C[p],               sign = -1
+        p >= L: base = C[p] - base[p - L], sign = -sign[p - L]
+    """
+    n = len(codes)
+    base = [0] * n
+    sign = [0] * n
+    for p in range(n):
+        if p < primer_len:
+            base[p] = codes[p]
+            sign[p] = -1
+        else:
+            base[p] = (codes[p] - base[p - primer_len]) % 26
+            sign[p] = -sign[p - primer_len]
+    return base, sign
+
+
+def _break_autokey_internal(
+    ciphertext: str,
+    max_primer_len: int = AUTOKEY_MAX_PRIMER,
+    top_k: int = 5,
+    refine_top: int = REFINE_TOP,
+):
+    """
+    Autokey không có chu kỳ nên IC không dùng được. Với mỗi độ dài primer L:
+    - Mỗi cột (p = j, j+L, ...) phụ thuộc đúng 1 chữ primer -> 2 histogram
+      (sign -1 / +1) của base, chọn chữ primer bằng chi-square xoay histogram.
+    - Lấy top_k L có tổng chi-square nhỏ nhất, tinh chỉnh bằng quadgram
+      (so sánh giữa các L có phạt REFINE_LETTER_PENALTY mỗi chữ primer).
+    """
+    print("\n" + "=" * 60)
+    print("[TASK 3] BẮT ĐẦU PHÁ MÃ AUTOKEY VIGENÈRE")
+    print("=" * 60)
+
+    letters = "".join(ch for ch in ciphertext.upper() if ch in ALPHABET_SET)
+    print(f"Số chữ cái (A-Z): {len(letters)}")
+    if len(letters) < 20:
+        print("⚠ CẢNH BÁO: Ciphertext quá ngắn, không thể phân tích chính xác")
+        return "A", decrypt_autokey(ciphertext, "A"), float("inf")
+
+    codes = [ord(ch) - 65 for ch in letters[:AUTOKEY_SAMPLE_LETTERS]]
+    candidates = []  # (chi, L, shifts)
+    for primer_len in range(1, min(max_primer_len, len(codes) // 4) + 1):
+        base, sign = _autokey_chain(codes, primer_len)
+        shifts = []
+        total_chi = 0.0
+        for col in range(primer_len):
+            minus = [0] * 26
+            plus = [0] * 26
+            for p in range(col, len(codes), primer_len):
+                if sign[p] < 0:
+                    minus[base[p]] += 1
+                else:
+                    plus[base[p]] += 1
+            shift, chi = _best_shift_from_counts(minus, plus)
+            shifts.append(shift)
+            total_chi += chi
+        candidates.append((total_chi / primer_len, primer_len, shifts))
+
+    candidates.sort(key=lambda x: x[0])
+    candidates = candidates[:top_k]
+    for chi, primer_len, shifts in candidates:
+        primer = "".join(ALPHABET[s] for s in shifts)
+        print(f"  Primer length = {primer_len:2d}: '{primer}' | Chi/cột: {chi:.2f}")
+
+    _, _, best_shifts = candidates[0]
+    best_key = "".join(ALPHABET[s] for s in best_shifts)
+    if refine_top > 0 and _load_quad_table() is not None:
+        print("\nTinh chỉnh primer bằng quadgram (coordinate-ascent)...")
+        best_fitness = float("-inf")
+        for _, primer_len, shifts in candidates[:refine_top]:
+            base, sign = _autokey_chain(codes, primer_len)
+            refined, fitness = _refine_key_quadgram(base, shifts, sign=sign)
+            key = "".join(ALPHABET[s] for s in refined)
+            penalized = fitness - REFINE_LETTER_PENALTY * primer_len
+            status = "✓ BEST" if penalized > best_fitness else ""
+            print(
+                f"  '{key}' | Quadgram: {fitness:.2f}"
+                f" (phạt độ dài: {penalized:.2f}) {status}"
+            )
+            if penalized > best_fitness:
+                best_fitness = penalized
+                best_key = key
+
+    plaintext = decrypt_autokey(ciphertext, best_key)
+    score = _chi_square_text(plaintext)
+    print(f"  Primer tìm được: '{best_key}' | Chi-square: {score:.2f}")
+    print("=" * 60 + "\n")
+    return best_key, plaintext, score
+
+
+def _break_variant_internal(
+    ciphertext: str,
+    variant: str = "vigenere",
+    max_key_len: int = 30,
+    top_k: int = 10,
+    refine_top: int = REFINE_TOP,
+    workers: int = 1,
+):
+    if variant == "vigenere":
+        return _break_vigenere_internal(
+            ciphertext, max_key_len, top_k, refine_top=refine_top, workers=workers
+        )
+    if variant in ("beaufort", "variant_beaufort"):
+        return _break_beaufort_family(
+            ciphertext, variant, max_key_len, top_k, refine_top, workers
+        )
+    if variant == "autokey":
+        return _break_autokey_internal(
+            ciphertext, min(max_key_len, AUTOKEY_MAX_PRIMER), refine_top=refine_top
+        )
+    raise ValueError(
+        f"Unsupported Vigenère variant: {variant} (use {', '.join(VARIANTS)})"
+    )
+
+
+def break_beaufort(ciphertext: str, workers: int = 1):
+    """Phá Beaufort (C = K - P). Trả về (key, plaintext, score)."""
+    return _break_variant_internal(ciphertext, "beaufort", workers=workers)
+
+
+def break_variant_beaufort(ciphertext: str, workers: int = 1):
+    """Phá variant Beaufort (C = P - K). Trả về (key, plaintext, score)."""
+    return _break_variant_internal(ciphertext, "variant_beaufort", workers=workers)
+
+
+def break_autokey(ciphertext: str):
+    """Phá autokey Vigenère. Trả về (primer, plaintext, score)."""
+    return _break_variant_internal(ciphertext, "autokey")
+
+
+def break_vigenere_variant(
+    ciphertext: str, variant: str = "vigenere", workers: int = 1
+):
+    """
+    Hàm public dùng trong Flask cho mọi biến thể (xem VARIANTS).
+    Raise ValueError nếu variant không hỗ trợ.
+    """
+    return _break_variant_internal(ciphertext, variant, workers=workers)
 
 
 # ========================= Utility functions ============================= #
@@ -350,16 +953,54 @@ def _run_cli():
     parser.add_argument(
         "--top-k", type=int, default=7, help="Số độ dài khóa ứng viên (mặc định 7)"
     )
+    parser.add_argument(
+        "--refine-top",
+        type=int,
+        default=REFINE_TOP,
+        help=f"Số key tinh chỉnh bằng quadgram, 0 = tắt (mặc định {REFINE_TOP})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Số process đánh giá key length song song (mặc định 1 = tuần tự)",
+    )
+    parser.add_argument(
+        "--variant",
+        choices=VARIANTS,
+        default="vigenere",
+        help="Biến thể cipher (mặc định vigenere)",
+    )
+    parser.add_argument(
+        "--trace",
+        default=None,
+        help="Ghi search trace nhị phân (chỉ variant vigenere, xem crypto.trace)",
+    )
     args = parser.parse_args()
+    if args.trace and args.variant != "vigenere":
+        parser.error("--trace chỉ hỗ trợ variant vigenere")
 
     with open(args.input, "r", encoding="utf-8", errors="ignore") as f:
         ciphertext = f.read()
 
-    key, plaintext, score = _break_vigenere_internal(
-        ciphertext,
-        max_key_len=args.max_key,
-        top_k=args.top_k,
-    )
+    if args.trace:
+        key, plaintext, score = _break_vigenere_internal(
+            ciphertext,
+            args.max_key,
+            args.top_k,
+            refine_top=args.refine_top,
+            workers=args.workers,
+            trace=args.trace,
+        )
+    else:
+        key, plaintext, score = _break_variant_internal(
+            ciphertext,
+            variant=args.variant,
+            max_key_len=args.max_key,
+            top_k=args.top_k,
+            refine_top=args.refine_top,
+            workers=args.workers,
+        )
 
     with open(args.output, "w", encoding="utf-8", errors="ignore") as out:
         out.write(key + "\n")
@@ -370,4 +1011,7 @@ def _run_cli():
 
 
 if __name__ == "__main__":
-    _run_cli()
+    from .profiling import profile_from_env
+
+    with profile_from_env("vigenere"):
+        _run_cli()
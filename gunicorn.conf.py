@@ -0,0 +1,19 @@
+# gunicorn.conf.py
+"""
+Chạy production nhiều worker:
+    gunicorn -c gunicorn.conf.py
+
+preload_app = True: master import app + gọi create_app() (load n-gram,
+wordlist, bảng quadgram) trước khi fork, nên các worker dùng chung model
+(copy-on-write) và request đầu tiên không bị chậm. Kiểm tra qua GET /readyz.
+"""
+
+import os
+
+wsgi_app = "app:create_app()"
+preload_app = True
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+# Substitution breaker có thể chạy lâu với input lớn
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
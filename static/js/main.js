@@ -101,7 +101,7 @@ function validateFile(fileInput) {
   if (!file) return { valid: false, message: "" };
 
   const allowedExtensions = ["txt"];
-  const maxSize = 15000; // 15000 characters
+  const maxSize = 15000; // vượt ngưỡng này server tự phá mã theo stream
 
   // Check extension
   const fileName = file.name.toLowerCase();
@@ -118,8 +118,9 @@ function validateFile(fileInput) {
   const fileSizeInChars = file.size; // bytes ~ chars for text
   if (fileSizeInChars > maxSize) {
     return {
-      valid: false,
-      message: `File quá lớn. Tối đa ${maxSize} ký tự (File hiện tại: ~${fileSizeInChars} ký tự)`,
+      valid: true,
+      large: true,
+      message: `File lớn (~${fileSizeInChars} ký tự): server sẽ phá mã theo stream, kết quả hiển thị ${maxSize} ký tự đầu`,
     };
   }
 
@@ -184,16 +185,18 @@ function updateCharCounter(textarea) {
     counter.classList.add("warning");
   }
 
-  // Show toast if exceeded
+  // Vượt giới hạn: server tự chuyển sang stream, chỉ báo 1 lần
   if (currentLength > maxLength) {
-    textarea.classList.add("is-invalid");
-    showToast(
-      `Văn bản quá dài! Vui lòng rút ngắn xuống dưới ${maxLength} ký tự`,
-      "error",
-      "Vượt giới hạn"
-    );
+    if (!textarea.dataset.streamNotice) {
+      textarea.dataset.streamNotice = "1";
+      showToast(
+        `Văn bản dài hơn ${maxLength} ký tự: server sẽ phá mã theo stream, kết quả hiển thị ${maxLength} ký tự đầu`,
+        "info",
+        "Input lớn"
+      );
+    }
   } else {
-    textarea.classList.remove("is-invalid");
+    delete textarea.dataset.streamNotice;
   }
 }
 
@@ -542,7 +545,9 @@ document.addEventListener("DOMContentLoaded", () => {
           const validation = validateFile(this);
           showFileValidation(this, validation.valid, validation.message);
 
-          if (validation.valid) {
+          if (validation.large) {
+            showToast(validation.message, "info", "Input lớn");
+          } else if (validation.valid) {
             this.classList.add("border-success");
             setTimeout(() => this.classList.remove("border-success"), 1500);
             showToast("File đã được chọn thành công", "success");
@@ -579,24 +584,6 @@ document.addEventListener("DOMContentLoaded", () => {
       const submitBtn = this.querySelector('button[type="submit"]');
       if (!submitBtn) return;
 
-      // Validate textareas
-      const textareas = this.querySelectorAll("textarea:not([readonly])");
-      let hasError = false;
-
-      textareas.forEach((ta) => {
-        if (ta.value.length > 15000) {
-          e.preventDefault();
-          hasError = true;
-          showToast(
-            "Vui lòng giảm độ dài văn bản xuống dưới 15,000 ký tự",
-            "error",
-            "Không thể submit"
-          );
-        }
-      });
-
-      if (hasError) return;
-
       // Show loading
       const taskName = this.id.replace("-form", "");
       const taskLabels = {
@@ -0,0 +1,88 @@
+# tests/test_aes_core.py
+"""Bảng nhân GF(2^8) và block AES (FIPS-197)."""
+
+import random
+
+import pytest
+
+from crypto import aes_core
+from crypto.aes_core import _inv_mix_columns, _mix_columns, _mul
+
+
+def _gf_mul_reference(a, b):
+    """Nhân đa thức rồi rút gọn modulo x^8 + x^4 + x^3 + x + 1 (độc lập _mul)."""
+    product = 0
+    for bit in range(8):
+        if b >> bit & 1:
+            product ^= a << bit
+    for bit in range(14, 7, -1):
+        if product >> bit & 1:
+            product ^= 0x11B << (bit - 8)
+    return product
+
+
+@pytest.mark.parametrize("n", [2, 3, 9, 11, 13, 14])
+def test_mul_tables(n):
+    table = getattr(aes_core, f"MUL{n}")
+    assert len(table) == 256
+    for x in range(256):
+        assert table[x] == _mul(x, n) == _gf_mul_reference(x, n)
+
+
+def test_mul_fips197_examples():
+    # FIPS-197 §4.2: {57} * {83} = {c1}, {57} * {13} = {fe}
+    assert _mul(0x57, 0x83) == 0xC1
+    assert _mul(0x57, 0x13) == 0xFE
+
+
+def test_mix_columns_roundtrip():
+    # Cột ví dụ MixColumns: db 13 53 45 -> 8e 4d a1 bc
+    state = list(bytes.fromhex("db135345f20a225c01010101c6c6c6c6"))
+    _mix_columns(state)
+    assert bytes(state).hex() == "8e4da1bc9fdc589d01010101c6c6c6c6"
+    _inv_mix_columns(state)
+    assert bytes(state).hex() == "db135345f20a225c01010101c6c6c6c6"
+
+
+# FIPS-197 Appendix C: plaintext 00112233..ff, key 000102..
+FIPS197 = [
+    ("000102030405060708090a0b0c0d0e0f", "69c4e0d86a7b0430d8cdb78070b4c55a"),
+    (
+        "000102030405060708090a0b0c0d0e0f1011121314151617",
+        "dda97ca4864cdfe06eaf70a0ec0d7191",
+    ),
+    (
+        "000102030405060708090a0b0c0d0e0f101112131415161718191a1b1c1d1e1f",
+        "8ea2b7ca516745bfeafc49904b496089",
+    ),
+]
+FIPS197_PLAIN = "00112233445566778899aabbccddeeff"
+
+
+@pytest.mark.parametrize("key_hex, cipher_hex", FIPS197)
+def test_fips197_byte_and_word_paths(key_hex, cipher_hex):
+    round_keys = aes_core.key_expansion(bytes.fromhex(key_hex))
+    plain, cipher = bytes.fromhex(FIPS197_PLAIN), bytes.fromhex(cipher_hex)
+    assert aes_core.aes_encrypt_block(plain, round_keys) == cipher
+    assert aes_core.aes_decrypt_block(cipher, round_keys) == plain
+
+    words = aes_core.key_words(round_keys)
+    inv_words = aes_core.inv_key_words(round_keys)
+    block = int.from_bytes(plain, "big")
+    assert aes_core.aes_encrypt_word(block, words) == int(cipher_hex, 16)
+    assert aes_core.aes_decrypt_word(int(cipher_hex, 16), inv_words) == block
+
+
+@pytest.mark.parametrize("key_size", [16, 24, 32])
+def test_ttable_matches_byte_path(key_size):
+    rng = random.Random(key_size)
+    for _ in range(100):
+        round_keys = aes_core.key_expansion(rng.randbytes(key_size))
+        block = rng.randbytes(16)
+        words = aes_core.key_words(round_keys)
+        inv_words = aes_core.inv_key_words(round_keys)
+        value = int.from_bytes(block, "big")
+        encrypted = aes_core.aes_encrypt_word(value, words).to_bytes(16, "big")
+        decrypted = aes_core.aes_decrypt_word(value, inv_words).to_bytes(16, "big")
+        assert encrypted == aes_core.aes_encrypt_block(block, round_keys)
+        assert decrypted == aes_core.aes_decrypt_block(block, round_keys)
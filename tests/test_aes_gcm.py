@@ -0,0 +1,116 @@
+# tests/test_aes_gcm.py
+"""AES-GCM: test vector NIST (McGrew & Viega) và đối chiếu pycryptodome."""
+
+import random
+
+import pytest
+
+from crypto.aes_modes import aes_decrypt, aes_encrypt
+
+K1 = "feffe9928665731c6d6a8f9467308308"
+P1 = (
+    "d9313225f88406e5a55909c5aff5269a86a7a9531534f7da2e4c303d8a318a72"
+    "1c3c0c95956809532fcf0e2449a6b525b16aedf5aa0de657ba637b391aafd255"
+)
+A1 = "feedfacedeadbeeffeedfacedeadbeefabaddad2"
+
+# (key, nonce, plaintext, aad, ciphertext, tag)
+VECTORS = [
+    # Test case 1-2: key 0, nonce 96 bit, không AAD
+    ("00" * 16, "00" * 12, "", "", "", "58e2fccefa7e3061367f1d57a4e7455a"),
+    (
+        "00" * 16,
+        "00" * 12,
+        "00" * 16,
+        "",
+        "0388dace60b6a392f328c2b971b2fe78",
+        "ab6e47d42cec13bdf53a67b21257bddf",
+    ),
+    # Test case 3: nonce 96 bit, không AAD
+    (
+        K1,
+        "cafebabefacedbaddecaf888",
+        P1,
+        "",
+        "42831ec2217774244b7221b784d0d49ce3aa212f2c02a4e035c17e2329aca12e"
+        "21d514b25466931c7d8f6a5aac84aa051ba30b396a0aac973d58e091473f5985",
+        "4d5c2af327cd64a62cf35abd2ba6fab4",
+    ),
+    # Test case 4: nonce 96 bit, có AAD, plaintext không chẵn block
+    (
+        K1,
+        "cafebabefacedbaddecaf888",
+        P1[:120],
+        A1,
+        "42831ec2217774244b7221b784d0d49ce3aa212f2c02a4e035c17e2329aca12e"
+        "21d514b25466931c7d8f6a5aac84aa051ba30b396a0aac973d58e091",
+        "5bc94fbc3221a5db94fae95ae7121a47",
+    ),
+    # Test case 5: nonce 64 bit (J0 = GHASH(nonce))
+    (
+        K1,
+        "cafebabefacedbad",
+        P1[:120],
+        A1,
+        "61353b4c2806934a777ff51fa22a4755699b2a714fcdc6f83766e5f97b6c7423"
+        "73806900e49f24b22b097544d4896b424989b5e1ebac0f07c23f4598",
+        "3612d2e79e3b0785561be14aaca2fccb",
+    ),
+    # Test case 6: nonce 480 bit
+    (
+        K1,
+        "9313225df88406e555909c5aff5269aa6a7a9538534f7da1e4c303d2a318a728"
+        "c3c0c95156809539fcf0e2429a6b525416aedbf5a0de6a57a637b39b",
+        P1[:120],
+        A1,
+        "8ce24998625615b603a033aca13fb894be9112a5c3a211a8ba262a3cca7e2ca7"
+        "01e4a9a4fba43c90ccdcb281d48c7c6fd62875d2aca417034c34aee5",
+        "619cc5aefffe0bfa462af43c1699d050",
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "key, nonce, plaintext, aad, ciphertext, tag",
+    VECTORS,
+    ids=["tc1", "tc2", "tc3", "tc4-aad", "tc5-nonce64", "tc6-nonce480"],
+)
+def test_nist_vectors(key, nonce, plaintext, aad, ciphertext, tag):
+    key, nonce = bytes.fromhex(key), bytes.fromhex(nonce)
+    plaintext, aad = bytes.fromhex(plaintext), bytes.fromhex(aad)
+    out, nonce_used = aes_encrypt(plaintext, key, "GCM", nonce, aad=aad)
+    assert nonce_used == nonce
+    assert out.hex() == ciphertext + tag
+    assert aes_decrypt(out, key, "GCM", nonce, aad=aad) == plaintext
+
+
+def test_tag_mismatch_rejected():
+    key, nonce, aad = bytes.fromhex(K1), bytes.fromhex("cafebabefacedbad"), b"hdr"
+    out, _ = aes_encrypt(bytes.fromhex(P1), key, "GCM", nonce, aad=aad)
+    tampered = [
+        (out[:-1] + bytes([out[-1] ^ 1]), nonce, aad),  # tag
+        (bytes([out[0] ^ 0x80]) + out[1:], nonce, aad),  # ciphertext
+        (out, nonce, b"hdR"),  # AAD
+        (out, nonce[:-1] + b"\x00", aad),  # nonce
+        (out[:15], nonce, aad),  # thiếu tag
+    ]
+    for data, n, a in tampered:
+        with pytest.raises(ValueError):
+            aes_decrypt(data, key, "GCM", n, aad=a)
+
+
+def test_matches_pycryptodome():
+    AES = pytest.importorskip("Crypto.Cipher.AES")
+    rng = random.Random(47)
+    for _ in range(60):
+        key = rng.randbytes(rng.choice((16, 24, 32)))
+        nonce = rng.randbytes(rng.choice((1, 8, 12, 13, 16, 60)))
+        aad = rng.randbytes(rng.choice((0, 5, 16, 40)))
+        # > NUMPY_MIN_BLOCKS block thỉnh thoảng để đi qua engine NumPy
+        plaintext = rng.randbytes(rng.choice((0, 1, 15, 16, 33, 4096 + 7)))
+        reference = AES.new(key, AES.MODE_GCM, nonce=nonce)
+        reference.update(aad)
+        ciphertext, tag = reference.encrypt_and_digest(plaintext)
+        out, _ = aes_encrypt(plaintext, key, "GCM", nonce, aad=aad)
+        assert out == ciphertext + tag
+        assert aes_decrypt(out, key, "GCM", nonce, aad=aad) == plaintext
@@ -0,0 +1,154 @@
+# tests/test_app.py
+"""Route phá mã tự chuyển sang pipeline stream khi input vượt giới hạn."""
+
+import io
+
+import pytest
+
+import app as app_module
+from crypto import des_modes, metrics
+from crypto.aes_modes import aes_encrypt
+from crypto.caesar import decrypt_caesar_with_key
+from crypto.vigenere import encrypt_vigenere
+
+SENTENCE = (
+    "The security of a cipher should not depend on the secrecy of the "
+    "algorithm but only on the secrecy of the key. "
+)
+TEXT = SENTENCE * (app_module.MAX_CONTENT_LENGTH // len(SENTENCE) + 20)
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def test_api_over_limit_streams(client, capsys):
+    response = client.post(
+        "/api/task1/caesar", data={"cipher_text": decrypt_caesar_with_key(TEXT, -3)}
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert response.headers["X-Key"] == "3"
+    assert response.get_data(as_text=True) == TEXT.strip()
+
+
+def test_api_upload_over_limit_streams(client, capsys):
+    upload = (io.BytesIO(encrypt_vigenere(TEXT, "LEMON").encode()), "big.txt")
+    response = client.post("/api/task3/vigenere", data={"cipher_file": upload})
+    assert response.status_code == 200
+    assert response.headers["X-Key"] == "LEMON"
+    assert response.get_data(as_text=True) == TEXT
+
+
+def test_form_over_limit_renders_preview(client, capsys):
+    upload = (io.BytesIO(encrypt_vigenere(TEXT, "LEMON").encode()), "big.txt")
+    response = client.post("/task3/vigenere", data={"cipher_file": upload})
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert "LEMON" in body
+    assert "Quá dài" not in body and "quá dài" not in body
+
+
+@pytest.mark.parametrize(
+    "ciphertext, cipher, key",
+    [
+        (decrypt_caesar_with_key(SENTENCE * 3, -3), "caesar", 3),
+        (encrypt_vigenere(SENTENCE * 8, "LEMON"), "vigenere", "LEMON"),
+    ],
+    ids=["caesar", "vigenere"],
+)
+def test_api_auto_routes_to_breaker(client, ciphertext, cipher, key, capsys):
+    response = client.post("/api/auto", data={"cipher_text": ciphertext})
+    data = response.get_json()
+    assert data["cipher"] == cipher
+    assert data["key"] == key
+
+
+def test_under_limit_uses_json(client, capsys):
+    response = client.post(
+        "/api/task1/caesar",
+        data={"cipher_text": decrypt_caesar_with_key(SENTENCE * 5, -3)},
+    )
+    assert response.is_json
+    assert response.get_json()["key"] == 3
+
+
+@pytest.mark.parametrize(
+    "key, label", [("00" * 8, "DES"), ("0123456789abcdef" * 2, "3DES")]
+)
+def test_des_stream_metrics_label_matches_des_modes(client, key, label):
+    counter = metrics.CIPHER_BYTES
+    before = counter.value(cipher=label, direction="encrypt")
+    response = client.post(
+        "/api/task4/des",
+        data=b"x" * 100,
+        content_type="application/octet-stream",
+        headers={"X-Key": key, "X-Mode": "ECB", "X-Action": "encrypt"},
+    )
+    assert response.status_code == 200
+    assert len(response.get_data()) == 104
+    assert counter.value(cipher=label, direction="encrypt") == before + 100
+    assert des_modes.cipher_label(bytes.fromhex(key)) == label
+
+
+def _aes_item(**fields):
+    item = {"key": "feffe9928665731c6d6a8f9467308308", "mode": "GCM"}
+    item.update(fields)
+    return item
+
+
+@pytest.mark.parametrize("nonce", ["cafebabefacedbaddecaf888", "cafebabefacedbad"])
+def test_api_gcm_nonce_and_aad(client, nonce):
+    encrypted = client.post(
+        "/api/task5/aes",
+        json=_aes_item(action="encrypt", data="hello", iv=nonce, aad="feedface"),
+    ).get_json()
+    assert encrypted["success"] and encrypted["iv"] == nonce
+    assert len(encrypted["result"]) == 2 * (5 + 16)
+
+    decrypted = client.post(
+        "/api/task5/aes",
+        json=_aes_item(
+            action="decrypt", data=encrypted["result"], iv=nonce, aad="feedface"
+        ),
+    )
+    assert decrypted.get_json()["result"] == "hello"
+
+    wrong_aad = client.post(
+        "/api/task5/aes",
+        json=_aes_item(
+            action="decrypt", data=encrypted["result"], iv=nonce, aad="feedfacf"
+        ),
+    )
+    assert wrong_aad.status_code == 400
+    assert "authentication" in wrong_aad.get_json()["error"]
+
+
+def test_api_aad_rejected_outside_gcm(client):
+    response = client.post(
+        "/api/task5/aes",
+        json=_aes_item(action="encrypt", data="hi", mode="CBC", iv="00" * 16, aad="00"),
+    )
+    assert response.status_code == 400
+    assert "GCM" in response.get_json()["error"]
+
+
+def test_form_gcm_with_aad(client):
+    key, nonce, aad = bytes(16), bytes(8), bytes.fromhex("feedface")
+    expected, _ = aes_encrypt(b"hello", key, "GCM", nonce, aad=aad)
+    response = client.post(
+        "/task5/aes",
+        data={
+            "action": "encrypt",
+            "mode": "GCM",
+            "key": key.hex(),
+            "key_size": "128",
+            "iv": nonce.hex(),
+            "aad": aad.hex(),
+            "plaintext_input": "hello",
+        },
+    )
+    body = response.get_data(as_text=True)
+    assert expected.hex() in body
+    assert nonce.hex() in body
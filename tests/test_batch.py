@@ -0,0 +1,56 @@
+# tests/test_batch.py
+"""Batch breaker: report JSON-lines theo thứ tự input, file output từng file."""
+
+import json
+
+from crypto.batch import _collect_inputs, run_batch
+from crypto.caesar import decrypt_caesar_with_key
+from crypto.vigenere import encrypt_vigenere
+
+TEXT = (
+    "The security of a cipher should not depend on the secrecy of the "
+    "algorithm but only on the secrecy of the key this principle was stated "
+    "by Kerckhoffs in the nineteenth century and it remains the foundation "
+    "of modern cryptography today engineers who ignore it usually learn the "
+    "lesson the hard way when their system is broken"
+)
+
+
+def test_run_batch_reports_in_input_order(tmp_path):
+    src = tmp_path / "in"
+    src.mkdir()
+    # File đầu lớn nhất (xong sau cùng) để thứ tự hoàn thành khác thứ tự input
+    (src / "a_vigenere.txt").write_text(encrypt_vigenere(TEXT * 4, "LEMON"))
+    (src / "b_caesar.txt").write_text(decrypt_caesar_with_key(TEXT, -3))
+    (src / "c_caesar.txt").write_text(decrypt_caesar_with_key(TEXT, -7))
+    (src / "notes.md").write_text("bỏ qua")
+    paths = _collect_inputs([str(src)])
+    assert [p.rsplit("/", 1)[-1] for p in paths] == [
+        "a_vigenere.txt",
+        "b_caesar.txt",
+        "c_caesar.txt",
+    ]
+
+    report = tmp_path / "report.jsonl"
+    out_dir = tmp_path / "out"
+    records = run_batch(paths, "auto", 2, str(report), str(out_dir))
+
+    lines = [json.loads(line) for line in report.read_text().splitlines()]
+    assert [r["file"] for r in lines] == paths
+    assert [r["file"] for r in records] == paths
+    assert [(r["cipher"], r["key"]) for r in lines] == [
+        ("vigenere", "LEMON"),
+        ("caesar", 3),
+        ("caesar", 7),
+    ]
+    assert all(r["success"] for r in lines)
+    output = (out_dir / "b_caesar.caesar.txt").read_text()
+    assert output == "3\n" + TEXT
+
+
+def test_run_batch_records_missing_file(tmp_path):
+    missing = str(tmp_path / "missing.txt")
+    (record,) = run_batch([missing], "caesar", 1, str(tmp_path / "r.jsonl"))
+    assert record["file"] == missing
+    assert record["success"] is False
+    assert "error" in record
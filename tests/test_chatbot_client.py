@@ -0,0 +1,143 @@
+# tests/test_chatbot_client.py
+"""GeminiClient: cache TTL, circuit breaker theo model, connection pool."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crypto.chatbot_client import GeminiClient, RequestsTransport, TransportError
+
+MODELS = ("model-a", "model-b")
+
+
+def _answer(text):
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubTransport:
+    """Trả lời theo model: status cố định hoặc TransportError; ghi lại URL."""
+
+    def __init__(self, responses):
+        self.responses = responses  # model -> status | TransportError
+        self.calls = []
+
+    def post(self, url, payload, headers, timeout):
+        model = url.rsplit("/", 1)[-1].split(":")[0]
+        self.calls.append(model)
+        response = self.responses[model]
+        if isinstance(response, Exception):
+            raise response
+        if response == 200:
+            return 200, _answer(f"answer from {model}")
+        return response, {"error": {"code": response}}
+
+
+def _client(responses, clock):
+    transport = StubTransport(responses)
+    client = GeminiClient(
+        "test-key", models=MODELS, transport=transport, cache_ttl=60, clock=clock
+    )
+    return client, transport
+
+
+def test_cache_hit_within_ttl():
+    clock = FakeClock()
+    client, transport = _client({"model-a": 200, "model-b": 200}, clock)
+
+    assert client.ask("AES là gì?") == ("answer from model-a", None)
+    clock.now += 59
+    # Câu hỏi chuẩn hóa giống nhau (hoa / thường, khoảng trắng, dấu ?)
+    assert client.ask("  aes   LÀ gì ") == ("answer from model-a", None)
+    assert transport.calls == ["model-a"]
+    assert client.cache.hits == 1
+
+    clock.now += 2  # hết TTL -> gọi lại API
+    client.ask("AES là gì?")
+    assert transport.calls == ["model-a", "model-a"]
+
+
+@pytest.mark.parametrize(
+    "status, cooldown, error", [(429, 60, "Rate limit"), (404, 3600, "not available")]
+)
+def test_breaker_opens_and_next_model_is_used(status, cooldown, error):
+    clock = FakeClock()
+    client, transport = _client({"model-a": status, "model-b": 200}, clock)
+
+    assert client.ask("q1") == ("answer from model-b", None)
+    assert transport.calls == ["model-a", "model-b"]
+    assert client.breaker.is_open("model-a")
+
+    # Trong cooldown: model-a bị bỏ qua, không tốn request
+    clock.now += cooldown - 1
+    assert client.ask("q2") == ("answer from model-b", None)
+    assert transport.calls == ["model-a", "model-b", "model-b"]
+
+    # Hết cooldown: thử lại model-a
+    clock.now += 2
+    client.ask("q3")
+    assert transport.calls[-2:] == ["model-a", "model-b"]
+
+    transport.responses["model-b"] = status
+    text, last_error = client.ask("q4")
+    assert text is None
+    assert error in last_error
+
+
+def test_transport_error_falls_through_without_breaker():
+    clock = FakeClock()
+    client, transport = _client(
+        {"model-a": TransportError("Timeout"), "model-b": 200}, clock
+    )
+    assert client.ask("q") == ("answer from model-b", None)
+    assert not client.breaker.is_open("model-a")
+
+
+class _StubGemini(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    ports = []
+
+    def do_POST(self):
+        self.ports.append(self.client_address[1])
+        length = int(self.headers["Content-Length"])
+        prompt = json.loads(self.rfile.read(length))["contents"][0]["parts"][0]
+        body = json.dumps(_answer(prompt["text"].upper())).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    _StubGemini.ports = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubGemini)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/v1beta"
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_reused_against_stub_server(stub_server):
+    transport = RequestsTransport()
+    client = GeminiClient("test-key", base_url=stub_server, transport=transport)
+
+    answers = [client.ask(f"question {i}") for i in range(3)]
+    assert answers == [(f"QUESTION {i}", None) for i in range(3)]
+    # 3 request trên cùng 1 kết nối keep-alive (cùng port phía client)
+    assert len(_StubGemini.ports) == 3
+    assert len(set(_StubGemini.ports)) == 1
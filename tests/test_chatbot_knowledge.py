@@ -0,0 +1,72 @@
+# tests/test_chatbot_knowledge.py
+"""find_best_match qua index token: giữ câu trả lời của bản quét substring cũ."""
+
+import pytest
+
+from crypto.chatbot_knowledge import FAQ, KNOWLEDGE_BASE, find_best_match
+
+
+def _topic_answer(topic):
+    kb = KNOWLEDGE_BASE[topic]
+    extra = kb.get("algorithm") or kb.get("breaking")
+    return kb["description"] + ("\n\n" + extra if extra else "")
+
+
+# Câu trả lời của find_best_match bản baseline (quét substring)
+BASELINE_FAQ = [
+    ("caesar", "caesar"),
+    ("Caesar", "caesar"),
+    ("aes256 la gi", "aes"),
+    ("AES-128", "aes"),
+    ("3des là gì", "des là gì"),
+    ("DES-CBC", "des"),
+    ("AES-CBC", "aes"),
+    ("AES256-CBC", "aes"),
+    ("ecb và cbc", "ecb"),
+    ("IV là gì?", "iv là gì"),
+    ("s-box là gì", "s-box là gì"),
+    ("kasiski", "kasiski test"),
+    ("index of coincidence", "index of coincidence"),
+    ("hướng dẫn task 2", "hướng dẫn task 2"),
+    ("padding là gì", "padding"),
+    ("best practice", "best practices"),
+    ("gcm mode là gì", "gcm mode"),
+    ("mixcolumns", "mixcolumns là gì"),
+]
+BASELINE_TOPIC = [
+    ("rot13 la gi", "caesar"),
+    ("rot 13", "caesar"),
+    ("monoalphabetic", "substitution"),
+    ("polyalphabetic cipher", "vigenere"),
+    ("feistel network", "des"),
+    ("128-bit key", "aes"),
+]
+
+
+@pytest.mark.parametrize("query, key", BASELINE_FAQ)
+def test_baseline_faq_answers(query, key):
+    assert find_best_match(query) == FAQ[key]
+
+
+@pytest.mark.parametrize("query, topic", BASELINE_TOPIC)
+def test_baseline_topic_answers(query, topic):
+    assert find_best_match(query) == _topic_answer(topic)
+
+
+@pytest.mark.parametrize(
+    "query, key",
+    [
+        ("Caesar là gì?", "caesar là gì"),
+        ("AES hoạt động như thế nào?", "aes hoạt động như thế nào"),
+        ("Tại sao ECB không an toàn?", "tại sao ecb không an toàn"),
+        ("ecb vs cbc", "ecb vs cbc"),
+        ("task2", "task 2"),
+    ],
+)
+def test_longest_faq_key_wins(query, key):
+    assert find_best_match(query) == FAQ[key]
+
+
+def test_no_match():
+    assert find_best_match("thời tiết hôm nay") is None
+    assert find_best_match("?!") is None
@@ -0,0 +1,46 @@
+# tests/test_classifier.py
+"""Nhận dạng loại cipher từ histogram / text."""
+
+import pytest
+
+from crypto.caesar import decrypt_caesar_with_key
+from crypto.classifier import classify_cipher, classify_counts
+from crypto.substitution import _apply_key
+from crypto.vigenere import _index_of_coincidence, encrypt_vigenere
+
+TEXT = (
+    "The security of a cipher should not depend on the secrecy of the "
+    "algorithm but only on the secrecy of the key this principle was stated "
+    "by Kerckhoffs in the nineteenth century and it remains the foundation "
+    "of modern cryptography today engineers who ignore it usually learn the "
+    "lesson the hard way when their system is broken"
+)
+
+
+def test_counts_ic_matches_text_ic():
+    letters = "".join(ch for ch in TEXT.upper() if ch.isalpha())
+    counts = [letters.count(chr(65 + i)) for i in range(26)]
+    _, stats = classify_counts(counts, letters)
+    assert stats["ic"] == round(_index_of_coincidence(letters), 5)
+
+
+def test_classify_caesar():
+    cipher, stats = classify_cipher(decrypt_caesar_with_key(TEXT, -3))
+    assert cipher == "caesar"
+    assert stats["caesar_shift"] == 3
+
+
+def test_classify_substitution():
+    cipher, _ = classify_cipher(_apply_key(TEXT, "QWERTYUIOPASDFGHJKLZXCVBNM"))
+    assert cipher == "substitution"
+
+
+@pytest.mark.parametrize("key", ["KEY", "LEMON", "CRYPTO", "SECURITY", "CRYPTOGRAPHY"])
+def test_classify_vigenere_period(key):
+    # IC cao nhất rơi vào bội số của chu kỳ (20, 24, 21...) -> period phải là
+    # chu kỳ thật, không phải bội số hay ước "một phần" (2, 3 với CRYPTO)
+    with open("data/english_corpus.txt", encoding="utf-8") as f:
+        text = f.read(2000)
+    cipher, stats = classify_cipher(encrypt_vigenere(text, key))
+    assert cipher == "vigenere"
+    assert stats["period"] == len(key)
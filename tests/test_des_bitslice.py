@@ -0,0 +1,87 @@
+# tests/test_des_bitslice.py
+"""DES bitsliced (NumPy) đối chiếu với des_core từng block."""
+
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from crypto import des_bitslice  # noqa: E402
+from crypto.des_core import (  # noqa: E402
+    des_decrypt_block,
+    des_encrypt_block,
+    des_key_schedule,
+)
+
+
+def _blocks(data: bytes):
+    return [data[i : i + 8] for i in range(0, len(data), 8)]
+
+
+@pytest.mark.parametrize("count", [1, des_bitslice.BITSLICE_MIN_BLOCKS, 200])
+def test_blocks_match_des_core(count):
+    rng = random.Random(f"blocks-{count}")
+    subkeys = des_key_schedule(rng.randbytes(8))
+    data = rng.randbytes(8 * count)
+    expected = b"".join(des_encrypt_block(b, subkeys) for b in _blocks(data))
+    assert des_bitslice.encrypt_blocks(data, subkeys) == expected
+    assert des_bitslice.decrypt_blocks(expected, subkeys) == data
+
+
+def test_three_stage_blocks_match_des_core():
+    rng = random.Random("3des")
+    k1, k2, k3 = (des_key_schedule(rng.randbytes(8)) for _ in range(3))
+    data = rng.randbytes(8 * 70)
+    expected = b"".join(
+        des_encrypt_block(des_decrypt_block(des_encrypt_block(b, k1), k2), k3)
+        for b in _blocks(data)
+    )
+    assert des_bitslice.crypt_blocks(data, [k1, k2[::-1], k3]) == expected
+
+
+def test_cbc_decrypt_matches_des_core():
+    rng = random.Random("cbc")
+    subkeys = des_key_schedule(rng.randbytes(8))
+    iv, data = rng.randbytes(8), rng.randbytes(8 * 40)
+    prev, expected = iv, []
+    for block in _blocks(data):
+        plain = des_decrypt_block(block, subkeys)
+        expected.append(bytes(a ^ b for a, b in zip(plain, prev)))
+        prev = block
+    result = des_bitslice.cbc_decrypt_blocks(data, [subkeys[::-1]], iv)
+    assert result == b"".join(expected)
+
+
+@pytest.mark.parametrize("decrypt", [False, True])
+def test_many_keys_match_des_core(decrypt):
+    rng = random.Random(f"many-{decrypt}")
+    block = rng.randbytes(8)
+    keys = [rng.randbytes(8) for _ in range(150)]  # không chia hết 64 lane
+    single = des_decrypt_block if decrypt else des_encrypt_block
+    expected = [single(block, des_key_schedule(k)) for k in keys]
+    assert des_bitslice.encrypt_many_keys(block, keys, decrypt) == expected
+    assert des_bitslice.encrypt_many_keys(block, b"".join(keys), decrypt) == expected
+
+
+def test_search_keys_finds_planted_keys():
+    rng = random.Random("search")
+    key, plaintext = rng.randbytes(8), rng.randbytes(8)
+    ciphertext = des_encrypt_block(plaintext, des_key_schedule(key))
+    # Qua ranh giới batch (BATCH_LANES); key chỉ khác bit parity cũng khớp
+    keys = [rng.randbytes(8) for _ in range(des_bitslice.BATCH_LANES + 70)]
+    parity_twin = bytes(b ^ 1 for b in key)
+    planted = {5: key, des_bitslice.BATCH_LANES + 3: parity_twin}
+    for index, k in planted.items():
+        keys[index] = k
+    assert des_bitslice.search_keys(plaintext, ciphertext, keys) == sorted(planted)
+
+
+def test_rejects_bad_lengths():
+    subkeys = des_key_schedule(bytes(8))
+    with pytest.raises(ValueError):
+        des_bitslice.encrypt_blocks(bytes(12), subkeys)
+    with pytest.raises(ValueError):
+        des_bitslice.encrypt_many_keys(bytes(7), [bytes(8)])
+    with pytest.raises(ValueError):
+        des_bitslice.search_keys(bytes(8), bytes(8), bytes(12))
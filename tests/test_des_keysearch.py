@@ -0,0 +1,206 @@
+# tests/test_des_keysearch.py
+"""Keyspace, search và job queue (trạng thái dùng chung giữa các worker)."""
+
+import json
+import os
+import time
+
+import pytest
+
+import app as app_module
+from crypto import des_keysearch
+from crypto.des_core import des_encrypt_block, des_key_schedule
+
+PLAINTEXT = b"HELLO123ATTACKAT"
+KEY = bytes.fromhex("133457799BBC0000")
+MASK = bytes.fromhex("000000000000FFFF")
+
+
+def _encrypt(key: bytes, plaintext: bytes = PLAINTEXT) -> bytes:
+    subkeys = des_key_schedule(key)
+    return b"".join(
+        des_encrypt_block(plaintext[i : i + 8], subkeys)
+        for i in range(0, len(plaintext), 8)
+    )
+
+
+def _strip_parity(key: bytes) -> bytes:
+    return bytes(b & 0xFE for b in key)
+
+
+@pytest.fixture
+def job_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(des_keysearch, "JOB_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def client(job_dir):
+    return app_module.app.test_client()
+
+
+def _wait(job_id, statuses=("done", "cancelled", "error"), timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        state = des_keysearch.get_job(job_id)
+        if state["status"] in statuses:
+            return state
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} chưa xong sau {timeout}s")
+
+
+@pytest.mark.parametrize(
+    "keyspace",
+    [
+        des_keysearch.MaskKeyspace(KEY, MASK),
+        des_keysearch.CharsetKeyspace("lower", "secr"),
+    ],
+)
+def test_keys_range_matches_key_at(keyspace):
+    start, stop = 1000, 1300
+    keys = keyspace.keys_range(start, stop)
+    assert keys == b"".join(keyspace.key_at(i) for i in range(start, stop))
+    assert len({keyspace.key_at(i) for i in range(keyspace.size)}) == keyspace.size
+
+
+def test_keyspace_sizes():
+    assert des_keysearch.MaskKeyspace(KEY, MASK).size == 2**14  # bỏ 2 bit parity
+    # lớp ký tự: a, bc, de, ..., xy, z
+    assert des_keysearch.CharsetKeyspace("lower", "secr").size == 14**4
+    assert des_keysearch.CharsetKeyspace("digits").size == 5**8
+    with pytest.raises(ValueError):
+        des_keysearch.MaskKeyspace(KEY[:7], MASK)
+    with pytest.raises(ValueError):
+        des_keysearch.CharsetKeyspace("lower", "prefix123")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_search_mask(workers):
+    key = bytes.fromhex("133457799BBCA5C3")
+    keyspace = des_keysearch.MaskKeyspace(KEY, MASK)
+    pairs = des_keysearch.make_pairs(PLAINTEXT, _encrypt(key))
+    result = des_keysearch.search(pairs, keyspace, workers, chunk_size=4096)
+    assert result["found"]
+    assert [_strip_parity(bytes.fromhex(k)) for k in result["keys"]] == [
+        _strip_parity(key)
+    ]
+    assert not result["cancelled"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_search_charset_find_all(workers):
+    key = b"secrkeys"
+    keyspace = des_keysearch.CharsetKeyspace("lower", "secr")
+    pairs = des_keysearch.make_pairs(PLAINTEXT, _encrypt(key))
+    result = des_keysearch.search(
+        pairs, keyspace, workers, find_all=True, chunk_size=4096
+    )
+    assert result["complete"] and result["tested"] == keyspace.size
+    assert [_strip_parity(k.encode()) for k in result["keys_text"]] == [
+        _strip_parity(key)
+    ]
+
+
+def test_search_cbc_pairs():
+    key = bytes.fromhex("0E329232EA6D0D73")
+    iv = bytes.fromhex("0123456789ABCDEF")
+    blocks, prev = [], iv
+    for i in range(0, len(PLAINTEXT), 8):
+        block = bytes(a ^ b for a, b in zip(PLAINTEXT[i : i + 8], prev))
+        prev = _encrypt(key, block)
+        blocks.append(prev)
+    ciphertext = b"".join(blocks)
+
+    known = bytes.fromhex("0E329232EA6D0000")
+    keyspace = des_keysearch.MaskKeyspace(known, MASK)
+    pairs = des_keysearch.make_pairs(PLAINTEXT, ciphertext, iv)
+    result = des_keysearch.search(pairs, keyspace, workers=1)
+    assert [_strip_parity(bytes.fromhex(k)) for k in result["keys"]] == [
+        _strip_parity(key)
+    ]
+    # không có IV: block đầu vẫn khớp nhưng block 2 loại key
+    no_iv = des_keysearch.make_pairs(PLAINTEXT, ciphertext)
+    assert not des_keysearch.search(no_iv, keyspace, workers=1)["found"]
+
+
+def test_api_keysearch_job(client):
+    key = b"secrkeys"
+    response = client.post(
+        "/api/des/keysearch",
+        json={
+            "plaintext": PLAINTEXT.decode(),
+            "ciphertext": _encrypt(key).hex(),
+            "charset": "lower",
+            "prefix": "secr",
+        },
+    )
+    assert response.status_code == 202
+    job_id = response.get_json()["job"]["id"]
+    assert response.headers["Location"].endswith(f"/api/des/keysearch/{job_id}")
+
+    state = _wait(job_id)
+    assert state["status"] == "done"
+    response = client.get(f"/api/des/keysearch/{job_id}")
+    assert response.status_code == 200
+    job = response.get_json()["job"]
+    assert job["result"]["found"]
+    assert _strip_parity(job["result"]["keys_text"][0].encode()) == _strip_parity(key)
+    # slot đã được trả, không còn file cancel / tmp
+    assert sorted(os.listdir(des_keysearch.JOB_DIR)) == [f"{job_id}.json"]
+
+
+def test_api_keysearch_errors(client):
+    assert client.get("/api/des/keysearch/" + "0" * 32).status_code == 404
+    assert client.get("/api/des/keysearch/../../etc").status_code == 404
+    assert client.delete("/api/des/keysearch/nope").status_code == 404
+    response = client.post("/api/des/keysearch", json={"plaintext": "HELLO123"})
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_job_visible_and_cancellable_from_other_worker(job_dir):
+    keyspace = des_keysearch.MaskKeyspace(KEY, bytes.fromhex("00000000FFFFFFFF"))
+    pairs = des_keysearch.make_pairs(PLAINTEXT, bytes(16))  # không key nào khớp
+    job = des_keysearch.submit_job(pairs, keyspace, workers=1)
+
+    # slot đang giữ -> job thứ 2 (từ bất kỳ worker nào) bị từ chối
+    with pytest.raises(ValueError):
+        des_keysearch.submit_job(pairs, keyspace, workers=1)
+
+    # worker khác không có job trong _JOBS: đọc / hủy qua JOB_DIR
+    with des_keysearch._JOBS_LOCK:
+        local = des_keysearch._JOBS.pop(job.id)
+    state = des_keysearch.cancel_job(job.id)
+    assert state["status"] in ("queued", "running")
+    assert os.path.exists(job_dir / f"{job.id}.cancel")
+
+    state = _wait(job.id)
+    assert state["status"] == "cancelled"
+    assert state["tested"] < keyspace.size
+    assert local.status == "cancelled"
+    assert not os.path.exists(job_dir / f"{job.id}.cancel")
+
+    # slot đã trả -> job mới chạy được
+    job = des_keysearch.submit_job(
+        des_keysearch.make_pairs(PLAINTEXT, _encrypt(KEY)),
+        des_keysearch.MaskKeyspace(KEY, MASK),
+        workers=1,
+    )
+    assert _wait(job.id)["result"]["found"]
+
+
+def test_dead_worker_slot_and_state(job_dir):
+    job_id = "a" * 32
+    dead_pid = 2**22 + 12345  # vượt pid_max mặc định -> không tồn tại
+    (job_dir / "active-0.lock").write_text(f"{dead_pid} {job_id}")
+    state = {"id": job_id, "status": "running", "pid": dead_pid, "created": 0}
+    (job_dir / f"{job_id}.json").write_text(json.dumps(state))
+
+    state = des_keysearch.get_job(job_id)
+    assert state["status"] == "error" and "pid" not in state
+
+    keyspace = des_keysearch.MaskKeyspace(KEY, MASK)
+    job = des_keysearch.submit_job(
+        des_keysearch.make_pairs(PLAINTEXT, _encrypt(KEY)), keyspace, workers=1
+    )
+    assert _wait(job.id)["status"] == "done"
@@ -0,0 +1,25 @@
+# tests/test_streaming.py
+"""Thống kê stream qua nhiều chunk khớp thống kê trên toàn bộ text."""
+
+from crypto.streaming import StreamStats, iter_string_chunks
+from crypto.vigenere import _index_of_coincidence
+
+TEXT = (
+    "The security of a cipher should not depend on the secrecy of the "
+    "algorithm but only on the secrecy of the key. "
+) * 5
+
+
+def test_stream_stats_ic_matches_text_ic():
+    stats = StreamStats()
+    for chunk in iter_string_chunks(TEXT, 37):
+        stats.update(chunk)
+    letters = "".join(ch for ch in TEXT.upper() if ch.isalpha())
+    assert stats.letters == len(letters)
+    assert stats.ic == _index_of_coincidence(letters)
+
+
+def test_stream_stats_ic_empty():
+    stats = StreamStats()
+    stats.update("123 !")
+    assert stats.ic == 0.0
@@ -0,0 +1,63 @@
+# tests/test_vigenere.py
+"""Phá mã Vigenère / autokey trên ciphertext ngắn (regression chọn độ dài khóa)."""
+
+import pytest
+
+from crypto.vigenere import (
+    break_vigenere,
+    break_vigenere_variant,
+    encrypt_autokey,
+    encrypt_vigenere,
+)
+
+DICKENS = (
+    "It was the best of times it was the worst of times it was the age of "
+    "wisdom it was the age of foolishness it was the epoch of belief it was "
+    "the epoch of incredulity it was the season of light it was the season "
+    "of darkness it was the spring of hope it was the winter of despair we "
+    "had everything before us we had nothing before us"
+)
+KERCKHOFFS = (
+    "The security of a cipher should not depend on the secrecy of the "
+    "algorithm but only on the secrecy of the key this principle was stated "
+    "by Kerckhoffs in the nineteenth century and it remains the foundation "
+    "of modern cryptography today engineers who ignore it usually learn the "
+    "lesson the hard way when their system is broken"
+)
+
+
+def _first_letters(text: str, count: int) -> str:
+    """Cắt text sau đúng count chữ cái A-Z."""
+    seen = 0
+    for i, ch in enumerate(text):
+        if ch.isalpha():
+            seen += 1
+            if seen > count:
+                return text[:i]
+    return text
+
+
+@pytest.mark.parametrize("text", [DICKENS, KERCKHOFFS], ids=["dickens", "kerckhoffs"])
+@pytest.mark.parametrize("letters", [150, 200])
+@pytest.mark.parametrize("key", ["SECURITY", "LEMON", "CRYPTOGRAPHY"])
+def test_break_short_text(text, letters, key, capsys):
+    # Key dài (bội số hoặc sai chu kỳ) overfit trên text ngắn -> phải trả về
+    # đúng chu kỳ ngắn nhất
+    plaintext = _first_letters(text, letters)
+    found, recovered, _ = break_vigenere(encrypt_vigenere(plaintext, key))
+    assert found == key
+    assert recovered == plaintext
+
+
+@pytest.mark.parametrize("primer", ["QUEEN", "FORTIFICATION"])
+def test_break_autokey_short_text(primer, capsys):
+    plaintext = DICKENS + " " + KERCKHOFFS
+    found, _, _ = break_vigenere_variant(encrypt_autokey(plaintext, primer), "autokey")
+    assert found == primer
+
+
+def test_parallel_matches_serial(capsys):
+    ciphertext = encrypt_vigenere(DICKENS + " " + KERCKHOFFS, "CRYPTOGRAPHY")
+    serial = break_vigenere(ciphertext)
+    assert break_vigenere(ciphertext, workers=2) == serial
+    assert serial[0] == "CRYPTOGRAPHY"